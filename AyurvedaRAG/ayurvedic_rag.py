@@ -4,10 +4,19 @@ Optimized for speed using parallel retrieval.
 """
 
 import os
-from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from dotenv import load_dotenv
-from openai import OpenAI
 import data_loader
+import kb_snapshot
+import llm_gateway
+import model_router
+import plan_store
+import telemetry
+import usage
+import vector_db
 from vector_db import AyurvedicStorage
 from ayurvedic_kb import (
     ALL_KNOWLEDGE, SUPPORTED_CONDITIONS
@@ -16,22 +25,51 @@ from ayurvedic_kb import (
 load_dotenv(override=True)
 
 # ──────────────────────────────────────────────
-#  OpenRouter / OpenAI client
+#  OpenRouter / OpenAI client (pooled, rate-limited; see llm_gateway)
+#  and per-call-type model choice (see model_router)
 # ──────────────────────────────────────────────
-_or_key = os.getenv("OPENROUTER_API_KEY")
-if _or_key:
-    _llm = OpenAI(base_url="https://openrouter.ai/api/v1", api_key=_or_key)
-    _model = "openai/gpt-4o-mini"
-else:
-    _llm = OpenAI()
-    _model = "gpt-4o-mini"
+_llm = llm_gateway.LLMGateway()
+_router = model_router.ModelRouter()
+
+PLAN_TIMEOUT_S = float(os.getenv("LLM_PLAN_TIMEOUT_S", "60"))
+# "single": one completion for the whole plan; "sectioned": one parallel completion per section
+PLAN_MODE = os.getenv("PLAN_MODE", "single")
+REPORT_TIMEOUT_S = float(os.getenv("LLM_REPORT_TIMEOUT_S", "30"))
 
 
 # ──────────────────────────────────────────────
 #  Knowledge Base Seeding
 # ──────────────────────────────────────────────
-def seed_knowledge_base(force: bool = False) -> dict:
+def _register_local_knowledge() -> str:
+    """Index ALL_KNOWLEDGE for local payload hydration (vector_db.KB_HYDRATION); returns its hash."""
+    kb_hash = kb_snapshot.kb_content_hash(ALL_KNOWLEDGE)
+    vector_db.register_local_knowledge(ALL_KNOWLEDGE, kb_hash)
+    return kb_hash
+
+
+_register_local_knowledge()
+
+
+def seed_knowledge_base(force: bool = False, snapshot: str | None = None) -> dict:
+    """
+    Embed and upsert every knowledge collection. When `snapshot` (default:
+    KB_SNAPSHOT_PATH) points at an export built from the same KB content and
+    embedder, its vectors are restored instead and no embedding calls are made.
+    """
     store = AyurvedicStorage()
+    kb_hash = _register_local_knowledge()
+    snapshot = snapshot or os.getenv("KB_SNAPSHOT_PATH")
+    if snapshot and os.path.exists(snapshot):
+        try:
+            manifest = kb_snapshot.read_manifest(snapshot)
+            kb_snapshot.check_snapshot(manifest, data_loader.embedder.model, ALL_KNOWLEDGE)
+            if force or not all(store.is_seeded(name) for name in manifest["collections"]):
+                return kb_snapshot.restore_snapshot(
+                    snapshot, store=store, replace=force, force=True, knowledge=ALL_KNOWLEDGE,
+                )
+        except (kb_snapshot.SnapshotMismatch, KeyError, OSError) as e:
+            print(f"⚠️  Snapshot {snapshot} not used, re-embedding instead: {e}")
+
     collection_map = {
         "conditions": "conditions",
         "herbs": "herbs",
@@ -48,55 +86,237 @@ def seed_knowledge_base(force: bool = False) -> dict:
             stats[coll_name] = f"already seeded ({len(entries)} entries)"
             continue
 
-        texts = [e["text"] for e in entries]
-        vectors = data_loader.embed_texts(texts)
-        if not vectors:
-            continue
-
-        store.upsert_knowledge(coll_name, entries, vectors)
-        stats[coll_name] = f"seeded {len(entries)}"
+        with telemetry.span("seed.collection", collection=coll_name):
+            try:
+                result = store.bulk_upsert(coll_name, entries, embed_fn=data_loader.embed_texts)
+            except RuntimeError as e:
+                print(f"⚠️  Seeding {coll_name} failed: {e}")
+                continue
+        stats[coll_name] = f"seeded {result['points']} ({result['points_per_s']:.0f} points/s)"
 
+    if any(s.startswith("seeded") for s in stats.values()):
+        # The hash vouches for the collections' content only if all of them were written now
+        everything = all(s.startswith("seeded") for s in stats.values()) and len(stats) == len(collection_map)
+        store.bump_kb_version(kb_hash=kb_hash if everything else None)
     return stats
 
 
 # ──────────────────────────────────────────────
 #  Parallel Condition-based retrieval
 # ──────────────────────────────────────────────
+# (collection, top_k, plan section key)
+COLLECTIONS_TO_QUERY = [
+    ("conditions", 1, "overview"),
+    ("herbs", 4, "herbs"),
+    ("diet_guidelines", 1, "diet"),
+    ("yoga_practices", 1, "yoga"),
+    ("precautions", 1, "precautions"),
+    ("lifestyle", 1, "lifestyle"),
+]
+
+
+def _query_text(condition: str) -> str:
+    return f"Ayurvedic treatment for {condition}"
+
+
+def _search_all(store: AyurvedicStorage, queries: list[tuple[str, list[float]]]) -> dict:
+    """Run every (condition, collection) search in one thread pool; returns {condition: {key: payloads}}."""
+    tasks = [(cond, qv, cfg) for cond, qv in queries for cfg in COLLECTIONS_TO_QUERY]
+
+    def _query_task(task):
+        cond, qv, (coll, top_k, key) = task
+        try:
+            return cond, key, store.search_by_condition(coll, qv, cond, top_k=top_k)
+        except Exception:
+            return cond, key, []
+
+    results = {cond: {} for cond, _ in queries}
+    with telemetry.span("retrieve.parallel_search") as sp:
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            for cond, key, data in executor.map(telemetry.propagate(_query_task), tasks):
+                results[cond][key] = data
+        sp.set(results=sum(len(v) for r in results.values() for v in r.values()))
+    return results
+
+
 def retrieve_for_condition(condition: str) -> dict:
     """
     Retrieves knowledge from multiple collections in parallel for speed.
+    Reuses (or waits for) a speculative prefetch of the same condition.
     """
-    store = AyurvedicStorage()
-    query_text = f"Ayurvedic treatment for {condition}"
-    query_vec = data_loader.embed_texts([query_text])
+    with telemetry.span("qdrant.connect"):
+        store = AyurvedicStorage()
+    prefetched = _take_prefetched(condition, store)
+    if prefetched is not None:
+        return prefetched
+    query_vec = data_loader.embed_texts([_query_text(condition)])
     if not query_vec:
         return {}
-    qv = query_vec[0]
-
-    collections_to_query = [
-        ("conditions", 1, "overview"),
-        ("herbs", 4, "herbs"),
-        ("diet_guidelines", 1, "diet"),
-        ("yoga_practices", 1, "yoga"),
-        ("precautions", 1, "precautions"),
-        ("lifestyle", 1, "lifestyle"),
-    ]
-
-    def _query_task(config):
-        coll, top_k, key = config
-        try:
-            res = store.search_by_condition(coll, qv, condition, top_k=top_k)
-            return key, res
-        except Exception:
-            return key, []
 
     # Execute all Qdrant queries in parallel threads
-    results = {}
-    with ThreadPoolExecutor(max_workers=6) as executor:
-        for key, data in executor.map(_query_task, collections_to_query):
-            results[key] = data
-            
-    return results
+    return _search_all(store, [(condition, query_vec[0])])[condition]
+
+
+def retrieve_for_conditions(conditions: list[str]) -> dict:
+    """
+    Bulk variant of retrieve_for_condition: dedupes conditions, embeds all
+    query texts in a single batched call and retrieves each distinct
+    condition once. Returns {condition: retrieved}.
+    If the batched call comes back short, each condition is embedded on its
+    own; raises if a condition still has no query vector, so the step retries
+    instead of generating plans without context.
+    """
+    distinct = list(dict.fromkeys(c for c in conditions if c))
+    if not distinct:
+        return {}
+    with telemetry.span("qdrant.connect"):
+        store = AyurvedicStorage()
+    vectors = data_loader.embed_texts([_query_text(c) for c in distinct])
+    if len(vectors) != len(distinct):
+        print(f"⚠️  Batched embedding returned {len(vectors)}/{len(distinct)} vectors, embedding one by one")
+        telemetry.incr("bulk_embed_fallback")
+        vectors = []
+        for condition in distinct:
+            vector = data_loader.embed_texts([_query_text(condition)])
+            if not vector:
+                raise RuntimeError(f"No query embedding for condition: {condition}")
+            vectors.append(vector[0])
+    return _search_all(store, list(zip(distinct, vectors)))
+
+
+# ──────────────────────────────────────────────
+#  Compact references for Inngest step state
+# ──────────────────────────────────────────────
+def compact_retrieved(retrieved: dict, kb_version: int | None = None) -> dict:
+    """
+    Reduce a retrieval result to {"kb_version", "refs": {section key: [point IDs]}}.
+    Steps return this instead of the payloads, so Inngest stores and replays
+    a few IDs per section rather than every entry's text.
+    """
+    if kb_version is None:
+        kb_version = AyurvedicStorage().kb_version()
+    return {
+        "kb_version": kb_version,
+        "refs": {key: [p["point_id"] for p in payloads if "point_id" in p] for key, payloads in retrieved.items()},
+    }
+
+
+def hydrate_retrieved(compact: dict) -> dict:
+    """Turn compact references back into {section key: payloads}, in their original order."""
+    collection_for = {key: coll for coll, _, key in COLLECTIONS_TO_QUERY}
+    store = AyurvedicStorage()
+    with telemetry.span("retrieve.hydrate") as sp:
+        retrieved = {
+            key: store.get_payloads(collection_for[key], ids, kb_version=compact["kb_version"]) if ids else []
+            for key, ids in compact["refs"].items()
+            if key in collection_for
+        }
+        sp.set(points=sum(len(v) for v in retrieved.values()))
+    return retrieved
+
+
+# ──────────────────────────────────────────────
+#  Speculative prefetch
+# ──────────────────────────────────────────────
+# A condition is usually known (selected, typed, or already in the user's
+# history) well before "generate" is clicked. prefetch_retrieval starts its
+# retrieval in the background; retrieve_for_condition then reuses the result,
+# or waits on it if it is still running. Results are tagged with the KB
+# version they were read at and are dropped when it changes.
+PREFETCH_TTL_S = float(os.getenv("PREFETCH_TTL_S", "300"))
+PREFETCH_MAX_ENTRIES = int(os.getenv("PREFETCH_MAX_ENTRIES", "256"))
+PREFETCH_WAIT_S = float(os.getenv("PREFETCH_WAIT_S", "10"))
+
+_prefetch_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+_prefetch_lock = threading.Lock()
+_prefetched: OrderedDict[str, tuple[float, Future]] = OrderedDict()   # condition key -> (started, (version, retrieved))
+_prefetch_by_user: dict[str, set[str]] = {}                              # user -> condition keys of their latest selection
+_prefetch_wanted: dict[str, set[str | None]] = {}                         # condition key -> users waiting on it (None: history / anonymous)
+
+
+def _prefetch_key(condition: str) -> str:
+    return " ".join(condition.lower().split())
+
+
+def _run_prefetch(pending: dict[str, Future]):
+    # Futures cancelled while queued are skipped
+    live = {c: f for c, f in pending.items() if f.set_running_or_notify_cancel()}
+    if not live:
+        return
+    try:
+        with telemetry.span("retrieve.prefetch") as sp:
+            sp.set(conditions=len(live))
+            version = AyurvedicStorage().kb_version()
+            results = retrieve_for_conditions(list(live))
+        for condition, future in live.items():
+            future.set_result((version, results.get(condition)))
+    except Exception as e:
+        for future in live.values():
+            if not future.done():
+                future.set_exception(e)
+
+
+def prefetch_retrieval(conditions: list[str], user_id: str | None = None) -> list[str]:
+    """
+    Start background retrieval for `conditions` that are not already fresh.
+    A user's newer request cancels their earlier prefetches that have not
+    started yet, unless another user or a history / anonymous request
+    (`user_id` None) still wants them. Returns the conditions that were scheduled.
+    """
+    now = time.monotonic()
+    pending = {}
+    with _prefetch_lock:
+        wanted = {_prefetch_key(c) for c in conditions if c}
+        if user_id is not None:
+            for key in _prefetch_by_user.get(user_id, set()) - wanted:
+                waiting = _prefetch_wanted.get(key, set())
+                waiting.discard(user_id)
+                entry = _prefetched.get(key)
+                if not waiting and entry and entry[1].cancel():
+                    del _prefetched[key]
+                    _prefetch_wanted.pop(key, None)
+                    telemetry.incr("prefetch", result="cancelled")
+            _prefetch_by_user[user_id] = wanted
+
+        for condition in dict.fromkeys(c for c in conditions if c):
+            key = _prefetch_key(condition)
+            entry = _prefetched.get(key)
+            if entry and now - entry[0] < PREFETCH_TTL_S and not (entry[1].done() and entry[1].exception()):
+                _prefetch_wanted.setdefault(key, set()).add(user_id)
+                continue
+            # A fresh run: earlier history requests were for the entry being replaced
+            _prefetch_wanted[key] = {u for u in _prefetch_wanted.get(key, ()) if u is not None} | {user_id}
+            future = Future()
+            _prefetched[key] = (now, future)
+            _prefetched.move_to_end(key)
+            pending[condition] = future
+
+        while len(_prefetched) > PREFETCH_MAX_ENTRIES:
+            key, (_, dropped) = _prefetched.popitem(last=False)
+            _prefetch_wanted.pop(key, None)
+            dropped.cancel()
+
+    if pending:
+        telemetry.incr("prefetch", len(pending), result="scheduled")
+        _prefetch_pool.submit(telemetry.propagate(_run_prefetch), pending)
+    return list(pending)
+
+
+def _take_prefetched(condition: str, store: AyurvedicStorage) -> dict | None:
+    with _prefetch_lock:
+        entry = _prefetched.get(_prefetch_key(condition))
+    if entry is None or time.monotonic() - entry[0] > PREFETCH_TTL_S or entry[1].cancelled():
+        return None
+    try:
+        version, retrieved = entry[1].result(timeout=PREFETCH_WAIT_S)
+    except Exception:
+        telemetry.incr("prefetch", result="failed")
+        return None
+    if not retrieved or version != store.kb_version():
+        telemetry.incr("prefetch", result="stale")
+        return None
+    telemetry.incr("prefetch", result="hit")
+    return {key: [dict(p) for p in payloads] for key, payloads in retrieved.items()}
 
 
 # ──────────────────────────────────────────────
@@ -128,12 +348,55 @@ Generate a treatment plan using these sections:
 8. **When to Consult a Doctor**
 """
 
-def generate_treatment_plan(condition: str, retrieved: dict) -> str:
-    def _join(items: list[dict]) -> str:
-        texts = [item.get("text", "") for item in items if item.get("text")]
-        return "\n".join(texts) if texts else "None"
+# (section key, title, retrieved keys used as context, token cap, instruction), in plan order
+PLAN_SECTIONS = [
+    ("overview", "Overview", ("overview",), 250,
+     "Summarise the condition from an Ayurvedic perspective."),
+    ("dosha", "Dosha Involvement", ("overview",), 200,
+     "Explain which doshas are involved and how they are out of balance."),
+    ("herbs", "Herbal Remedies", ("herbs",), 400,
+     "Recommend herbs with form and dosage. End with a one-line disclaimer to consult a qualified practitioner."),
+    ("diet", "Diet Plan", ("diet",), 300,
+     "List foods to favour and to avoid, and meal timing."),
+    ("yoga", "Yoga & Pranayama", ("yoga",), 250,
+     "Recommend asanas and breathing practices with durations."),
+    ("lifestyle", "Lifestyle Advice", ("lifestyle",), 250,
+     "Give daily routine (dinacharya) and habit recommendations."),
+    ("precautions", "Precautions", ("precautions",), 200,
+     "List contraindications and warnings."),
+    ("consult", "When to Consult a Doctor", ("overview", "precautions"), 150,
+     "List the warning signs that need medical attention."),
+]
+
+SECTION_USER_TEMPLATE = """
+CONDITION: {condition}
+DOSHA: {dosha}
+
+== KNOWLEDGE ==
+{context}
 
-    dosha = SUPPORTED_CONDITIONS.get(condition, ["Unknown"])[0]
+Write only the "{title}" section of a treatment plan. {instruction}
+Use concise markdown bullet points and do not repeat the section title.
+"""
+
+
+def _join(items: list[dict]) -> str:
+    texts = [item.get("text", "") for item in items if item.get("text")]
+    return "\n".join(texts) if texts else "None"
+
+
+def _dosha(condition: str) -> str:
+    return SUPPORTED_CONDITIONS.get(condition, ["Unknown"])[0]
+
+
+def generate_treatment_plan(
+    condition: str,
+    retrieved: dict,
+    max_tokens: int = 2000,
+    priority: str = "interactive",
+) -> str:
+    """The whole plan as markdown from a single completion."""
+    dosha = _dosha(condition)
 
     prompt = PLAN_USER_TEMPLATE.format(
         condition=condition,
@@ -146,37 +409,234 @@ def generate_treatment_plan(condition: str, retrieved: dict) -> str:
         precautions=_join(retrieved.get("precautions", [])),
     )
 
-    response = _llm.chat.completions.create(
-        model=_model,
-        max_tokens=2000,
-        temperature=0.2, # Lower temperature for faster/more consistent results
-        messages=[
-            {"role": "system", "content": PLAN_SYSTEM_PROMPT},
-            {"role": "user", "content": prompt},
-        ],
-    )
+    with telemetry.span("llm.plan") as sp:
+        sp.set(prompt_chars=len(prompt))
+        response, model = _router.complete(
+            _llm, "plan",
+            max_tokens=max_tokens,
+            temperature=0.2, # Lower temperature for faster/more consistent results
+            messages=[
+                {"role": "system", "content": PLAN_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            priority=priority,
+            timeout=PLAN_TIMEOUT_S,
+        )
+        sp.set(model=model)
+    usage.record("llm", _llm.qualified(model), getattr(response, "usage", None), call="plan")
     return response.choices[0].message.content.strip()
 
 
+def _generate_section(condition: str, retrieved: dict, section: tuple, max_tokens: int, priority: str) -> str:
+    key, title, context_keys, _, instruction = section
+    prompt = SECTION_USER_TEMPLATE.format(
+        condition=condition,
+        dosha=_dosha(condition),
+        context="\n".join(f"{k.upper()}: {_join(retrieved.get(k, []))}" for k in context_keys),
+        title=title,
+        instruction=instruction,
+    )
+    with telemetry.span("llm.plan_section", section=key) as sp:
+        sp.set(prompt_chars=len(prompt), max_tokens=max_tokens)
+        response, model = _router.complete(
+            _llm, "section",
+            max_tokens=max_tokens,
+            temperature=0.2,
+            messages=[
+                {"role": "system", "content": PLAN_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            priority=priority,
+            timeout=PLAN_TIMEOUT_S,
+        )
+        sp.set(model=model)
+    usage.record("llm", _llm.qualified(model), getattr(response, "usage", None), call=f"plan.{key}")
+    content = response.choices[0].message.content.strip()
+    # Drop a heading the model added despite the instruction
+    first, _, rest = content.partition("\n")
+    if _heading_label(first) and _heading_label(first).startswith(title.lower()):
+        content = rest.strip()
+    return content
+
+
+def _heading_label(line: str) -> str | None:
+    """`## 3. Herbal Remedies` / `**3. Herbal Remedies**` -> "herbal remedies"; None for body text."""
+    stripped = line.strip()
+    if not stripped or len(stripped) >= 80 or stripped[0] not in "#*0123456789":
+        return None
+    return stripped.lstrip("#").strip().strip("*").strip().lstrip("0123456789.) ").strip("*: ").lower() or None
+
+
+def split_plan_sections(text: str) -> list[dict]:
+    """
+    Split a single-completion plan into PLAN_SECTIONS by their headings
+    (`## 3. Herbal Remedies`, `**3. Herbal Remedies**`, ...). Text before the
+    first heading, or a plan without recognisable headings, goes to Overview.
+    """
+    titles = [title.lower() for _, title, _, _, _ in PLAN_SECTIONS]
+    contents = {key: [] for key, *_ in PLAN_SECTIONS}
+    current = PLAN_SECTIONS[0][0]
+    for line in text.split("\n"):
+        label = _heading_label(line)
+        if label:
+            match = next((i for i, t in enumerate(titles) if label.startswith(t)), None)
+            if match is not None:
+                current = PLAN_SECTIONS[match][0]
+                continue
+        contents[current].append(line)
+    return [
+        {"key": key, "title": title, "content": "\n".join(contents[key]).strip()}
+        for key, title, _, _, _ in PLAN_SECTIONS
+    ]
+
+
+def render_plan(sections: list[dict]) -> str:
+    """Merge sections into one markdown plan in PLAN_SECTIONS order."""
+    return "\n\n".join(f"## {i}. {s['title']}\n{s['content']}" for i, s in enumerate(sections, start=1))
+
+
+def generate_plan_sections(
+    condition: str,
+    retrieved: dict,
+    max_tokens: int = 2000,
+    priority: str = "interactive",
+    mode: str | None = None,
+) -> dict:
+    """
+    Generate a plan as {"mode", "sections": [{key, title, content}], "markdown"}.
+
+    "sectioned" mode runs one completion per PLAN_SECTIONS entry in parallel,
+    each with only its own retrieved context and its token cap (scaled so the
+    caps add up to `max_tokens`); wall-clock time is the slowest section
+    instead of the whole plan. "single" mode splits one completion.
+    """
+    mode = mode or PLAN_MODE
+    if mode == "single":
+        markdown = generate_treatment_plan(condition, retrieved, max_tokens=max_tokens, priority=priority)
+        return {"mode": mode, "sections": split_plan_sections(markdown), "markdown": markdown}
+    if mode != "sectioned":
+        raise ValueError(f"Unknown plan mode: {mode}")
+
+    scale = max_tokens / sum(section[3] for section in PLAN_SECTIONS)
+
+    def _section_task(section: tuple) -> dict:
+        content = _generate_section(condition, retrieved, section, max(64, int(section[3] * scale)), priority)
+        return {"key": section[0], "title": section[1], "content": content}
+
+    with telemetry.span("llm.plan_sectioned"):
+        with ThreadPoolExecutor(max_workers=len(PLAN_SECTIONS)) as executor:
+            sections = list(executor.map(telemetry.propagate(_section_task), PLAN_SECTIONS))
+    return {"mode": mode, "sections": sections, "markdown": render_plan(sections)}
+
+
+# ──────────────────────────────────────────────
+#  Stored plans: provenance and incremental refresh
+# ──────────────────────────────────────────────
+_KEY_COLLECTIONS = {key: collection for collection, _, key in COLLECTIONS_TO_QUERY}
+
+
+def plan_provenance(retrieved: dict) -> dict[str, list[dict]]:
+    """{section key: [{collection, point_id, hash}]} for the entries in each section's context."""
+    return {
+        key: [
+            {"collection": _KEY_COLLECTIONS[k], "point_id": p["point_id"], "hash": plan_store.entry_hash(p)}
+            for k in context_keys
+            for p in retrieved.get(k, [])
+            if "point_id" in p
+        ]
+        for key, _, context_keys, _, _ in PLAN_SECTIONS
+    }
+
+
+def store_plan(user_id: str, condition: str, plan: dict, retrieved: dict) -> str | None:
+    """
+    Persist a generate_plan_sections result with its provenance; returns the plan ID,
+    or None when storage is disabled or fails (the plan itself is never lost to it).
+    """
+    try:
+        return plan_store.save_plan(user_id, condition, plan["mode"], plan["sections"], plan_provenance(retrieved))
+    except Exception as e:
+        print(f"⚠️  Failed to store plan: {e}")
+        telemetry.incr("plan_store_errors")
+        return None
+
+
+def find_stale_sections() -> dict:
+    """
+    Stored plan sections built from knowledge entries that have since changed
+    or been removed: {"tracked_entries", "stale_entries", "plans": {plan_id: [section keys]}}.
+    Current payloads come through get_payloads, i.e. mostly from the local KB index.
+    """
+    store = AyurvedicStorage()
+    tracked = plan_store.tracked_entries()
+    by_collection: dict[str, set[str]] = {}
+    for collection, pid, _ in tracked:
+        by_collection.setdefault(collection, set()).add(pid)
+
+    version = store.kb_version()
+    current = {}
+    with telemetry.span("plans.find_stale") as sp:
+        for collection, ids in by_collection.items():
+            for payload in store.get_payloads(collection, sorted(ids), kb_version=version):
+                current[payload["point_id"]] = plan_store.entry_hash(payload)
+        stale = {(pid, hash_) for _, pid, hash_ in tracked if current.get(pid) != hash_}
+        plans = plan_store.affected_sections(stale)
+        sp.set(entries=len(tracked), stale=len(stale), plans=len(plans))
+    return {"tracked_entries": len(tracked), "stale_entries": len(stale), "plans": plans}
+
+
+def refresh_plan_sections(plan_id: str, section_keys: list[str], priority: str = "background") -> dict:
+    """Regenerate only `section_keys` of a stored plan from fresh retrieval, in parallel."""
+    plan = plan_store.get_plan(plan_id)
+    if plan is None:
+        return {"plan_id": plan_id, "status": "missing"}
+    condition = plan["condition"]
+    retrieved = retrieve_for_condition(condition)
+    sections = [s for s in PLAN_SECTIONS if s[0] in section_keys]
+
+    def _section_task(section: tuple) -> tuple[str, str]:
+        return section[0], _generate_section(condition, retrieved, section, section[3], priority)
+
+    with telemetry.span("plans.refresh") as sp:
+        sp.set(sections=len(sections))
+        with ThreadPoolExecutor(max_workers=max(1, len(sections))) as executor:
+            contents = dict(executor.map(telemetry.propagate(_section_task), sections))
+    provenance = {key: entries for key, entries in plan_provenance(retrieved).items() if key in contents}
+    revision = plan_store.update_sections(plan_id, contents, provenance)
+    return {"plan_id": plan_id, "status": "refreshed", "sections": list(contents), "revision": revision}
+
+
 # ──────────────────────────────────────────────
 #  Progress report generation
 # ──────────────────────────────────────────────
-def generate_progress_report(user_id: str, condition: str, logs: list[dict]) -> str:
+def generate_progress_report(
+    user_id: str,
+    condition: str,
+    logs: list[dict],
+    max_tokens: int = 1000,
+    priority: str = "background",
+) -> str:
     if not logs:
         return "No data."
 
     log_text = ""
     for log in logs:
         week = log.get("week", "?")
-        log_text += f"\nWeek {week}: " + ", ".join([f"{k}: {v}" for k, v in log.items() if k not in ("user_id", "condition", "week", "timestamp")])
-
-    response = _llm.chat.completions.create(
-        model=_model,
-        max_tokens=1000,
-        temperature=0.3,
-        messages=[
-            {"role": "system", "content": "You are an Ayurvedic wellness coach."},
-            {"role": "user", "content": f"Analyze logs for {condition} ({user_id}):\n{log_text}\n\nProvide a brief trend analysis and recommendations."},
-        ],
-    )
+        log_text += f"\nWeek {week}: " + ", ".join([f"{k}: {v}" for k, v in log.items() if k not in ("tenant_id", "user_id", "condition", "week", "timestamp")])
+
+    with telemetry.span("llm.progress_report") as sp:
+        sp.set(logs=len(logs))
+        response, model = _router.complete(
+            _llm, "progress_report",
+            max_tokens=max_tokens,
+            temperature=0.3,
+            messages=[
+                {"role": "system", "content": "You are an Ayurvedic wellness coach."},
+                {"role": "user", "content": f"Analyze logs for {condition} ({user_id}):\n{log_text}\n\nProvide a brief trend analysis and recommendations."},
+            ],
+            priority=priority,
+            timeout=REPORT_TIMEOUT_S,
+        )
+        sp.set(model=model)
+    usage.record("llm", _llm.qualified(model), getattr(response, "usage", None), call="progress_report")
     return response.choices[0].message.content.strip()
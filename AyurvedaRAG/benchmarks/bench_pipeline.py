@@ -0,0 +1,256 @@
+"""
+Offline performance benchmark for the Ayurvedic RAG pipeline.
+
+Runs entirely without network access: embeddings and chat completions are
+served by deterministic stubs and Qdrant runs in local in-memory mode.
+
+Usage (from the AyurvedaRAG directory):
+    python benchmarks/bench_pipeline.py --kb-size 200 --progress-logs 500 --out bench.json
+    python benchmarks/bench_pipeline.py --compare bench.json
+
+Results are written as JSON so runs from different commits can be diffed.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+os.environ.setdefault("USAGE_DB_PATH", ":memory:")
+
+import data_loader  # noqa: E402
+from embedders import LocalEmbedder, OpenAIEmbedder  # noqa: E402
+from llm_gateway import LLMGateway  # noqa: E402
+import retrieval_cache  # noqa: E402
+import vector_db  # noqa: E402
+import ayurvedic_rag  # noqa: E402
+from ayurvedic_kb import ALL_KNOWLEDGE  # noqa: E402
+from stubs import LatencyClient, StubChatClient, StubEmbeddingsClient, make_memory_client  # noqa: E402
+
+BENCH_CONDITIONS = ["Diabetes", "Acidity", "Thyroid", "Anxiety"]
+SCHEMA_VERSION = 1
+
+
+# ──────────────────────────────────────────────
+#  Measurement helpers
+# ──────────────────────────────────────────────
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def measure(fn, iterations: int, warmup: int) -> dict:
+    """Call `fn(i)` repeatedly and summarise wall-clock latency in milliseconds."""
+    for i in range(warmup):
+        fn(i)
+    samples = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    elapsed = time.perf_counter() - started
+    samples.sort()
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(samples, 50), 4),
+        "p95_ms": round(percentile(samples, 95), 4),
+        "p99_ms": round(percentile(samples, 99), 4),
+        "mean_ms": round(sum(samples) / len(samples), 4) if samples else 0.0,
+        "max_ms": round(samples[-1], 4) if samples else 0.0,
+        "throughput_ops_s": round(iterations / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        return out.stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+# ──────────────────────────────────────────────
+#  Offline environment
+# ──────────────────────────────────────────────
+def scaled_knowledge(kb_size: int) -> dict:
+    """Replicate ALL_KNOWLEDGE so each collection holds at least `kb_size` entries."""
+    scaled = {}
+    for key, entries in ALL_KNOWLEDGE.items():
+        out = list(entries)
+        n = 0
+        while len(out) < kb_size:
+            src = entries[n % len(entries)]
+            out.append({**src, "id": f"{src['id']}_syn{n}", "text": f"{src['text']} (variant {n})"})
+            n += 1
+        scaled[key] = out
+    return scaled
+
+
+def install_offline_stack(
+    kb_size: int,
+    embed_latency_s: float = 0.0,
+    llm_latency_s: float = 0.0,
+    qdrant_latency_s: float = 0.0,
+    local_embedder: bool = False,
+) -> tuple:
+    """
+    Point data_loader, vector_db and ayurvedic_rag at the offline stand-ins.
+    `local_embedder` uses the production LocalEmbedder instead of the stub client.
+    """
+    embedder = StubEmbeddingsClient(latency_s=embed_latency_s)
+    llm = StubChatClient(latency_s=llm_latency_s)
+    qdrant = make_memory_client()
+    if qdrant_latency_s:
+        qdrant = LatencyClient(qdrant, qdrant_latency_s)
+
+    data_loader.embedder = LocalEmbedder() if local_embedder else OpenAIEmbedder(client=embedder)
+    ayurvedic_rag._llm = LLMGateway(client=llm, model="gpt-4o-mini")
+    vector_db.reset_client()
+    vector_db._make_client = lambda: qdrant
+    ayurvedic_rag.ALL_KNOWLEDGE = scaled_knowledge(kb_size)
+    return embedder, llm, qdrant
+
+
+def seed_progress_logs(store, n_logs: int, user_id: str = "bench-user", condition: str = "Diabetes", tenants: int = 1):
+    """
+    Fill progress_logs with `n_logs` entries for the benchmark user plus as many
+    for other users, spread over `tenants` clinics (the benchmark user is in the first).
+    """
+    for i in range(n_logs):
+        for uid, tenant in ((user_id, "clinic-0"), (f"other-{i % 50}", f"clinic-{i % tenants}")):
+            store.log_progress(
+                tenant_id=tenant,
+                user_id=uid,
+                condition=condition,
+                week=i + 1,
+                progress_data={"energy_level": "Good", "digestion": "Normal", "notes": f"log {i}"},
+                vector=data_loader.embed_texts([f"Progress week {i + 1}"])[0],
+            )
+
+
+# ──────────────────────────────────────────────
+#  Benchmarks
+# ──────────────────────────────────────────────
+def run(args) -> dict:
+    warnings.filterwarnings("ignore", message="Payload indexes have no effect")
+    install_offline_stack(args.kb_size, local_embedder=args.embedder == "local")
+    # Uncached by default so search timings stay comparable across runs
+    retrieval_cache.CACHE.max_bytes = int(args.retrieval_cache_mb * 1024 * 1024)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        ayurvedic_rag.seed_knowledge_base(force=True)
+        store = vector_db.AyurvedicStorage()
+        seed_progress_logs(store, args.progress_logs, tenants=args.tenants)
+        retrieved = ayurvedic_rag.retrieve_for_condition("Diabetes")
+
+    query_vec = data_loader.embed_texts(["Ayurvedic treatment for Diabetes"])[0]
+    batch = [f"Ayurvedic treatment for condition {i}" for i in range(args.embed_batch)]
+    bulk_entries = ayurvedic_rag.ALL_KNOWLEDGE["herbs"]
+    bulk_vectors = data_loader.embed_texts([e["text"] for e in bulk_entries])
+
+    cases = {
+        "embed_texts": lambda i: data_loader.embed_texts(batch),
+        "search_by_condition": lambda i: store.search_by_condition(
+            "herbs", query_vec, BENCH_CONDITIONS[i % len(BENCH_CONDITIONS)], top_k=4
+        ),
+        "retrieve_for_condition": lambda i: ayurvedic_rag.retrieve_for_condition(
+            BENCH_CONDITIONS[i % len(BENCH_CONDITIONS)]
+        ),
+        "seed_knowledge_base": lambda i: ayurvedic_rag.seed_knowledge_base(force=True),
+        "bulk_upsert": lambda i: store.bulk_upsert(
+            "herbs", iter(bulk_entries), vectors=iter(bulk_vectors), batch_size=args.upsert_batch
+        ),
+        "generate_treatment_plan": lambda i: ayurvedic_rag.generate_treatment_plan("Diabetes", retrieved),
+        "get_user_progress": lambda i: store.get_user_progress("bench-user", "Diabetes", tenant_id="clinic-0"),
+    }
+    selected = args.only or list(cases)
+
+    results = {}
+    for name in selected:
+        iterations = max(1, args.iterations // 10) if name in ("seed_knowledge_base", "bulk_upsert") else args.iterations
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[name] = measure(cases[name], iterations, args.warmup)
+
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "commit": _git_commit(),
+        "timestamp": int(time.time()),
+        "python": platform.python_version(),
+        "params": {
+            "kb_size": args.kb_size,
+            "progress_logs": args.progress_logs,
+            "tenants": args.tenants,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "embed_batch": args.embed_batch,
+            "upsert_batch": args.upsert_batch,
+            "retrieval_cache_mb": args.retrieval_cache_mb,
+            "embedder": args.embedder,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict) -> list[str]:
+    """Render a p50/p95 delta table against a previous result file."""
+    lines = [f"{'benchmark':<26}{'p50 base':>10}{'p50 now':>10}{'Δ%':>8}{'p95 base':>10}{'p95 now':>10}{'Δ%':>8}"]
+    for name, now in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        row = f"{name:<26}"
+        for key in ("p50_ms", "p95_ms"):
+            delta = ((now[key] - base[key]) / base[key] * 100.0) if base[key] else 0.0
+            row += f"{base[key]:>10.3f}{now[key]:>10.3f}{delta:>+8.1f}"
+        lines.append(row)
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline RAG pipeline benchmark")
+    parser.add_argument("--kb-size", type=int, default=50, help="minimum entries per knowledge collection")
+    parser.add_argument("--progress-logs", type=int, default=50, help="progress logs stored for the benchmark user")
+    parser.add_argument("--tenants", type=int, default=1, help="clinics the other users' progress logs are spread over")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--embed-batch", type=int, default=8, help="texts per embed_texts call")
+    parser.add_argument("--upsert-batch", type=int, default=256, help="points per bulk_upsert batch")
+    parser.add_argument("--embedder", choices=("stub", "local"), default="stub",
+                        help="stub OpenAI client or the production LocalEmbedder")
+    parser.add_argument("--retrieval-cache-mb", type=float, default=0.0, help="retrieval cache size (0 = uncached)")
+    parser.add_argument("--only", nargs="*", help="run only these benchmarks")
+    parser.add_argument("--out", help="write JSON results to this path")
+    parser.add_argument("--compare", help="baseline JSON file to diff against")
+    args = parser.parse_args()
+
+    report = run(args)
+    payload = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\n".join(compare(report, baseline)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Single-call vs sectioned plan generation latency.
+
+The stub chat client takes a fixed time to the first token plus a fixed time
+per generated token, so a long single completion and eight shorter parallel
+ones compare the way decoding-bound calls do. The stub reply is `--plan-tokens`
+long, i.e. what a full single-call plan typically is; each section is cut at
+its own token cap. Retrieval runs once up front and is not part of the timing.
+
+Usage (from the AyurvedaRAG directory):
+    python benchmarks/bench_plan_modes.py --ms-per-token 10 --first-token-ms 400 --out plan_modes.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import warnings
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+os.environ.setdefault("USAGE_DB_PATH", ":memory:")
+
+from llm_gateway import LLMGateway  # noqa: E402
+import ayurvedic_rag  # noqa: E402
+import usage  # noqa: E402
+from bench_pipeline import install_offline_stack, measure, _git_commit  # noqa: E402
+from stubs import STUB_PLAN, StubChatClient  # noqa: E402
+
+MODES = ("single", "sectioned")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single-call and sectioned plan generation")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--first-token-ms", type=float, default=300.0)
+    parser.add_argument("--ms-per-token", type=float, default=2.0)
+    parser.add_argument("--plan-tokens", type=int, default=1400, help="length of a full single-call plan")
+    parser.add_argument("--max-tokens", type=int, default=2000, help="plan token budget (as in generate-plan)")
+    parser.add_argument("--out", help="write JSON results to this path")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    install_offline_stack(kb_size=10)
+    reply = (STUB_PLAN + "\n") * (args.plan_tokens * 4 // (len(STUB_PLAN) + 1) + 1)
+    llm = StubChatClient(
+        reply=reply[:args.plan_tokens * 4],
+        latency_s=args.first_token_ms / 1000.0,
+        per_token_s=args.ms_per_token / 1000.0,
+    )
+    ayurvedic_rag._llm = LLMGateway(client=llm, model="gpt-4o-mini")
+    with contextlib.redirect_stdout(io.StringIO()):
+        ayurvedic_rag.seed_knowledge_base(force=True)
+        retrieved = ayurvedic_rag.retrieve_for_condition("Diabetes")
+
+    results = {}
+    for mode in MODES:
+        def _generate(i: int, mode=mode):
+            return ayurvedic_rag.generate_plan_sections("Diabetes", retrieved, max_tokens=args.max_tokens, mode=mode)
+
+        with usage.track(function="bench_plan_modes") as ledger:
+            _generate(0)
+        totals = ledger.summary()
+        results[mode] = {
+            **measure(_generate, args.iterations, args.warmup),
+            "llm_calls": len(totals["calls"]),
+            "prompt_tokens": totals["prompt_tokens"],
+            "completion_tokens": totals["completion_tokens"],
+        }
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": int(time.time()),
+        "params": {k: v for k, v in vars(args).items() if k != "out"},
+        "results": results,
+        "sectioned_speedup_p50": round(results["single"]["p50_ms"] / max(results["sectioned"]["p50_ms"], 1e-9), 2),
+    }
+    payload = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+    lines = [f"{'mode':<12}{'p50 ms':>10}{'p95 ms':>10}{'calls':>7}{'prompt tok':>12}{'output tok':>12}"]
+    for mode, r in results.items():
+        lines.append(
+            f"{mode:<12}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['llm_calls']:>7}"
+            f"{r['prompt_tokens']:>12}{r['completion_tokens']:>12}"
+        )
+    print("\n".join(lines), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
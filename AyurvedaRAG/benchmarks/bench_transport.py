@@ -0,0 +1,126 @@
+"""
+REST vs gRPC transport benchmark against a real Qdrant server.
+
+Embeddings are stubbed (no OpenAI calls); everything else goes over the
+wire to QDRANT_URL, once per transport, using the production client settings
+from vector_db (pool size, timeouts, keep-alive). Benchmark data is written to
+separate `bench_*` collections and dropped afterwards.
+
+Usage (from the AyurvedaRAG directory, with Qdrant listening on 6333/6334):
+    python benchmarks/bench_transport.py --kb-size 500 --iterations 200 --out transport.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import warnings
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+os.environ.setdefault("USAGE_DB_PATH", ":memory:")
+os.environ.setdefault("RETRIEVAL_CACHE_MB", "0")
+
+import data_loader  # noqa: E402
+from embedders import OpenAIEmbedder  # noqa: E402
+import vector_db  # noqa: E402
+import ayurvedic_rag  # noqa: E402
+from bench_pipeline import BENCH_CONDITIONS, measure, scaled_knowledge, _git_commit  # noqa: E402
+from stubs import StubEmbeddingsClient  # noqa: E402
+
+TRANSPORTS = ("rest", "grpc")
+
+
+def _prefixed(prefix: str):
+    """Route the knowledge collections to `<prefix><name>` so production data is untouched."""
+    ayurvedic_rag.COLLECTIONS_TO_QUERY = [(prefix + c, k, key) for c, k, key in ORIGINAL_QUERY]
+    vector_db.AYURVEDIC_COLLECTIONS = [prefix + c for c in ORIGINAL_COLLECTIONS]
+
+
+ORIGINAL_QUERY = list(ayurvedic_rag.COLLECTIONS_TO_QUERY)
+ORIGINAL_COLLECTIONS = list(vector_db.AYURVEDIC_COLLECTIONS)
+
+
+def run_transport(transport: str, args, knowledge: dict) -> dict:
+    vector_db.QDRANT_TRANSPORT = transport
+    vector_db.reset_client()
+    prefix = f"bench_{transport}_"
+    _prefixed(prefix)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        store = vector_db.AyurvedicStorage()
+        herbs = knowledge["herbs"]
+        herb_vectors = data_loader.embed_texts([e["text"] for e in herbs])
+        for kb_key, entries in knowledge.items():
+            if prefix + kb_key in vector_db.AYURVEDIC_COLLECTIONS:
+                store.bulk_upsert(prefix + kb_key, entries, embed_fn=data_loader.embed_texts)
+
+        batches = [herbs[i:i + args.upsert_batch] for i in range(0, len(herbs), args.upsert_batch)]
+        vector_batches = [herb_vectors[i:i + args.upsert_batch] for i in range(0, len(herbs), args.upsert_batch)]
+
+        def _upsert(i: int):
+            for entries, vectors in zip(batches, vector_batches):
+                store.upsert_knowledge(prefix + "herbs", entries, vectors)
+
+        try:
+            results = {
+                "retrieve_for_condition": measure(
+                    lambda i: ayurvedic_rag.retrieve_for_condition(BENCH_CONDITIONS[i % len(BENCH_CONDITIONS)]),
+                    args.iterations, args.warmup,
+                ),
+                "upsert_knowledge": measure(_upsert, max(1, args.iterations // 10), 1),
+            }
+        finally:
+            for name in vector_db.AYURVEDIC_COLLECTIONS:
+                physical = vector_db.resolve_collection(store.client, name)
+                if physical:
+                    store.client.delete_collection(physical)
+    results["upsert_knowledge"]["points_per_iteration"] = len(herbs)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Qdrant REST and gRPC transports")
+    parser.add_argument("--transports", nargs="*", default=list(TRANSPORTS), choices=TRANSPORTS)
+    parser.add_argument("--kb-size", type=int, default=200, help="minimum entries per knowledge collection")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--upsert-batch", type=int, default=64, help="entries per upsert_knowledge call")
+    parser.add_argument("--out", help="write JSON results to this path")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    data_loader.embedder = OpenAIEmbedder(client=StubEmbeddingsClient())
+    knowledge = scaled_knowledge(args.kb_size)
+
+    results = {t: run_transport(t, args, knowledge) for t in args.transports}
+    report = {
+        "commit": _git_commit(),
+        "timestamp": int(time.time()),
+        "qdrant_url": os.getenv("QDRANT_URL", "http://localhost:6333"),
+        "params": {
+            **{k: v for k, v in vars(args).items() if k != "out"},
+            "pool_size": vector_db.QDRANT_POOL_SIZE,
+            "keepalive_s": vector_db.QDRANT_KEEPALIVE_S,
+        },
+        "results": results,
+    }
+    payload = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+    lines = [f"{'benchmark':<24}{'transport':<10}{'p50 ms':>10}{'p95 ms':>10}{'ops/s':>10}"]
+    for transport, cases in results.items():
+        for name, r in cases.items():
+            lines.append(f"{name:<24}{transport:<10}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['throughput_ops_s']:>10.1f}")
+    print("\n".join(lines), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
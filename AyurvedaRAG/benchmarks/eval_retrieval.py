@@ -0,0 +1,451 @@
+"""
+Retrieval quality / latency sweep for the knowledge collections.
+
+Queries come from the labels already on every knowledge point
+(`condition`, `dosha`, `type`), read from the live collections so ingested
+documents are included:
+
+  • condition  — the production query (`Ayurvedic treatment for <condition>`);
+                 relevant = points of that condition whose `type` belongs in the collection
+  • paraphrase — the condition's synonyms from SUPPORTED_CONDITIONS ("high blood sugar, ...")
+  • dosha      — `Ayurvedic <collection> to balance <dosha>`; relevant = points whose dosha includes it
+
+Semantic search is scored against those labels. Filtered search restricts
+results to the same labels, so it is scored against the exact nearest
+neighbours inside the filter instead (brute force on the stored dimension
+without quantization): recall@k is the share of the exact top k returned,
+MRR the reciprocal rank of the true nearest neighbour. Queries whose filter
+admits at most k points cannot miss anything and are left out of the score,
+as is the reference configuration itself.
+
+Every combination of embedding dimension (Matryoshka truncation of the stored
+vectors), scalar quantization on/off, filtered (condition / dosha filter, as
+search_by_condition) vs semantic search, HNSW `ef` (or exact search) and top_k
+is scored with recall@k (semantic: relevant hits / min(k, relevant points), so
+a condition with more entries than top_k can still reach 1.0), MRR and
+per-query latency. The sweep runs on
+`eval_*` copies of the collections, which are dropped afterwards; production
+collections are only read. The report also scores the production settings
+(COLLECTIONS_TO_QUERY top_k, filtered, default ef, stored dimension without
+quantization, whether or not the sweep includes it) per collection and picks,
+for each mode, the fastest configuration reaching --target-recall.
+
+Usage (from the AyurvedaRAG directory):
+    python benchmarks/eval_retrieval.py --out retrieval_eval.json --markdown retrieval_eval.md
+    python benchmarks/eval_retrieval.py --offline --kb-size 200 --dims 1536 512 256
+
+--offline uses the stub embedder and an in-memory Qdrant, which searches
+exhaustively and ignores HNSW and quantization settings; use it to check the
+harness, and a real server (QDRANT_URL) for numbers worth tuning from.
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import sys
+import time
+import warnings
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+os.environ.setdefault("USAGE_DB_PATH", ":memory:")
+os.environ.setdefault("RETRIEVAL_CACHE_MB", "0")
+
+from qdrant_client.models import (  # noqa: E402
+    Distance, FieldCondition, Filter, HnswConfigDiff, MatchAny, MatchValue, OptimizersConfigDiff,
+    PayloadSchemaType, PointStruct, QuantizationSearchParams, ScalarQuantization,
+    ScalarQuantizationConfig, ScalarType, SearchParams, VectorParams,
+)
+
+import data_loader  # noqa: E402
+import vector_db  # noqa: E402
+import ayurvedic_rag  # noqa: E402
+from ayurvedic_kb import SUPPORTED_CONDITIONS  # noqa: E402
+from ingestion import TYPE_TO_COLLECTION  # noqa: E402
+from bench_pipeline import percentile, _git_commit  # noqa: E402
+
+DOSHAS = ("Vata", "Pitta", "Kapha")
+COLLECTION_LABELS = {
+    "conditions": "condition overview", "herbs": "herbs", "diet_guidelines": "diet",
+    "yoga_practices": "yoga practices", "precautions": "precautions", "lifestyle": "lifestyle advice",
+}
+
+
+# ──────────────────────────────────────────────
+#  Ground truth
+# ──────────────────────────────────────────────
+def load_points(client, collection: str) -> list:
+    points, offset = [], None
+    while True:
+        page, offset = client.scroll(collection, limit=256, offset=offset, with_payload=True, with_vectors=True)
+        points.extend(page)
+        if offset is None:
+            return points
+
+
+def build_queries(collection: str, points: list) -> list[dict]:
+    """[{set, text, filter, relevant: {point IDs}}] from the points' labels."""
+    types = {t for t, c in TYPE_TO_COLLECTION.items() if c == collection}
+    labelled = [(str(p.id), p.payload or {}) for p in points]
+    in_place = [(pid, pl) for pid, pl in labelled if not pl.get("type") or pl["type"] in types]
+    queries = []
+    for condition in sorted({pl.get("condition") for _, pl in in_place if pl.get("condition")}):
+        relevant = {pid for pid, pl in in_place if pl.get("condition") == condition}
+        by_condition = Filter(must=[FieldCondition(key="condition", match=MatchValue(value=condition))])
+        queries.append({"set": "condition", "text": ayurvedic_rag._query_text(condition),
+                        "filter": by_condition, "relevant": relevant})
+        if condition in SUPPORTED_CONDITIONS:
+            queries.append({"set": "paraphrase", "text": SUPPORTED_CONDITIONS[condition][1],
+                            "filter": by_condition, "relevant": relevant})
+    for dosha in DOSHAS:
+        values = sorted({pl["dosha"] for _, pl in in_place if dosha in str(pl.get("dosha", ""))})
+        if values:
+            relevant = {pid for pid, pl in in_place if pl.get("dosha") in values}
+            queries.append({
+                "set": "dosha",
+                "text": f"Ayurvedic {COLLECTION_LABELS.get(collection, collection)} to balance {dosha} dosha",
+                "filter": Filter(must=[FieldCondition(key="dosha", match=MatchAny(any=values))]),
+                "relevant": relevant,
+            })
+    return queries
+
+
+def score(ranked: list[str], relevant: set[str], k: int) -> tuple[float, float]:
+    """(recall@k, reciprocal rank of the first relevant hit) for k results."""
+    hits = [i for i, pid in enumerate(ranked) if pid in relevant]
+    recall = len(hits) / min(k, len(relevant)) if relevant else 0.0
+    return recall, (1.0 / (hits[0] + 1) if hits else 0.0)
+
+
+def score_exact(ranked: list[str], exact: list[tuple[str, float]], k: int) -> tuple[float, float] | None:
+    """
+    (recall@k against the exact top k, reciprocal rank of the true nearest
+    neighbour), or None when the filter admits at most k points. Points tied
+    with the k-th (or first) exact score count as either.
+    """
+    if len(exact) <= k:
+        return None
+    top_k = {pid for pid, s in exact if s >= exact[k - 1][1] - 1e-6}
+    nearest = {pid for pid, s in exact if s >= exact[0][1] - 1e-6}
+    recall = len(set(ranked[:k]) & top_k) / k
+    rank = next((i for i, pid in enumerate(ranked) if pid in nearest), None)
+    return recall, (1.0 / (rank + 1) if rank is not None else 0.0)
+
+
+def attach_exact(client, collections, queries, query_vectors, dim: int, limit: int):
+    """
+    Store each query's exact nearest neighbours inside its filter as
+    q["exact"] = [(point ID, score)], from the `dim`-d unquantized copy: the
+    first `limit`, plus every point tied with the last of them.
+    """
+    def exact(name, vector, query_filter, n, threshold=None):
+        return client.query_points(
+            collection_name=name, query=vector, query_filter=query_filter, search_params=SearchParams(exact=True),
+            limit=n, score_threshold=threshold, with_payload=False,
+        ).points
+
+    for collection in collections:
+        name = eval_name(collection, dim, False)
+        for q in queries[collection]:
+            vector = vector_db.fit_vector(query_vectors[q["text"]], dim)
+            points = exact(name, vector, q["filter"], limit)
+            if len(points) == limit:
+                admitted = client.count(name, count_filter=q["filter"], exact=True).count
+                points = exact(name, vector, q["filter"], admitted, threshold=points[-1].score - 1e-6)
+            q["exact"] = [(str(p.id), p.score) for p in points]
+
+
+# ──────────────────────────────────────────────
+#  Evaluation collections
+# ──────────────────────────────────────────────
+def eval_name(collection: str, dim: int, quantized: bool) -> str:
+    return f"eval_{collection}__d{dim}__{'sq8' if quantized else 'f32'}"
+
+
+def build_eval_collection(client, name: str, points: list, dim: int, quantized: bool, indexing_threshold_kb: int):
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(
+        collection_name=name,
+        vectors_config=VectorParams(size=dim, distance=Distance.COSINE),
+        hnsw_config=HnswConfigDiff(m=16, ef_construct=100),
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=indexing_threshold_kb),
+        quantization_config=ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True),
+        ) if quantized else None,
+    )
+    for field in ("condition", "dosha", "type"):
+        client.create_payload_index(name, field_name=field, field_schema=PayloadSchemaType.KEYWORD)
+    for start in range(0, len(points), 256):
+        client.upsert(name, points=[
+            PointStruct(id=p.id, vector=vector_db.fit_vector(p.vector, dim), payload=p.payload)
+            for p in points[start:start + 256]
+        ])
+
+
+def wait_indexed(client, names: list[str], timeout_s: float) -> list[str]:
+    """Wait until HNSW graphs are built; returns the collections that were not ready in time."""
+    deadline = time.monotonic() + timeout_s
+    pending = list(names)
+    while pending and time.monotonic() < deadline:
+        pending = [
+            n for n in pending
+            if (info := client.get_collection(n)).status.value != "green"
+            or (info.indexed_vectors_count or 0) < (info.points_count or 0)
+        ]
+        if pending:
+            time.sleep(0.5)
+    return pending
+
+
+def search(client, name: str, vector: list[float], top_k: int, query_filter, ef, quantized: bool):
+    params = SearchParams(
+        hnsw_ef=ef if isinstance(ef, int) else None,
+        exact=ef == "exact",
+        quantization=QuantizationSearchParams(ignore=False, rescore=True) if quantized else None,
+    )
+    started = time.perf_counter()
+    result = client.query_points(
+        collection_name=name, query=vector, query_filter=query_filter,
+        search_params=params, limit=top_k, with_payload=False,
+    )
+    return [str(p.id) for p in result.points], (time.perf_counter() - started) * 1000.0
+
+
+# ──────────────────────────────────────────────
+#  Sweep
+# ──────────────────────────────────────────────
+def _summary(recalls: list[float], rrs: list[float], latencies: list[float]) -> dict:
+    """`queries` counts the scored queries; recall and MRR are None when none could be scored."""
+    latencies = sorted(latencies)
+    return {
+        "queries": len(recalls),
+        "recall": round(sum(recalls) / len(recalls), 4) if recalls else None,
+        "mrr": round(sum(rrs) / len(rrs), 4) if rrs else None,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+    }
+
+
+def run_config(client, collections, queries, query_vectors, dim, quantized, mode, ef, top_k, repeat) -> dict:
+    per_set: dict[str, tuple[list, list, list]] = {}
+    for collection in collections:
+        name = eval_name(collection, dim, quantized)
+        for q in queries[collection]:
+            vector = vector_db.fit_vector(query_vectors[q["text"]], dim)
+            query_filter = q["filter"] if mode == "filtered" else None
+            recalls, rrs, latencies = per_set.setdefault(q["set"], ([], [], []))
+            for _ in range(repeat):
+                ranked, ms = search(client, name, vector, top_k, query_filter, ef, quantized)
+                latencies.append(ms)
+            scored = score_exact(ranked, q["exact"], top_k) if mode == "filtered" else score(ranked, q["relevant"], top_k)
+            if scored is not None:
+                recalls.append(scored[0])
+                rrs.append(scored[1])
+    return {query_set: _summary(*values) for query_set, values in per_set.items()}
+
+
+def production_scores(client, queries, query_vectors, dim, repeat) -> dict:
+    """The settings retrieve_for_condition uses today, per collection (condition queries, exact ground truth)."""
+    out = {}
+    for collection, top_k, _ in ayurvedic_rag.COLLECTIONS_TO_QUERY:
+        recalls, rrs, latencies = [], [], []
+        for q in queries.get(collection, []):
+            if q["set"] != "condition":
+                continue
+            vector = vector_db.fit_vector(query_vectors[q["text"]], dim)
+            for _ in range(repeat):
+                ranked, ms = search(client, eval_name(collection, dim, False), vector, top_k, q["filter"], None, False)
+                latencies.append(ms)
+            scored = score_exact(ranked, q["exact"], top_k)
+            if scored is not None:
+                recalls.append(scored[0])
+                rrs.append(scored[1])
+        out[collection] = {"top_k": top_k, **_summary(recalls, rrs, latencies)}
+    return out
+
+
+def recommend(results: list[dict], target: float) -> dict:
+    """
+    Per mode: the lowest-latency configuration whose condition-query recall
+    reaches `target`. Reference rows (the exact ground truth itself) are not
+    candidates, since their recall is 1.0 by construction.
+    """
+    picks = {}
+    for mode in sorted({r["mode"] for r in results}):
+        ok = [
+            r for r in results
+            if r["mode"] == mode and r["query_set"] == "condition" and not r["reference"]
+            and r["recall"] is not None and r["recall"] >= target
+        ]
+        if ok:
+            best = min(ok, key=lambda r: (r["p50_ms"], r["top_k"], r["dim"]))
+            picks[mode] = {k: best[k] for k in ("dim", "quantization", "ef", "top_k", "queries", "recall", "mrr", "p50_ms")}
+        else:
+            picks[mode] = None
+    return picks
+
+
+def _parse_ef(value: str):
+    return None if value == "default" else value if value == "exact" else int(value)
+
+
+def _setup(args):
+    if args.offline:
+        from bench_pipeline import install_offline_stack
+
+        install_offline_stack(args.kb_size)
+        with contextlib.redirect_stdout(io.StringIO()):
+            ayurvedic_rag.seed_knowledge_base(force=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        vector_db.AyurvedicStorage()
+    return vector_db.get_client()
+
+
+def run(args) -> dict:
+    warnings.filterwarnings("ignore", message="Payload indexes have no effect")
+    warnings.filterwarnings("ignore", message="Local mode performs exact")
+    client = _setup(args)
+    collections = [c for c, _, _ in ayurvedic_rag.COLLECTIONS_TO_QUERY]
+    sources = {c: load_points(client, c) for c in collections}
+    source_dim = min(len(ps[0].vector) for ps in sources.values() if ps)
+    dims = sorted({d for d in (args.dims or [source_dim]) if d <= source_dim}, reverse=True)
+    quantization = [q == "on" for q in args.quantization]
+    notes = []
+    if args.offline:
+        notes.append("in-memory Qdrant: searches are exhaustive, so ef and quantization do not change results "
+                     "and filtered search at the stored dimension matches the exact ground truth")
+    skipped = sorted(set(args.dims or []) - set(dims))
+    if skipped:
+        notes.append(f"dims {skipped} skipped: stored vectors are {source_dim}-d")
+
+    queries = {c: build_queries(c, points) for c, points in sources.items()}
+    texts = sorted({q["text"] for qs in queries.values() for q in qs})
+    query_vectors = dict(zip(texts, data_loader.embed_texts(texts, dimensions=source_dim)))
+
+    # The production baseline (stored dimension, no quantization) is scored whatever the sweep covers
+    variants = sorted(set(itertools.product(dims, quantization)) | {(source_dim, False)}, reverse=True)
+    names, results = [], []
+    try:
+        for collection, (dim, quantized) in itertools.product(collections, variants):
+            name = eval_name(collection, dim, quantized)
+            names.append(name)
+            build_eval_collection(client, name, sources[collection], dim, quantized, args.indexing_threshold_kb)
+        if not args.offline:
+            not_ready = wait_indexed(client, names, args.index_timeout_s)
+            if not_ready:
+                notes.append(f"HNSW not fully built within {args.index_timeout_s}s for: {', '.join(not_ready)}")
+
+        production_k = [top_k for _, top_k, _ in ayurvedic_rag.COLLECTIONS_TO_QUERY]
+        attach_exact(client, collections, queries, query_vectors, source_dim, max(args.top_k + production_k) + 1)
+
+        grid = itertools.product(dims, quantization, args.modes, [_parse_ef(e) for e in args.ef], args.top_k)
+        for dim, quantized, mode, ef, top_k in grid:
+            by_set = run_config(client, collections, queries, query_vectors, dim, quantized, mode, ef, top_k, args.repeat)
+            # Filtered search on the ground-truth copy: exact search (every search, offline) returns the ground truth
+            reference = mode == "filtered" and dim == source_dim and (args.offline or (not quantized and ef == "exact"))
+            for query_set, summary in by_set.items():
+                results.append({
+                    "dim": dim, "quantization": quantized, "mode": mode, "ef": ef if ef is not None else "default",
+                    "top_k": top_k, "query_set": query_set, "reference": reference, **summary,
+                })
+        production = production_scores(client, queries, query_vectors, source_dim, args.repeat)
+    finally:
+        if not args.keep:
+            for name in names:
+                if client.collection_exists(name):
+                    client.delete_collection(name)
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": int(time.time()),
+        "backend": "memory" if args.offline else os.getenv("QDRANT_URL", "http://localhost:6333"),
+        "embedder": data_loader.embedder.model,
+        "params": {k: v for k, v in vars(args).items() if k not in ("out", "markdown")},
+        "collections": {c: {"points": len(ps), "queries": len(queries[c])} for c, ps in sources.items()},
+        "results": results,
+        "production": production,
+        "recommendations": recommend(results, args.target_recall),
+        "notes": notes,
+    }
+
+
+# ──────────────────────────────────────────────
+#  Report
+# ──────────────────────────────────────────────
+def _metric(value) -> str:
+    return "n/a" if value is None else f"{value:.3f}"
+
+
+def render_markdown(report: dict) -> str:
+    lines = [
+        f"# Retrieval evaluation ({report['commit']})",
+        "",
+        f"Backend `{report['backend']}`, embedder `{report['embedder']}`, "
+        f"target recall {report['params']['target_recall']}.",
+        "",
+    ]
+    lines += [f"> {note}" for note in report["notes"]]
+    lines += ["", "## Production settings (filtered, default ef)", "",
+              "| collection | top_k | queries | recall | MRR | p50 ms | p95 ms |", "|---|---|---|---|---|---|---|"]
+    for collection, r in report["production"].items():
+        lines.append(f"| {collection} | {r['top_k']} | {r['queries']} | {_metric(r['recall'])} | {_metric(r['mrr'])} "
+                     f"| {r['p50_ms']:.2f} | {r['p95_ms']:.2f} |")
+    lines += ["", "## Recommendations", ""]
+    for mode, pick in report["recommendations"].items():
+        lines.append(f"- **{mode}**: " + (", ".join(f"{k}={v}" for k, v in pick.items()) if pick else "target not reached"))
+    lines += ["", "## Sweep", "",
+              "| dim | quant | mode | ef | top_k | queries | recall | MRR | p50 ms | p95 ms |",
+              "|---|---|---|---|---|---|---|---|---|---|"]
+    for r in sorted(report["results"], key=lambda r: (r["query_set"], r["mode"], -r["dim"], r["quantization"], str(r["ef"]), r["top_k"])):
+        ef = f"{r['ef']} (reference)" if r["reference"] else r["ef"]
+        lines.append(f"| {r['dim']} | {'sq8' if r['quantization'] else 'off'} | {r['mode']} | {ef} | {r['top_k']} "
+                     f"| {r['query_set']}:{r['queries']} | {_metric(r['recall'])} | {_metric(r['mrr'])} "
+                     f"| {r['p50_ms']:.2f} | {r['p95_ms']:.2f} |")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall / MRR / latency sweep over retrieval settings")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--ef", nargs="+", default=["default", "16", "64", "128", "exact"],
+                        help="HNSW ef values; 'default' = collection setting, 'exact' = brute force")
+    parser.add_argument("--quantization", nargs="+", choices=("off", "on"), default=["off", "on"])
+    parser.add_argument("--modes", nargs="+", choices=("filtered", "semantic"), default=["filtered", "semantic"])
+    parser.add_argument("--dims", type=int, nargs="+", help="embedding dimensions (default: the stored one)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed searches per query and configuration")
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--indexing-threshold-kb", type=int, default=1,
+                        help="build HNSW on the eval copies even when they are small")
+    parser.add_argument("--index-timeout-s", type=float, default=120.0)
+    parser.add_argument("--offline", action="store_true", help="stub embedder + in-memory Qdrant seeded from the KB")
+    parser.add_argument("--kb-size", type=int, default=50, help="entries per collection with --offline")
+    parser.add_argument("--keep", action="store_true", help="keep the eval_* collections")
+    parser.add_argument("--out", help="write JSON results to this path")
+    parser.add_argument("--markdown", help="write a markdown report to this path")
+    args = parser.parse_args()
+
+    report = run(args)
+    payload = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+    markdown = render_markdown(report)
+    if args.markdown:
+        with open(args.markdown, "w", encoding="utf-8") as f:
+            f.write(markdown)
+
+    lines = [f"{'collection':<18}{'top_k':>6}{'recall':>8}{'MRR':>8}{'p50 ms':>9}"]
+    for collection, r in report["production"].items():
+        lines.append(f"{collection:<18}{r['top_k']:>6}{_metric(r['recall']):>8}{_metric(r['mrr']):>8}{r['p50_ms']:>9.2f}")
+    lines.append(f"recommendations: {json.dumps(report['recommendations'])}")
+    print("\n".join(lines), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Offline load-testing harness for the FastAPI app and its Inngest functions.
+
+Drives `ayurveda_seed_kb`, `ayurveda_generate_plan`, `ayurveda_log_progress`
+(through Inngest's in-process mock executor, so every step and replay runs as
+it would in production) and the HTTP endpoints (through FastAPI's TestClient)
+against local stand-ins with configurable injected latency.
+
+Two load models are swept:
+  • closed loop — N concurrent virtual users, each firing back-to-back
+  • open loop   — Poisson arrivals at a fixed offered rate (latency includes queueing)
+
+Usage (from the AyurvedaRAG directory):
+    python benchmarks/load_test.py --target plan --concurrency 1 2 4 8 16 \\
+        --rates 5 10 20 40 --llm-latency-ms 800 --qdrant-latency-ms 15 --out load.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+os.environ.setdefault("USAGE_DB_PATH", ":memory:")
+os.environ.setdefault("INNGEST_DEV", "true")
+
+import inngest  # noqa: E402
+from inngest.experimental import mocked  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import ayurvedic_rag  # noqa: E402
+from bench_pipeline import install_offline_stack, percentile, _git_commit  # noqa: E402
+
+CONDITIONS = ["Diabetes", "Acidity", "Thyroid", "Anxiety"]
+
+
+# ──────────────────────────────────────────────
+#  Targets
+# ──────────────────────────────────────────────
+class Targets:
+    """Callables returning True on success; each takes a request sequence number."""
+
+    def __init__(self, users: int):
+        import main  # imported after the offline stack is installed
+
+        self.main = main
+        self.users = users
+        self.mock_client = mocked.Inngest(app_id="load-test")
+        self._local = threading.local()
+
+    def _http(self) -> TestClient:
+        client = getattr(self._local, "http", None)
+        if client is None:
+            client = self._local.http = TestClient(self.main.app)
+        return client
+
+    def _trigger(self, fn, name: str, data: dict) -> bool:
+        event = inngest.Event(name=name, data=data, ts=int(time.time() * 1000))
+        res = mocked.trigger(fn, event, self.mock_client)
+        output = res.output if isinstance(res.output, dict) else {}
+        return res.status == mocked.Status.COMPLETED and "error" not in output
+
+    def seed(self, i: int) -> bool:
+        return self._trigger(self.main.ayurveda_seed_kb, "ayurveda/seed-kb", {"force": False})
+
+    def plan(self, i: int) -> bool:
+        return self._trigger(self.main.ayurveda_generate_plan, "ayurveda/generate-plan", {
+            "condition": CONDITIONS[i % len(CONDITIONS)],
+            "user_id": f"load-{i % self.users}",
+        })
+
+    def progress(self, i: int) -> bool:
+        return self._trigger(self.main.ayurveda_log_progress, "ayurveda/log-progress", {
+            "user_id": f"load-{i % self.users}",
+            "condition": CONDITIONS[i % len(CONDITIONS)],
+            "week": i // self.users + 1,
+            "energy_level": "Good",
+            "digestion": "Normal",
+        })
+
+    def http_root(self, i: int) -> bool:
+        return self._http().get("/").status_code == 200
+
+    def http_metrics(self, i: int) -> bool:
+        return self._http().get("/metrics").status_code == 200
+
+    def resolve(self, spec: str):
+        """`plan` or a weighted mix such as `plan=70,progress=20,http_root=10`."""
+        if "=" not in spec:
+            return getattr(self, spec)
+        names, weights = [], []
+        for part in spec.split(","):
+            name, weight = part.split("=")
+            names.append(getattr(self, name.strip()))
+            weights.append(float(weight))
+        rng = random.Random(0)
+        lock = threading.Lock()
+
+        def _mixed(i: int) -> bool:
+            with lock:
+                fn = rng.choices(names, weights)[0]
+            return fn(i)
+
+        return _mixed
+
+
+# ──────────────────────────────────────────────
+#  Load generators
+# ──────────────────────────────────────────────
+def _call(fn, i: int, timeout_s: float, started: float) -> tuple[float, bool]:
+    try:
+        ok = bool(fn(i))
+    except Exception:
+        ok = False
+    latency = time.perf_counter() - started
+    return latency, ok and latency <= timeout_s
+
+
+def _summarise(samples: list[tuple[float, bool]], elapsed: float) -> dict:
+    latencies = sorted(s[0] * 1000.0 for s in samples)
+    errors = sum(1 for s in samples if not s[1])
+    return {
+        "requests": len(samples),
+        "throughput_rps": round((len(samples) - errors) / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+    }
+
+
+def run_closed(fn, concurrency: int, duration_s: float, timeout_s: float) -> dict:
+    samples, lock = [], threading.Lock()
+    counter = iter(range(10**9))
+    deadline = time.perf_counter() + duration_s
+
+    def _worker():
+        while time.perf_counter() < deadline:
+            with lock:
+                i = next(counter)
+            result = _call(fn, i, timeout_s, time.perf_counter())
+            with lock:
+                samples.append(result)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=_worker, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {"concurrency": concurrency, **_summarise(samples, time.perf_counter() - started)}
+
+
+def run_open(fn, rate: float, duration_s: float, timeout_s: float, max_workers: int) -> dict:
+    rng = random.Random(42)
+    futures = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        scheduled, i = started, 0
+        while scheduled < started + duration_s:
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            # Latency is measured from the scheduled arrival to avoid coordinated omission
+            futures.append(pool.submit(_call, fn, i, timeout_s, scheduled))
+            scheduled += rng.expovariate(rate)
+            i += 1
+        samples = [f.result() for f in futures]
+    return {"offered_rps": rate, **_summarise(samples, time.perf_counter() - started)}
+
+
+# ──────────────────────────────────────────────
+#  Reporting
+# ──────────────────────────────────────────────
+def ascii_curve(rows: list[dict], x_key: str, y_key: str, width: int = 40) -> list[str]:
+    peak = max((r[y_key] for r in rows), default=0) or 1
+    lines = [f"{y_key} vs {x_key}"]
+    for r in rows:
+        bar = "█" * max(1, int(r[y_key] / peak * width)) if r[y_key] else ""
+        lines.append(f"  {x_key}={r[x_key]:<8g} {bar} {r[y_key]:g}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for the AyurvedaRAG API")
+    parser.add_argument("--target", default="plan",
+                        help="seed | plan | progress | http_root | http_metrics, or a mix like plan=70,progress=30")
+    parser.add_argument("--concurrency", type=int, nargs="*", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--rates", type=float, nargs="*", default=[], help="offered arrival rates (req/s)")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per load level")
+    parser.add_argument("--timeout-ms", type=float, default=45000, help="requests slower than this count as errors")
+    parser.add_argument("--max-workers", type=int, default=64, help="worker pool size for open-loop runs")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--kb-size", type=int, default=20)
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--qdrant-latency-ms", type=float, default=0.0)
+    parser.add_argument("--out", help="write JSON results to this path")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    _, llm, _ = install_offline_stack(
+        args.kb_size,
+        embed_latency_s=args.embed_latency_ms / 1000.0,
+        llm_latency_s=args.llm_latency_ms / 1000.0,
+        qdrant_latency_s=args.qdrant_latency_ms / 1000.0,
+    )
+    llm.error_rate = args.llm_error_rate
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        ayurvedic_rag.seed_knowledge_base(force=True)
+        targets = Targets(args.users)
+        fn = targets.resolve(args.target)
+        timeout_s = args.timeout_ms / 1000.0
+        closed = [run_closed(fn, c, args.duration, timeout_s) for c in args.concurrency]
+        opened = [run_open(fn, r, args.duration, timeout_s, args.max_workers) for r in args.rates]
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": int(time.time()),
+        "params": {k: v for k, v in vars(args).items() if k != "out"},
+        "closed_loop": closed,
+        "open_loop": opened,
+    }
+    payload = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+    curves = []
+    if closed:
+        curves += ascii_curve(closed, "concurrency", "p95_ms") + ascii_curve(closed, "concurrency", "throughput_rps")
+    if opened:
+        curves += ascii_curve(opened, "offered_rps", "throughput_rps") + ascii_curve(opened, "offered_rps", "error_rate")
+    print("\n".join(curves), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
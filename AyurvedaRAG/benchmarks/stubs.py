@@ -0,0 +1,173 @@
+"""
+Offline stand-ins for the external services used by the RAG pipeline.
+
+Everything here is deterministic and network-free so benchmark runs are
+comparable across commits:
+  • StubEmbeddingsClient — mimics `OpenAI().embeddings` with hashed bag-of-words vectors
+  • StubChatClient       — mimics `OpenAI().chat.completions` with a canned plan,
+                           optionally taking time per generated token
+  • make_memory_client   — a Qdrant client running in local in-memory mode
+  • LatencyClient        — wraps any client and adds a fixed delay to every call
+"""
+
+import hashlib
+import random
+import re
+import time
+from types import SimpleNamespace
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from vector_db import NATIVE_EMBED_DIM
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+# ──────────────────────────────────────────────
+#  Embeddings
+# ──────────────────────────────────────────────
+def stub_vector(text: str, dim: int = NATIVE_EMBED_DIM) -> list[float]:
+    """Hash each word of `text` into a bucket and return the L2-normalised counts."""
+    vec = np.zeros(dim, dtype=np.float32)
+    for token in _TOKEN_RE.findall(text.lower()):
+        digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+        h = int.from_bytes(digest, "little")
+        vec[h % dim] += 1.0 if (h >> 63) == 0 else -1.0
+    norm = float(np.linalg.norm(vec))
+    if norm == 0.0:
+        vec[0] = 1.0
+        norm = 1.0
+    return (vec / norm).tolist()
+
+
+def _shorten(vec: list[float], dim: int | None) -> list[float]:
+    """Mimic the `dimensions` parameter: truncate and re-normalise."""
+    if not dim or dim >= len(vec):
+        return vec
+    head = np.asarray(vec[:dim], dtype=np.float32)
+    norm = float(np.linalg.norm(head)) or 1.0
+    return (head / norm).tolist()
+
+
+class _StubEmbeddings:
+    def __init__(self, owner: "StubEmbeddingsClient"):
+        self._owner = owner
+
+    def create(self, model: str, input: list[str], **kwargs):
+        if self._owner.latency_s:
+            time.sleep(self._owner.latency_s)
+        self._owner.calls += 1
+        dim = kwargs.get("dimensions")
+        data = [SimpleNamespace(index=i, embedding=_shorten(stub_vector(t, self._owner.dim), dim)) for i, t in enumerate(input)]
+        tokens = sum(len(t) // 4 + 1 for t in input)
+        usage = SimpleNamespace(prompt_tokens=tokens, total_tokens=tokens)
+        return SimpleNamespace(data=data, model=model, usage=usage)
+
+
+class StubEmbeddingsClient:
+    """Drop-in replacement for the OpenAI client wrapped by `embedders.OpenAIEmbedder`."""
+
+    def __init__(self, dim: int = NATIVE_EMBED_DIM, latency_s: float = 0.0):
+        self.dim = dim
+        self.latency_s = latency_s
+        self.calls = 0
+        self.embeddings = _StubEmbeddings(self)
+
+
+# ──────────────────────────────────────────────
+#  Chat completions
+# ──────────────────────────────────────────────
+STUB_PLAN = "\n\n".join(
+    f"**{i}. {title}**\n- Offline benchmark content for {title.lower()}."
+    for i, title in enumerate(
+        [
+            "Overview",
+            "Dosha Involvement",
+            "Herbal Remedies",
+            "Diet Plan",
+            "Yoga & Pranayama",
+            "Lifestyle Advice",
+            "Precautions",
+            "When to Consult a Doctor",
+        ],
+        start=1,
+    )
+)
+
+
+class _StubCompletions:
+    def __init__(self, owner: "StubChatClient"):
+        self._owner = owner
+
+    def create(self, model: str, messages: list[dict], max_tokens: int = 1000, **kwargs):
+        if self._owner.latency_s:
+            time.sleep(self._owner.latency_s)
+        self._owner.calls += 1
+        if self._owner.error_rate and self._owner.rng.random() < self._owner.error_rate:
+            raise RuntimeError("Error code: 429 - stub rate limit")
+        prompt_chars = sum(len(m.get("content", "")) for m in messages)
+        self._owner.last_prompt_chars = prompt_chars
+        # ~4 characters per token; the reply is cut at max_tokens like a real completion
+        content = self._owner.reply[:max_tokens * 4]
+        usage = SimpleNamespace(
+            prompt_tokens=prompt_chars // 4 + 1,
+            completion_tokens=min(max_tokens, len(content) // 4 + 1),
+        )
+        if self._owner.per_token_s:
+            time.sleep(usage.completion_tokens * self._owner.per_token_s)
+        usage.total_tokens = usage.prompt_tokens + usage.completion_tokens
+        message = SimpleNamespace(role="assistant", content=content)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")],
+            model=model,
+            usage=usage,
+        )
+
+
+class StubChatClient:
+    """Drop-in replacement for the OpenAI client wrapped by `llm_gateway.LLMGateway`."""
+
+    def __init__(
+        self,
+        reply: str = STUB_PLAN,
+        latency_s: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        per_token_s: float = 0.0,
+    ):
+        self.reply = reply
+        self.latency_s = latency_s
+        self.per_token_s = per_token_s
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.last_prompt_chars = 0
+        self.chat = SimpleNamespace(completions=_StubCompletions(self))
+
+
+# ──────────────────────────────────────────────
+#  Vector store
+# ──────────────────────────────────────────────
+def make_memory_client() -> QdrantClient:
+    """A Qdrant client backed by the in-process local mode (no server needed)."""
+    return QdrantClient(location=":memory:")
+
+
+class LatencyClient:
+    """Proxy that sleeps `latency_s` before every method call, simulating a network hop."""
+
+    def __init__(self, inner, latency_s: float):
+        self._inner = inner
+        self._latency_s = latency_s
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if not callable(attr) or not self._latency_s:
+            return attr
+
+        def _delayed(*args, **kwargs):
+            time.sleep(self._latency_s)
+            return attr(*args, **kwargs)
+
+        return _delayed
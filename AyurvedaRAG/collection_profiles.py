@@ -0,0 +1,145 @@
+"""
+Per-collection Qdrant configuration profiles.
+
+The static knowledge collections are small and read-heavy, so they stay in
+RAM with default HNSW settings. `progress_logs` and `progress_trajectories`
+grow with the user base, so their vectors, graphs and payloads live on disk in
+memmapped segments and they are sharded. Profiles can be tuned without code changes:
+
+    QDRANT_COLLECTION_PROFILES="progress_logs=logs,herbs=static_kb"
+    QDRANT_PROFILES_JSON='{"logs": {"shard_number": 4, "hnsw_m": 32}}'
+"""
+
+import json
+import os
+
+from qdrant_client.models import (
+    CollectionParamsDiff, Distance, HnswConfigDiff,
+    OptimizersConfigDiff, VectorParams, VectorParamsDiff,
+)
+
+PROFILES = {
+    # Small, static, read-heavy: keep everything in RAM
+    "static_kb": {
+        "hnsw_m": 16,
+        "hnsw_ef_construct": 100,
+        "hnsw_on_disk": False,
+        "on_disk_vectors": False,
+        "on_disk_payload": False,
+        "memmap_threshold_kb": None,
+        "indexing_threshold_kb": 20000,
+        "bulk_indexing_threshold_kb": 0,   # 0 disables indexing while bulk loading
+        "shard_number": 1,
+        "replication_factor": 1,
+    },
+    # Append-only, unbounded: vectors, graph and payload on disk
+    "logs": {
+        "hnsw_m": 16,
+        "hnsw_ef_construct": 100,
+        "hnsw_on_disk": True,
+        "on_disk_vectors": True,
+        "on_disk_payload": True,
+        "memmap_threshold_kb": 20000,
+        "indexing_threshold_kb": 20000,
+        "bulk_indexing_threshold_kb": 0,
+        "shard_number": 2,
+        "replication_factor": 1,
+    },
+}
+
+DEFAULT_COLLECTION_PROFILES = {"progress_logs": "logs", "progress_trajectories": "logs"}
+DEFAULT_PROFILE = "static_kb"
+
+
+def _load_overrides():
+    raw = os.getenv("QDRANT_PROFILES_JSON")
+    if raw:
+        for name, overrides in json.loads(raw).items():
+            PROFILES[name] = {**PROFILES.get(name, PROFILES[DEFAULT_PROFILE]), **overrides}
+
+    mapping = dict(DEFAULT_COLLECTION_PROFILES)
+    for pair in filter(None, os.getenv("QDRANT_COLLECTION_PROFILES", "").split(",")):
+        collection, profile = (p.strip() for p in pair.split("="))
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown collection profile: {profile}")
+        mapping[collection] = profile
+    return mapping
+
+
+COLLECTION_PROFILES = _load_overrides()
+
+
+def profile_name(collection: str) -> str:
+    return COLLECTION_PROFILES.get(collection, DEFAULT_PROFILE)
+
+
+def profile_for(collection: str) -> dict:
+    return PROFILES[profile_name(collection)]
+
+
+# ──────────────────────────────────────────────
+#  Qdrant arguments
+# ──────────────────────────────────────────────
+def create_kwargs(collection: str, dim: int) -> dict:
+    """Keyword arguments for `client.create_collection`."""
+    p = profile_for(collection)
+    return {
+        "vectors_config": VectorParams(size=dim, distance=Distance.COSINE, on_disk=p["on_disk_vectors"]),
+        "hnsw_config": HnswConfigDiff(m=p["hnsw_m"], ef_construct=p["hnsw_ef_construct"], on_disk=p["hnsw_on_disk"]),
+        "optimizers_config": OptimizersConfigDiff(
+            memmap_threshold=p["memmap_threshold_kb"],
+            indexing_threshold=p["indexing_threshold_kb"],
+        ),
+        "on_disk_payload": p["on_disk_payload"],
+        "shard_number": p["shard_number"],
+        "replication_factor": p["replication_factor"],
+    }
+
+
+def diff(collection: str, config) -> tuple[dict, list[str], list[str]]:
+    """
+    Compare a live collection config with its profile.
+    Returns (update_collection kwargs, applied change descriptions, drift that needs a re-create).
+    """
+    p = profile_for(collection)
+    hnsw, opt, params = config.hnsw_config, config.optimizer_config, config.params
+    vectors = params.vectors
+    changes, recreate, kwargs = [], [], {}
+
+    def _differs(current, wanted, label) -> bool:
+        if wanted is not None and (current or None) != (wanted or None):
+            changes.append(f"{label}: {current} -> {wanted}")
+            return True
+        return False
+
+    hnsw_diff = {}
+    for field, key in (("m", "hnsw_m"), ("ef_construct", "hnsw_ef_construct"), ("on_disk", "hnsw_on_disk")):
+        if _differs(getattr(hnsw, field, None), p[key], f"hnsw.{field}"):
+            hnsw_diff[field] = p[key]
+    if hnsw_diff:
+        kwargs["hnsw_config"] = HnswConfigDiff(**hnsw_diff)
+
+    opt_diff = {}
+    for field, key in (("memmap_threshold", "memmap_threshold_kb"), ("indexing_threshold", "indexing_threshold_kb")):
+        if _differs(getattr(opt, field, None), p[key], f"optimizer.{field}"):
+            opt_diff[field] = p[key]
+    if opt_diff:
+        kwargs["optimizers_config"] = OptimizersConfigDiff(**opt_diff)
+
+    current_on_disk = getattr(vectors, "on_disk", None) if not isinstance(vectors, dict) else None
+    if _differs(current_on_disk, p["on_disk_vectors"], "vectors.on_disk"):
+        kwargs["vectors_config"] = {"": VectorParamsDiff(on_disk=p["on_disk_vectors"])}
+
+    params_diff = {}
+    if _differs(params.on_disk_payload, p["on_disk_payload"], "on_disk_payload"):
+        params_diff["on_disk_payload"] = p["on_disk_payload"]
+    if _differs(params.replication_factor, p["replication_factor"], "replication_factor"):
+        params_diff["replication_factor"] = p["replication_factor"]
+    if params_diff:
+        kwargs["collection_params"] = CollectionParamsDiff(**params_diff)
+
+    # Shard count is fixed at creation time
+    if (params.shard_number or 1) != p["shard_number"]:
+        recreate.append(f"shard_number: {params.shard_number or 1} -> {p['shard_number']}")
+
+    return kwargs, changes, recreate
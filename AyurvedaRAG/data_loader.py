@@ -1,31 +1,28 @@
-from openai import OpenAI
 from dotenv import load_dotenv
-import os
+
+import telemetry
+import usage
+from embedders import make_embedder
+from vector_db import EMBED_DIM, NATIVE_EMBED_DIM
 
 load_dotenv()
 
-# Use OpenRouter if key is available, otherwise fall back to OpenAI directly
-openrouter_key = os.getenv("OPENROUTER_API_KEY")
-if openrouter_key:
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=openrouter_key
-    )
-    EMBED_MODEL = "openai/text-embedding-3-small"
-    EMBED_DIM = 1536
-else:
-    client = OpenAI()
-    EMBED_MODEL = "text-embedding-3-small"
-    EMBED_DIM = 1536
+# Selected by EMBEDDER=openai|local (see embedders.py)
+embedder = make_embedder()
 
 
-def embed_texts(texts: list[str]) -> list[list[float]]:
-    try:
-        response = client.embeddings.create(
-            model=EMBED_MODEL,
-            input=texts,
-        )
-        return [item.embedding for item in response.data]
-    except Exception as e:
-        print(f"Error embedding texts: {e}")
-        return []
+def embed_texts(texts: list[str], dimensions: int | None = None) -> list[list[float]]:
+    """Embed `texts` at `dimensions` (default EMBED_DIM; shortened server-side below the native size)."""
+    dimensions = dimensions or EMBED_DIM
+    with telemetry.span("embed") as sp:
+        sp.set(texts=len(texts))
+        try:
+            vectors, response_usage = embedder.embed(texts, dimensions, NATIVE_EMBED_DIM)
+            if embedder.remote:
+                usage.record("embedding", embedder.model, response_usage)
+            return vectors
+        except Exception as e:
+            print(f"Error embedding texts: {e}")
+            sp.set(error=True)
+            telemetry.incr("errors", stage="embed")
+            return []
@@ -0,0 +1,105 @@
+"""
+Embedding backends behind `data_loader.embed_texts`.
+
+  • OpenAIEmbedder — text-embedding-3-small via OpenAI or OpenRouter
+  • LocalEmbedder  — hashed character n-grams, deterministic, no network or
+                     downloads; for air-gapped staging, seeding and benchmarks
+
+Select one per environment with EMBEDDER=openai|local. Vectors from different
+embedders are not comparable, so a Qdrant instance must be seeded and queried
+with the same one.
+"""
+
+import os
+import re
+
+import numpy as np
+
+
+class OpenAIEmbedder:
+    """Remote embeddings; `client` defaults to an OpenAI client configured from the environment."""
+
+    remote = True
+
+    def __init__(self, client=None, model: str | None = None):
+        if client is None:
+            from openai import OpenAI
+
+            # Use OpenRouter if key is available, otherwise fall back to OpenAI directly
+            openrouter_key = os.getenv("OPENROUTER_API_KEY")
+            if openrouter_key:
+                client = OpenAI(base_url="https://openrouter.ai/api/v1", api_key=openrouter_key)
+                model = model or "openai/text-embedding-3-small"
+            else:
+                client = OpenAI()
+        self.client = client
+        self.model = model or "text-embedding-3-small"
+
+    def embed(self, texts: list[str], dimensions: int, native_dim: int):
+        """Returns (vectors, usage)."""
+        extra = {"dimensions": dimensions} if dimensions != native_dim else {}
+        response = self.client.embeddings.create(model=self.model, input=texts, **extra)
+        return [item.embedding for item in response.data], getattr(response, "usage", None)
+
+
+class LocalEmbedder:
+    """
+    Feature-hashed character n-grams (a sparse random projection onto
+    `dimensions`), L2-normalised. A whole batch is hashed and accumulated
+    with numpy in one pass; identical text always yields the same vector.
+    """
+
+    remote = False
+    model = "local-char-ngram"
+
+    _PRIME = np.uint64(1099511628211)           # FNV-1a 64-bit prime
+    _MIX = np.uint64(0x9E3779B97F4A7C15)
+    _WS_RE = re.compile(r"\s+")
+
+    def __init__(self, ngram_range: tuple[int, int] = (3, 5)):
+        self.ngram_range = ngram_range
+
+    def embed(self, texts: list[str], dimensions: int, native_dim: int):
+        if not texts:
+            return [], None
+        # One byte buffer for the batch; `doc` maps each byte to its text
+        encoded = [f" {self._WS_RE.sub(' ', t.lower()).strip()} ".encode("utf-8") for t in texts]
+        buf = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+        doc = np.repeat(np.arange(len(texts)), [len(e) for e in encoded])
+
+        rows, hashes = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.uint64)]
+        with np.errstate(over="ignore"):
+            for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+                count = len(buf) - n + 1
+                if count <= 0:
+                    continue
+                h = np.full(count, n, dtype=np.uint64)
+                for j in range(n):
+                    h = (h ^ buf[j:j + count]) * self._PRIME
+                inside = doc[:count] == doc[n - 1:n - 1 + count]   # drop n-grams spanning two texts
+                rows.append(doc[:count][inside])
+                hashes.append(h[inside])
+            h = np.concatenate(hashes)
+            h = (h ^ (h >> np.uint64(29))) * self._MIX
+            h ^= h >> np.uint64(32)
+
+        row = np.concatenate(rows)
+        bucket = (h % np.uint64(dimensions)).astype(np.int64)
+        sign = np.where((h >> np.uint64(63)) & np.uint64(1), -1.0, 1.0)
+        mat = np.bincount(row * dimensions + bucket, weights=sign, minlength=len(texts) * dimensions)
+        mat = mat.reshape(len(texts), dimensions).astype(np.float32)
+
+        norms = np.linalg.norm(mat, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        mat[empty, 0], norms[empty] = 1.0, 1.0
+        return (mat / norms).tolist(), None
+
+
+def make_embedder(name: str | None = None):
+    """Embedder named by `name`, or by the EMBEDDER environment variable (default "openai")."""
+    name = (name or os.getenv("EMBEDDER", "openai")).lower()
+    if name == "openai":
+        return OpenAIEmbedder()
+    if name == "local":
+        return LocalEmbedder()
+    raise ValueError(f"Unknown embedder: {name}")
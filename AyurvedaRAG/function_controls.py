@@ -0,0 +1,130 @@
+"""
+Flow control for the Inngest functions, in one place.
+
+Every function gets its concurrency, throttle, debounce, singleton and
+priority settings from CONTROLS, applied with:
+
+    @inngest_client.create_function(fn_id=..., trigger=..., **function_controls.create_kwargs("ayurveda_generate_plan"))
+
+  • concurrency — per-user limits (keyed on `event.data.user_id`) plus one
+    environment-wide "llm" pool shared by every function that calls the LLM,
+    so a burst of bulk or background runs cannot take all the slots
+  • throttle    — repeated identical events (same user and condition) are
+    queued and released at `limit` per `period_s` instead of all at once
+  • debounce    — rapid re-submissions of the same progress log collapse into
+    one run with the latest event
+  • singleton   — at most one knowledge base seed at a time; extras are skipped
+  • plan refreshes after KB updates run one at a time, and a burst of updates
+    (e.g. a seed followed by a snapshot restore) is debounced into one run
+  • prefetches are debounced per user, so only the condition a user settles
+    on is retrieved speculatively
+  • priority    — the function's `lane` (llm_gateway.PRIORITIES) maps to an
+    Inngest priority, so interactive plans are started ahead of queued bulk
+    and background runs in the shared pool
+
+Tune without code changes (changing a key or limit takes effect on the next sync):
+
+    INNGEST_CONTROLS_JSON='{"ayurveda_generate_plan": {"throttle": {"limit": 5, "period_s": 60}}}'
+    INNGEST_LLM_CONCURRENCY=40
+
+Setting a control to null disables it.
+"""
+
+import datetime
+import json
+import os
+
+import inngest
+
+INNGEST_LLM_CONCURRENCY = int(os.getenv("INNGEST_LLM_CONCURRENCY", "20"))
+
+# Seconds a run is moved ahead in the queue (Inngest accepts -600..600)
+LANE_PRIORITY_S = {"interactive": 120, "batch": 0, "background": -60}
+
+_USER = "event.data.user_id"
+_USER_CONDITION = "event.data.user_id + '-' + event.data.condition"
+_LLM_POOL = {"key": '"llm"', "limit": INNGEST_LLM_CONCURRENCY, "scope": "env"}
+
+CONTROLS = {
+    "ayurveda_seed_kb": {
+        "lane": "background",
+        "singleton": {"mode": "skip"},
+        "concurrency": [{"limit": 1}],
+    },
+    "ayurveda_generate_plan": {
+        "lane": "interactive",
+        "concurrency": [{"key": _USER, "limit": 2}, _LLM_POOL],
+        "throttle": {"key": _USER_CONDITION, "limit": 1, "period_s": 10, "burst": 1},
+    },
+    "ayurveda_prefetch_retrieval": {
+        "lane": "batch",
+        "concurrency": [{"key": _USER, "limit": 1}],
+        "debounce": {"key": _USER + " + '-' + event.data.reason", "period_s": 1, "timeout_s": 5},
+    },
+    "ayurveda_generate_plans_bulk": {
+        "lane": "batch",
+        "concurrency": [{"limit": 2}, _LLM_POOL],
+    },
+    "ayurveda_ingest_document": {
+        "lane": "background",
+        "concurrency": [{"limit": 2}],
+    },
+    "ayurveda_refresh_plans": {
+        "lane": "background",
+        "concurrency": [{"limit": 1}, _LLM_POOL],
+        "debounce": {"period_s": 30, "timeout_s": 300},
+    },
+    "ayurveda_log_progress": {
+        "lane": "background",
+        "concurrency": [{"key": _USER, "limit": 1}, _LLM_POOL],
+        "debounce": {"key": _USER_CONDITION + " + '-' + string(event.data.week)", "period_s": 5, "timeout_s": 30},
+    },
+}
+
+
+def _load_overrides():
+    raw = os.getenv("INNGEST_CONTROLS_JSON")
+    if not raw:
+        return
+    for fn_name, overrides in json.loads(raw).items():
+        if fn_name not in CONTROLS:
+            raise ValueError(f"Unknown Inngest function in INNGEST_CONTROLS_JSON: {fn_name}")
+        CONTROLS[fn_name] = {**CONTROLS[fn_name], **overrides}
+
+
+_load_overrides()
+
+
+def _seconds(value) -> datetime.timedelta | None:
+    return None if value is None else datetime.timedelta(seconds=value)
+
+
+# ──────────────────────────────────────────────
+#  Inngest arguments
+# ──────────────────────────────────────────────
+def create_kwargs(fn_name: str) -> dict:
+    """Keyword arguments for `inngest_client.create_function`."""
+    c = CONTROLS[fn_name]
+    kwargs = {}
+    if c.get("concurrency"):
+        kwargs["concurrency"] = [inngest.Concurrency(**limit) for limit in c["concurrency"]]
+    if c.get("throttle"):
+        t = c["throttle"]
+        kwargs["throttle"] = inngest.Throttle(
+            key=t.get("key"), limit=t["limit"], period=_seconds(t["period_s"]), burst=t.get("burst", 1),
+        )
+    if c.get("debounce"):
+        d = c["debounce"]
+        kwargs["debounce"] = inngest.Debounce(
+            key=d.get("key"), period=_seconds(d["period_s"]), timeout=_seconds(d.get("timeout_s")),
+        )
+    if c.get("singleton"):
+        kwargs["singleton"] = inngest.Singleton(key=c["singleton"].get("key"), mode=c["singleton"]["mode"])
+    if c.get("lane"):
+        kwargs["priority"] = inngest.Priority(run=str(LANE_PRIORITY_S[c["lane"]]))
+    return kwargs
+
+
+def describe() -> dict:
+    """Effective controls per function, for the /controls endpoint."""
+    return {fn_name: {k: v for k, v in c.items() if v is not None} for fn_name, c in CONTROLS.items()}
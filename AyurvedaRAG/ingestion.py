@@ -0,0 +1,262 @@
+"""
+Streaming document ingestion for classical texts and PDFs.
+
+Documents are read page by page, chunked with overlap, tagged with the
+condition / dosha / type metadata used by the knowledge collections, then
+embedded and upserted in bounded batches. Only one page, the chunk buffer
+and one batch per collection are held in memory at a time, regardless of
+document size.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Callable, Iterator
+
+import data_loader
+import telemetry
+from ayurvedic_kb import SUPPORTED_CONDITIONS
+from vector_db import AyurvedicStorage
+
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", str(Path(__file__).parent / "uploads")))
+CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "1200"))         # characters
+CHUNK_OVERLAP = int(os.getenv("INGEST_CHUNK_OVERLAP", "200"))     # characters
+EMBED_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))      # chunks per embed/upsert call
+TEXT_PAGE_BYTES = 4096                                            # "page" size for plain-text files
+_WS_BYTES = re.compile(rb"\s")
+
+# Chunk type -> knowledge collection
+TYPE_TO_COLLECTION = {
+    "condition_overview": "conditions",
+    "herb": "herbs",
+    "diet": "diet_guidelines",
+    "yoga": "yoga_practices",
+    "precautions": "precautions",
+    "lifestyle": "lifestyle",
+}
+
+_TYPE_KEYWORDS = {
+    "herb": ("herb", "dosage", "churna", "guggulu", "extract", "capsule", "decoction", "kashaya", "root", "leaf"),
+    "diet": ("diet", "food", "eat", "meal", "avoid foods", "favor", "grain", "vegetable", "fruit", "spice"),
+    "yoga": ("yoga", "asana", "pranayama", "pose", "breath", "meditation", "surya namaskar", "mudra"),
+    "precautions": ("precaution", "contraindicat", "warning", "side effect", "consult", "do not", "pregnan"),
+    "lifestyle": ("routine", "dinacharya", "sleep", "wake", "exercise", "massage", "abhyanga", "daily"),
+    "condition_overview": ("caused by", "symptom", "classified", "nidana", "samprapti", "disorder", "disease"),
+}
+
+_CONDITION_TERMS = {
+    cond: [cond.lower()] + [t.strip().lower() for t in info[1].split(",") if t.strip()]
+    for cond, info in SUPPORTED_CONDITIONS.items()
+}
+
+
+def _prefix_pattern(terms) -> re.Pattern:
+    # Match terms at the start of a word so "eat" does not count inside "heat"
+    return re.compile(r"\b(?:" + "|".join(re.escape(t) for t in terms) + ")")
+
+
+_TYPE_PATTERNS = {t: _prefix_pattern(kws) for t, kws in _TYPE_KEYWORDS.items()}
+_CONDITION_PATTERNS = {c: _prefix_pattern(terms) for c, terms in _CONDITION_TERMS.items()}
+
+_DOSHAS = ("Vata", "Pitta", "Kapha")
+_WS_RE = re.compile(r"\s+")
+
+
+# ──────────────────────────────────────────────
+#  Reading
+# ──────────────────────────────────────────────
+def resolve_upload_path(path: str) -> Path:
+    """Resolve `path` inside UPLOAD_DIR, refusing anything that escapes it."""
+    resolved = (UPLOAD_DIR / path).resolve()
+    if UPLOAD_DIR.resolve() not in resolved.parents:
+        raise ValueError(f"Document must live under {UPLOAD_DIR}: {path}")
+    if not resolved.is_file():
+        raise FileNotFoundError(f"Document not found: {path}")
+    return resolved
+
+
+def count_pages(path: Path) -> int:
+    if path.suffix.lower() == ".pdf":
+        from pypdf import PdfReader
+        return len(PdfReader(str(path)).pages)
+    return max(1, -(-path.stat().st_size // TEXT_PAGE_BYTES))
+
+
+def iter_pages(path: Path, start_page: int = 0, end_page: int | None = None) -> Iterator[tuple[int, str]]:
+    """Yield (page_number, text) one page at a time."""
+    if path.suffix.lower() == ".pdf":
+        from pypdf import PdfReader
+        reader = PdfReader(str(path))
+        end = len(reader.pages) if end_page is None else min(end_page, len(reader.pages))
+        for page_no in range(start_page, end):
+            yield page_no, reader.pages[page_no].extract_text() or ""
+        return
+
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        start = _text_page_offset(f, start_page)
+        page_no = start_page
+        while start < size and (end_page is None or page_no < end_page):
+            end = _text_page_offset(f, page_no + 1)
+            f.seek(start)
+            yield page_no, f.read(end - start).decode("utf-8", errors="replace")
+            start, page_no = end, page_no + 1
+
+
+def _text_page_offset(f, page_no: int) -> int:
+    """
+    Byte offset where plain-text page `page_no` starts: the first whitespace
+    byte at or after page_no * TEXT_PAGE_BYTES. Pages therefore never split a
+    word or a UTF-8 sequence (ASCII whitespace never occurs inside one), and
+    a page range still starts with a seek instead of a scan from the top.
+    """
+    if page_no == 0:
+        return 0
+    offset = page_no * TEXT_PAGE_BYTES
+    f.seek(offset)
+    while block := f.read(TEXT_PAGE_BYTES):
+        match = _WS_BYTES.search(block)
+        if match:
+            return offset + match.start()
+        offset += len(block)
+    return offset
+
+
+def iter_chunks(
+    pages: Iterator[tuple[int, str]],
+    chunk_size: int = CHUNK_SIZE,
+    overlap: int = CHUNK_OVERLAP,
+) -> Iterator[tuple[int, str]]:
+    """Sliding-window chunker over a page stream. Yields (page_number, chunk_text)."""
+    if overlap >= chunk_size:
+        raise ValueError("overlap must be smaller than chunk_size")
+    buf, page_no = "", 0
+    for page_no, text in pages:
+        text = _WS_RE.sub(" ", text).strip()
+        if not text:
+            continue
+        buf = f"{buf} {text}" if buf else text
+        while len(buf) >= chunk_size:
+            cut = buf.rfind(" ", overlap + 1, chunk_size)
+            if cut == -1:
+                cut = chunk_size
+            yield page_no, buf[:cut].strip()
+            start = buf.find(" ", cut - overlap, cut)
+            buf = buf[(start if start != -1 else cut - overlap):].lstrip()
+    if buf.strip():
+        yield page_no, buf.strip()
+
+
+# ──────────────────────────────────────────────
+#  Tagging
+# ──────────────────────────────────────────────
+def tag_chunk(text: str, default_condition: str | None = None) -> dict:
+    """Infer condition, dosha and type metadata compatible with the knowledge collections."""
+    lower = text.lower()
+
+    condition_hits = {c: len(p.findall(lower)) for c, p in _CONDITION_PATTERNS.items()}
+    best_condition = max(condition_hits, key=condition_hits.get)
+    if condition_hits[best_condition]:
+        condition = best_condition
+    else:
+        condition = default_condition or "General"
+
+    type_scores = {t: len(p.findall(lower)) for t, p in _TYPE_PATTERNS.items()}
+    chunk_type = max(type_scores, key=type_scores.get)
+    if not type_scores[chunk_type]:
+        chunk_type = "condition_overview"
+
+    dosha_hits = {d: lower.count(d.lower()) for d in _DOSHAS}
+    top = max(dosha_hits.values())
+    if top:
+        dosha = "-".join(d for d in sorted(_DOSHAS, key=dosha_hits.get, reverse=True) if dosha_hits[d] * 2 >= top)
+    else:
+        dosha = SUPPORTED_CONDITIONS.get(condition, ["Unknown"])[0]
+
+    return {"condition": condition, "dosha": dosha, "type": chunk_type}
+
+
+# ──────────────────────────────────────────────
+#  Pipeline
+# ──────────────────────────────────────────────
+def ingest_document(
+    path: Path,
+    condition: str | None = None,
+    start_page: int = 0,
+    end_page: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    overlap: int = CHUNK_OVERLAP,
+    batch_size: int = EMBED_BATCH_SIZE,
+    store: AyurvedicStorage | None = None,
+    on_progress: Callable[[dict], None] | None = None,
+) -> dict:
+    """
+    Stream `path` (pages [start_page, end_page)) into the knowledge collections.
+    Chunk IDs are derived from the file name and position, so re-ingesting a
+    document overwrites its previous chunks.
+    """
+    store = store or AyurvedicStorage()
+    source = path.name
+    buffers: dict[str, list[dict]] = {c: [] for c in TYPE_TO_COLLECTION.values()}
+    stats = {"source": source, "chunks": 0, "pages": 0, "by_collection": {c: 0 for c in buffers}}
+    last_page = start_page - 1
+
+    def _flush(collection: str):
+        entries = buffers[collection]
+        if not entries:
+            return
+        with telemetry.span("ingest.batch", collection=collection):
+            vectors = data_loader.embed_texts([e["text"] for e in entries])
+            if len(vectors) != len(entries):
+                raise RuntimeError(f"Embedding failed for a batch of {len(entries)} chunks from {source}")
+            store.upsert_knowledge(collection, entries, vectors)
+        stats["by_collection"][collection] += len(entries)
+        buffers[collection] = []
+        if on_progress:
+            on_progress(dict(stats, page=last_page))
+
+    n = 0
+    for page_no, chunk in iter_chunks(iter_pages(path, start_page, end_page), chunk_size, overlap):
+        n = n + 1 if page_no == last_page else 0
+        last_page = page_no
+        meta = tag_chunk(chunk, default_condition=condition)
+        collection = TYPE_TO_COLLECTION[meta["type"]]
+        buffers[collection].append({
+            "id": f"doc_{source}_p{page_no}_c{n}",
+            "text": chunk,
+            "source": source,
+            "page": page_no,
+            **meta,
+        })
+        stats["chunks"] += 1
+        if len(buffers[collection]) >= batch_size:
+            _flush(collection)
+
+    for collection in buffers:
+        _flush(collection)
+    if stats["chunks"]:
+        store.bump_kb_version()
+    stats["pages"] = max(0, last_page - start_page + 1)
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest a PDF or text file into the Ayurvedic knowledge collections")
+    parser.add_argument("path")
+    parser.add_argument("--condition", help="condition to tag chunks with when none is detected")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--overlap", type=int, default=CHUNK_OVERLAP)
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE)
+    args = parser.parse_args()
+
+    result = ingest_document(
+        Path(args.path),
+        condition=args.condition,
+        chunk_size=args.chunk_size,
+        overlap=args.overlap,
+        batch_size=args.batch_size,
+        on_progress=lambda s: print(f"📄 page {s['page']}: {s['chunks']} chunks"),
+    )
+    print(f"✅ Ingested {result['chunks']} chunks from {result['source']}: {result['by_collection']}")
@@ -0,0 +1,201 @@
+"""
+Portable snapshots of the seeded knowledge collections.
+
+A snapshot is one zip file:
+    manifest.json              format version, KB content hash, embedder, dimension, counts
+    <collection>/ids.json      point IDs
+    <collection>/vectors.f32   little-endian float32, row-major (points × dim)
+    <collection>/payloads.jsonl
+
+Restoring bulk-loads the stored vectors (no embedding calls) after checking that
+the snapshot was built from the same `ayurvedic_kb` content, so a new
+environment is ready in seconds:
+
+    python kb_snapshot.py export kb.snapshot
+    python kb_snapshot.py restore kb.snapshot --replace
+"""
+
+import hashlib
+import io
+import json
+import shutil
+import tempfile
+import time
+import zipfile
+
+import numpy as np
+from qdrant_client.models import FilterSelector, PointStruct
+
+import ayurvedic_kb
+import telemetry
+from vector_db import BUILT_IN_KNOWLEDGE, UPLOAD_PARALLEL, UPSERT_BATCH_SIZE, AyurvedicStorage
+
+FORMAT_VERSION = 1
+KNOWLEDGE_COLLECTIONS = list(ayurvedic_kb.ALL_KNOWLEDGE)
+
+
+class SnapshotMismatch(ValueError):
+    """The snapshot was built from different knowledge base content or embedder."""
+
+
+def kb_content_hash(knowledge: dict | None = None) -> str:
+    """Stable hash of the knowledge entries (independent of file formatting)."""
+    knowledge = ayurvedic_kb.ALL_KNOWLEDGE if knowledge is None else knowledge
+    canonical = json.dumps(knowledge, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# ──────────────────────────────────────────────
+#  Export
+# ──────────────────────────────────────────────
+def export_snapshot(
+    path: str,
+    store: AyurvedicStorage | None = None,
+    embedder_model: str | None = None,
+    knowledge: dict | None = None,
+    page_size: int = 512,
+) -> dict:
+    """Write every knowledge collection to `path`. Returns the manifest."""
+    store = store or AyurvedicStorage()
+    if embedder_model is None:
+        import data_loader
+        embedder_model = data_loader.embedder.model
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "created_at": int(time.time()),
+        "kb_hash": kb_content_hash(knowledge),
+        "embedder": embedder_model,
+        "collections": {},
+    }
+    with telemetry.span("snapshot.export"), zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name in KNOWLEDGE_COLLECTIONS:
+            ids, dim, offset = [], 0, None
+            # A zip accepts one open member at a time, so payloads are spooled aside
+            with tempfile.SpooledTemporaryFile(max_size=32 * 2**20) as payload_out:
+                with zf.open(f"{name}/vectors.f32", "w") as vec_out:
+                    while True:
+                        points, offset = store.client.scroll(
+                            collection_name=name,
+                            limit=page_size,
+                            offset=offset,
+                            with_payload=True,
+                            with_vectors=True,
+                        )
+                        if not points:
+                            break
+                        block = np.asarray([p.vector for p in points], dtype="<f4")
+                        dim = block.shape[1]
+                        vec_out.write(block.tobytes())
+                        payload_out.write(
+                            "".join(json.dumps(p.payload, ensure_ascii=False) + "\n" for p in points).encode("utf-8")
+                        )
+                        ids.extend(str(p.id) for p in points)
+                        if offset is None:
+                            break
+                payload_out.seek(0)
+                with zf.open(f"{name}/payloads.jsonl", "w") as out:
+                    shutil.copyfileobj(payload_out, out)
+            zf.writestr(f"{name}/ids.json", json.dumps(ids))
+            manifest["collections"][name] = {"points": len(ids), "dim": dim}
+        zf.writestr("manifest.json", json.dumps(manifest, indent=2))
+    return manifest
+
+
+# ──────────────────────────────────────────────
+#  Restore
+# ──────────────────────────────────────────────
+def read_manifest(path: str) -> dict:
+    with zipfile.ZipFile(path) as zf:
+        return json.loads(zf.read("manifest.json"))
+
+
+def check_snapshot(manifest: dict, embedder_model: str, knowledge: dict | None = None):
+    if manifest.get("format") != FORMAT_VERSION:
+        raise SnapshotMismatch(f"Unsupported snapshot format: {manifest.get('format')}")
+    if manifest["kb_hash"] != kb_content_hash(knowledge):
+        raise SnapshotMismatch("Snapshot was built from a different ayurvedic_kb.py")
+    if manifest["embedder"] != embedder_model:
+        raise SnapshotMismatch(f"Snapshot vectors come from {manifest['embedder']}, not {embedder_model}")
+
+
+def restore_snapshot(
+    path: str,
+    store: AyurvedicStorage | None = None,
+    replace: bool = False,
+    force: bool = False,
+    embedder_model: str | None = None,
+    knowledge: dict | None = None,
+) -> dict:
+    """
+    Bulk-load a snapshot into the knowledge collections.
+    `replace` first removes each collection's built-in entries, so entries dropped
+    from ayurvedic_kb disappear; ingested documents are kept (the snapshot's own
+    copies are loaded over them). `force` skips the KB hash / embedder check.
+    """
+    store = store or AyurvedicStorage()
+    if embedder_model is None:
+        import data_loader
+        embedder_model = data_loader.embedder.model
+
+    stats = {}
+    with telemetry.span("snapshot.restore"), zipfile.ZipFile(path) as zf:
+        manifest = json.loads(zf.read("manifest.json"))
+        if not force:
+            check_snapshot(manifest, embedder_model, knowledge)
+
+        for name, info in manifest["collections"].items():
+            started = time.perf_counter()
+            ids = json.loads(zf.read(f"{name}/ids.json"))
+            if not ids:
+                stats[name] = "empty"
+                continue
+            vectors = np.frombuffer(zf.read(f"{name}/vectors.f32"), dtype="<f4").reshape(len(ids), info["dim"])
+            dim = store.collection_dim(name)
+            if info["dim"] < dim:
+                raise SnapshotMismatch(f"{name}: snapshot has {info['dim']}-d vectors, collection needs {dim}")
+            if info["dim"] > dim:
+                # Same truncation + renormalisation as vector_db.fit_vector
+                vectors = vectors[:, :dim] / np.linalg.norm(vectors[:, :dim], axis=1, keepdims=True).clip(1e-12)
+
+            if replace:
+                store.client.delete(collection_name=name, points_selector=FilterSelector(filter=BUILT_IN_KNOWLEDGE))
+
+            def _points():
+                with zf.open(f"{name}/payloads.jsonl") as payloads:
+                    for pid, vector, line in zip(ids, vectors, io.TextIOWrapper(payloads, encoding="utf-8")):
+                        yield PointStruct(id=pid, vector=vector.tolist(), payload=json.loads(line))
+
+            store.client.upload_points(
+                collection_name=name,
+                points=_points(),
+                batch_size=UPSERT_BATCH_SIZE,
+                parallel=UPLOAD_PARALLEL,
+                wait=True,
+            )
+            seconds = time.perf_counter() - started
+            stats[name] = f"restored {len(ids)} ({len(ids) / max(seconds, 1e-9):.0f} points/s)"
+
+    store.bump_kb_version(kb_hash=manifest.get("kb_hash"))
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export or restore the Ayurvedic knowledge collections")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_export = sub.add_parser("export")
+    p_export.add_argument("path")
+    p_restore = sub.add_parser("restore")
+    p_restore.add_argument("path")
+    p_restore.add_argument("--replace", action="store_true", help="remove built-in entries before loading")
+    p_restore.add_argument("--force", action="store_true", help="skip the KB content / embedder check")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        result = export_snapshot(args.path)
+        print(f"✅ Exported {sum(c['points'] for c in result['collections'].values())} points to {args.path}")
+    else:
+        for name, stat in restore_snapshot(args.path, replace=args.replace, force=args.force).items():
+            print(f"✅ {name}: {stat}")
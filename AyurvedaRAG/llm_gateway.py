@@ -0,0 +1,222 @@
+"""
+Shared gateway for chat completions.
+
+Every LLM call in the process goes through one `LLMGateway`, which provides:
+  • one pooled HTTP client with separate connect / read timeouts
+  • token buckets for requests per minute and tokens per minute
+  • an adaptive concurrency limit (AIMD): +1 per window of healthy calls,
+    ×0.7 on a 429 or a latency spike
+  • priority lanes: a free slot always goes to the most urgent waiter, so
+    interactive plan generation overtakes background progress reports
+  • retries of 429 / transient errors with jittered exponential backoff
+    (the SDK's own retries are disabled so the limiter sees every 429)
+"""
+
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+
+import telemetry
+
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+LLM_CONNECT_TIMEOUT_S = float(os.getenv("LLM_CONNECT_TIMEOUT_S", "5"))
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RPM = float(os.getenv("LLM_RPM", "0"))                  # requests per minute, 0 = unlimited
+LLM_TPM = float(os.getenv("LLM_TPM", "0"))                  # tokens per minute, 0 = unlimited
+LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_LATENCY_SPIKE_S = float(os.getenv("LLM_LATENCY_SPIKE_S", "30"))
+
+# Lower value = served first
+PRIORITIES = {"interactive": 0, "batch": 1, "background": 2}
+
+
+def _is_throttled(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429 or "429" in str(error)
+
+
+def _is_transient(error: Exception) -> bool:
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status >= 500 or status in (408, 409)
+    name = type(error).__name__
+    return "Timeout" in name or "Connection" in name
+
+
+def _retry_after(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+# ──────────────────────────────────────────────
+#  Rate limiting
+# ──────────────────────────────────────────────
+class TokenBucket:
+    """Refills `per_minute` units per minute; callers reserve units and sleep off any debt."""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` units now; returns how long the caller must wait before using them."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= min(amount, self.capacity)
+            return max(0.0, -self.tokens / self.rate)
+
+
+class AdaptiveLimiter:
+    """Concurrency limit with additive increase / multiplicative decrease and priority-ordered waiters."""
+
+    def __init__(self, minimum: int, maximum: int):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(self.maximum)
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._waiters: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._last_decrease = 0.0
+
+    def acquire(self, priority: int):
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiters, ticket)
+            while self._waiters[0] != ticket or self.in_flight >= int(self.limit):
+                self._cond.wait()
+            heapq.heappop(self._waiters)
+            self.in_flight += 1
+            self._cond.notify_all()
+
+    def release(self, congested: bool):
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if congested:
+                # At most one decrease per second so a burst of 429s is one signal
+                if now - self._last_decrease > 1.0:
+                    self.limit = max(self.minimum, self.limit * 0.7)
+                    self._last_decrease = now
+                    telemetry.incr("llm_concurrency_decrease")
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+
+# ──────────────────────────────────────────────
+#  Gateway
+# ──────────────────────────────────────────────
+class LLMGateway:
+    def __init__(self, client=None, model: str | None = None):
+        self._client = client
+        self._model = model
+        self._client_lock = threading.Lock()
+        self.limiter = AdaptiveLimiter(LLM_MIN_CONCURRENCY, LLM_MAX_CONCURRENCY)
+        self.requests = TokenBucket(LLM_RPM)
+        self.tokens = TokenBucket(LLM_TPM)
+
+    def _make_client(self):
+        import httpx
+        from openai import DefaultHttpxClient, OpenAI
+
+        http_client = DefaultHttpxClient(
+            limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS),
+            timeout=httpx.Timeout(LLM_TIMEOUT_S, connect=LLM_CONNECT_TIMEOUT_S),
+        )
+        # Use OpenRouter if key is available, otherwise fall back to OpenAI directly
+        or_key = os.getenv("OPENROUTER_API_KEY")
+        if or_key:
+            return OpenAI(base_url="https://openrouter.ai/api/v1", api_key=or_key,
+                          http_client=http_client, max_retries=0), "openai/gpt-4o-mini"
+        return OpenAI(http_client=http_client, max_retries=0), "gpt-4o-mini"
+
+    @property
+    def client(self):
+        with self._client_lock:
+            if self._client is None:
+                self._client, default_model = self._make_client()
+                self._model = self._model or default_model
+        return self._client
+
+    @property
+    def model(self) -> str:
+        if self._model is None:
+            self.client
+        return self._model or "gpt-4o-mini"
+
+    def qualified(self, name: str) -> str:
+        """Provider-qualified model name (`gpt-4o-mini` -> `openai/gpt-4o-mini` on OpenRouter)."""
+        if "/" in name or "/" not in self.model:
+            return name
+        return f"{self.model.split('/', 1)[0]}/{name}"
+
+    def complete(self, messages: list[dict], max_tokens: int, priority: str = "interactive",
+                 timeout: float | None = None, observer=None, **kwargs):
+        """
+        `chat.completions.create` through the limiter. Returns the raw response.
+        `observer(seconds, ok)` is called after every provider attempt (see model_router).
+        """
+        lane = PRIORITIES.get(priority, PRIORITIES["background"])
+        model = kwargs.pop("model", None) or self.model
+        est_tokens = sum(len(m.get("content", "")) for m in messages) // 4 + max_tokens
+
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            queued = time.perf_counter()
+            # Sleep off rate-limit debt before taking a slot, so a throttled batch or
+            # background call doesn't hold concurrency that interactive calls are waiting for
+            wait = max(self.requests.reserve(1), self.tokens.reserve(est_tokens))
+            if wait:
+                time.sleep(wait)
+            self.limiter.acquire(lane)
+            congested = False
+            started = None
+            try:
+                telemetry.record("llm.queue", time.perf_counter() - queued, priority=priority)
+                started = time.perf_counter()
+                response = self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    timeout=timeout or LLM_TIMEOUT_S,
+                    **kwargs,
+                )
+                elapsed = time.perf_counter() - started
+                congested = elapsed > LLM_LATENCY_SPIKE_S
+                if observer:
+                    observer(elapsed, True)
+                return response
+            except Exception as e:
+                if observer and started is not None:
+                    observer(time.perf_counter() - started, False)
+                throttled = _is_throttled(e)
+                congested = throttled
+                if attempt >= LLM_MAX_RETRIES or not (throttled or _is_transient(e)):
+                    raise
+                telemetry.incr("retries", target="llm_throttled" if throttled else "llm_transient")
+                delay = _retry_after(e) or min(30.0, 0.5 * 2 ** attempt) * (0.5 + random.random())
+            finally:
+                self.limiter.release(congested)
+            time.sleep(delay)
+
+    def state(self) -> dict:
+        return {
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "in_flight": self.limiter.in_flight,
+            "waiting": len(self.limiter._waiters),
+        }
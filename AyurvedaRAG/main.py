@@ -1,19 +1,32 @@
 import logging
 import datetime
 import os
+import time
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
 import inngest
 import inngest.fast_api
 from inngest.experimental import ai
 
 import data_loader
+import function_controls
+import progress_analytics
 from vector_db import AyurvedicStorage
 import ayurvedic_rag
+import ingestion
+import plan_store
+import telemetry
+import usage
 
 load_dotenv(override=True)
 
+BULK_PLAN_CONCURRENCY = int(os.getenv("BULK_PLAN_CONCURRENCY", "4"))
+BULK_PLAN_MAX_CONCURRENCY = int(os.getenv("BULK_PLAN_MAX_CONCURRENCY", "16"))
+INGEST_PAGES_PER_STEP = int(os.getenv("INGEST_PAGES_PER_STEP", "25"))
+REFRESH_PLAN_CONCURRENCY = int(os.getenv("REFRESH_PLAN_CONCURRENCY", "4"))
+
 app = FastAPI()
 
 
@@ -22,6 +35,89 @@ def read_root():
     return {"status": "ok", "service": "AyurvedaRAG API — Personalized Treatment Intelligence"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Per-stage latency histograms and counters in Prometheus text format."""
+    return telemetry.render_prometheus()
+
+
+@app.get("/usage")
+def usage_report(
+    group_by: str = "user_id",
+    since: float | None = None,
+    until: float | None = None,
+    user_id: str | None = None,
+    condition: str | None = None,
+    function: str | None = None,
+):
+    """Token and cost totals grouped by one field over a unix-time window."""
+    try:
+        rows = usage.query_usage(group_by, since=since, until=until,
+                                 user_id=user_id, condition=condition, function=function)
+    except ValueError as e:
+        return {"error": str(e)}
+    return {"group_by": group_by, "rows": rows}
+
+
+@app.get("/routing")
+def routing():
+    """Model routes, per-model health and recent routing decisions."""
+    return {**ayurvedic_rag._router.state(), "gateway": ayurvedic_rag._llm.state()}
+
+
+@app.get("/controls")
+def controls():
+    """Effective concurrency / throttle / debounce / singleton / priority settings per Inngest function."""
+    return function_controls.describe()
+
+
+@app.get("/plans/{plan_id}")
+def stored_plan(plan_id: str):
+    """A stored plan with its current sections, revision and per-section provenance."""
+    plan = plan_store.get_plan(plan_id)
+    if plan is None:
+        return {"error": f"unknown plan: {plan_id}"}
+    return {**plan, "plan": ayurvedic_rag.render_plan(plan["sections"])}
+
+
+@app.get("/progress/analytics")
+def progress_analytics_report(user_id: str, condition: str, tenant_id: str | None = None,
+                              window: int = progress_analytics.MOVING_AVERAGE_WEEKS):
+    """Scores, moving averages, week-over-week deltas and trends of one user's progress logs."""
+    logs = AyurvedicStorage().get_user_progress(user_id, condition, tenant_id=tenant_id)
+    with telemetry.span("progress.analytics", scope="user"):
+        analysis = progress_analytics.analyze(logs, window=window)
+    return {"user_id": user_id, "condition": condition, **analysis, "summary": progress_analytics.describe(analysis)}
+
+
+@app.get("/progress/similar")
+def progress_similar_users(user_id: str, condition: str, tenant_id: str | None = None,
+                           top_k: int = 10, min_weeks: int = 2):
+    """Users with the same condition whose progress trajectories resemble `user_id`'s (nearest neighbours)."""
+    neighbours = AyurvedicStorage().similar_trajectories(
+        user_id, condition, tenant_id=tenant_id, top_k=top_k, min_weeks=min_weeks,
+    )
+    improving = [
+        n for n in neighbours
+        if ((n.get("trend") or {}).get("overall") or 0.0) >= progress_analytics.TREND_MIN_SLOPE
+    ]
+    return {
+        "user_id": user_id,
+        "condition": condition,
+        "similar_users": neighbours,
+        "improving": len(improving),
+    }
+
+
+@app.get("/progress/cohort")
+def progress_cohort_report(condition: str, tenant_id: str | None = None,
+                           window: int = progress_analytics.MOVING_AVERAGE_WEEKS):
+    """Week-by-week progress statistics across all users with a condition."""
+    logs = AyurvedicStorage().get_condition_progress(condition, tenant_id=tenant_id)
+    with telemetry.span("progress.analytics", scope="cohort"):
+        return {"condition": condition, **progress_analytics.cohort_analysis(logs, window=window)}
+
+
 # ──────────────────────────────────────────────
 #  Inngest Client
 # ──────────────────────────────────────────────
@@ -34,22 +130,86 @@ inngest_client = inngest.Inngest(
 )
 
 
+# ──────────────────────────────────────────────
+#  Step tracing & usage helpers
+# ──────────────────────────────────────────────
+async def _traced_step(
+    ctx: inngest.Context,
+    step_id: str,
+    fn,
+    function: str,
+    record_queue: bool = False,
+    dims: dict | None = None,
+):
+    """
+    Run `fn` as an Inngest step inside a telemetry trace and usage ledger.
+    Returns (result, meta) where meta = {"trace": [...], "usage": {...}};
+    meta is memoized with the step output so replays report the original
+    timings and never double-count tokens.
+    """
+    def _run() -> dict:
+        if ctx.attempt > 0:
+            telemetry.incr("retries", target=step_id)
+        step_dims = {
+            "run_id": ctx.run_id,
+            "user_id": ctx.event.data.get("user_id"),
+            "condition": ctx.event.data.get("condition"),
+            "function": function,
+            **(dims or {}),
+        }
+        with telemetry.trace() as t, usage.track(**step_dims) as ledger:
+            if record_queue and ctx.event.ts:
+                telemetry.record("inngest.queue", max(0.0, time.time() - ctx.event.ts / 1000.0))
+            with telemetry.span("step", step=step_id):
+                result = fn()
+        return {"result": result, "meta": {"trace": t.summary(), "usage": ledger.summary()}}
+
+    out = await ctx.step.run(step_id, _run)
+    return out["result"], out["meta"]
+
+
+def _merge_meta(*metas: dict) -> dict:
+    return {
+        "trace": [s for m in metas for s in m["trace"]],
+        "usage": usage.merge(*(m["usage"] for m in metas)),
+    }
+
+
 # ══════════════════════════════════════════════
 #  Ayurvedic Knowledge Base Seeder
 # ══════════════════════════════════════════════
 @inngest_client.create_function(
     fn_id="Ayurveda: Seed Knowledge Base",
     trigger=inngest.TriggerEvent(event="ayurveda/seed-kb"),
+    **function_controls.create_kwargs("ayurveda_seed_kb"),
 )
 async def ayurveda_seed_kb(ctx: inngest.Context):
-    """Seed/re-seed all Ayurvedic knowledge collections in Qdrant."""
+    """
+    Seed/re-seed all Ayurvedic knowledge collections in Qdrant.
+    Event data: { force?: bool, reconcile?: bool }
+    `reconcile` first updates existing collections to match their configuration profile.
+    When any collection was (re)written, `ayurveda/kb-updated` is sent so stored
+    plans built from changed entries are refreshed (ayurveda_refresh_plans).
+    """
     force = ctx.event.data.get("force", False)
+    reconcile = ctx.event.data.get("reconcile", False)
 
     def _seed() -> dict:
         return ayurvedic_rag.seed_knowledge_base(force=force)
 
-    stats = await ctx.step.run("seed-collections", _seed)
-    return {"status": "done", "collections": stats}
+    profiles = None
+    if reconcile:
+        profiles, _ = await _traced_step(
+            ctx, "reconcile-collections", lambda: AyurvedicStorage().reconcile_collections(),
+            "ayurveda_seed_kb", record_queue=True,
+        )
+    stats, meta = await _traced_step(ctx, "seed-collections", _seed, "ayurveda_seed_kb", record_queue=not reconcile)
+    written = [name for name, s in stats.items() if s.startswith(("seeded", "restored"))]
+    if written:
+        await ctx.step.send_event("kb-updated", inngest.Event(
+            name="ayurveda/kb-updated", data={"collections": written},
+        ))
+    return {"status": "done", "collections": stats, "profiles": profiles, **meta}
 
 
 # ══════════════════════════════════════════════
@@ -58,34 +218,325 @@ async def ayurveda_seed_kb(ctx: inngest.Context):
 @inngest_client.create_function(
     fn_id="Ayurveda: Generate Treatment Plan",
     trigger=inngest.TriggerEvent(event="ayurveda/generate-plan"),
+    **function_controls.create_kwargs("ayurveda_generate_plan"),
 )
 async def ayurveda_generate_plan(ctx: inngest.Context):
     """
     Retrieve condition-specific knowledge and generate a structured treatment plan.
-    Event data: { condition: str, user_id: str }
+    Event data: { condition: str, user_id: str, plan_mode?: "single" | "sectioned" }
+    The output carries the plan both as markdown ("plan") and as ordered
+    sections ("sections"); see ayurvedic_rag.generate_plan_sections. The plan
+    is stored with per-section provenance under "plan_id" (see plan_store).
+    Retrieval is passed between steps as point IDs (ayurvedic_rag.compact_retrieved)
+    and rehydrated inside the generate step, keeping run state small.
     """
     condition = ctx.event.data.get("condition", "")
     user_id = ctx.event.data.get("user_id", "anonymous")
+    plan_mode = ctx.event.data.get("plan_mode") or ayurvedic_rag.PLAN_MODE
 
     if not condition:
         return {"error": "condition is required"}
+    if plan_mode not in ("single", "sectioned"):
+        return {"error": f"unknown plan_mode: {plan_mode}"}
 
     def _retrieve() -> dict:
-        return ayurvedic_rag.retrieve_for_condition(condition)
+        # Checked inside the step so the decision is memoized across replays
+        budget = usage.check_budget(user_id)
+        if not budget["allowed"]:
+            return {"budget": budget, "refs": {"kb_version": None, "refs": {}}}
+        retrieved = ayurvedic_rag.retrieve_for_condition(condition)
+        return {"budget": budget, "refs": ayurvedic_rag.compact_retrieved(retrieved)}
 
-    def _generate(retrieved: dict) -> str:
-        return ayurvedic_rag.generate_treatment_plan(condition, retrieved)
+    def _generate(refs: dict, degraded: bool) -> dict:
+        max_tokens = usage.DEGRADED_MAX_TOKENS["plan"] if degraded else 2000
+        retrieved = ayurvedic_rag.hydrate_retrieved(refs)
+        plan = ayurvedic_rag.generate_plan_sections(condition, retrieved, max_tokens=max_tokens, mode=plan_mode)
+        return {**plan, "plan_id": ayurvedic_rag.store_plan(user_id, condition, plan, retrieved)}
 
-    retrieved = await ctx.step.run("retrieve-knowledge", _retrieve)
-    plan = await ctx.step.run("generate-plan", lambda: _generate(retrieved))
+    fn_name = "ayurveda_generate_plan"
+    step_out, retrieve_meta = await _traced_step(ctx, "retrieve-knowledge", _retrieve, fn_name, record_queue=True)
+    budget, refs = step_out["budget"], step_out["refs"]
+    if not budget["allowed"]:
+        return {
+            "condition": condition,
+            "user_id": user_id,
+            "error": "token budget exceeded",
+            "budget": budget,
+            **_merge_meta(retrieve_meta),
+        }
+
+    plan, plan_meta = await _traced_step(
+        ctx, "generate-plan", lambda: _generate(refs, budget["degraded"]), fn_name
+    )
 
     # Removed 7-day follow-up reminder automatic scheduling
 
     return {
         "condition": condition,
         "user_id": user_id,
-        "plan": plan,
-        "retrieved_sections": list(retrieved.keys()),
+        "plan": plan["markdown"],
+        "plan_id": plan["plan_id"],
+        "sections": plan["sections"],
+        "plan_mode": plan["mode"],
+        "retrieved_sections": list(refs["refs"].keys()),
+        "budget": budget,
+        **_merge_meta(retrieve_meta, plan_meta),
+    }
+
+
+# ══════════════════════════════════════════════
+#  Speculative Retrieval Prefetch
+# ══════════════════════════════════════════════
+@inngest_client.create_function(
+    fn_id="Ayurveda: Prefetch Retrieval",
+    trigger=inngest.TriggerEvent(event="ayurveda/prefetch-retrieval"),
+    **function_controls.create_kwargs("ayurveda_prefetch_retrieval"),
+)
+async def ayurveda_prefetch_retrieval(ctx: inngest.Context):
+    """
+    Warm retrieval for conditions a user is likely to generate a plan for.
+    Event data: { user_id: str, conditions: [str], reason: "selection" | "history" }
+    Returns as soon as the retrieval is scheduled; a following generate-plan
+    run in this worker reuses the result (see ayurvedic_rag.prefetch_retrieval).
+    A new "selection" cancels the user's previous selection if it has not started.
+    """
+    data = ctx.event.data
+    conditions = [c for c in data.get("conditions", []) if isinstance(c, str) and c.strip()]
+    if not conditions:
+        return {"scheduled": []}
+
+    scheduled, meta = await _traced_step(
+        ctx, "schedule-prefetch",
+        lambda: ayurvedic_rag.prefetch_retrieval(
+            conditions, user_id=data.get("user_id") if data.get("reason", "selection") == "selection" else None,
+        ),
+        "ayurveda_prefetch_retrieval", record_queue=True, dims={"condition": None},
+    )
+    return {"scheduled": scheduled, **meta}
+
+
+# ══════════════════════════════════════════════
+#  Bulk Treatment Plan Generation
+# ══════════════════════════════════════════════
+@inngest_client.create_function(
+    fn_id="Ayurveda: Bulk Generate Treatment Plans",
+    trigger=inngest.TriggerEvent(event="ayurveda/generate-plans-bulk"),
+    **function_controls.create_kwargs("ayurveda_generate_plans_bulk"),
+)
+async def ayurveda_generate_plans_bulk(ctx: inngest.Context):
+    """
+    Generate plans for many (user, condition) pairs in one run.
+    Event data: { items: [{user_id, condition}], concurrency?: int, job_id?: str }
+
+    Conditions are deduped and retrieved once (one batched embedding call).
+    Each item's user budget is checked in its own step, as in the single-plan
+    function; items over budget are reported under "rejected_items".
+    Each item is its own step, so a retry only re-runs failed items; items
+    that still fail after Inngest's retries are reported under "failed_items"
+    and can be resubmitted as a new bulk event. A progress event
+    (`ayurveda/generate-plans-bulk.progress`) is sent after every batch.
+    """
+    data = ctx.event.data
+    fn_name = "ayurveda_generate_plans_bulk"
+    job_id = data.get("job_id") or ctx.run_id
+    concurrency = max(1, min(int(data.get("concurrency") or BULK_PLAN_CONCURRENCY), BULK_PLAN_MAX_CONCURRENCY))
+
+    # Dedupe identical (user, condition) pairs, keeping submission order
+    pairs = dict.fromkeys(
+        (item.get("user_id", "anonymous"), item.get("condition", ""))
+        for item in data.get("items", [])
+        if item.get("condition")
+    )
+    items = [{"user_id": u, "condition": c} for u, c in pairs]
+    if not items:
+        return {"error": "items are required"}
+
+    conditions = [item["condition"] for item in items]
+
+    def _retrieve_all() -> dict:
+        version = AyurvedicStorage().kb_version()
+        return {
+            condition: ayurvedic_rag.compact_retrieved(retrieved, kb_version=version)
+            for condition, retrieved in ayurvedic_rag.retrieve_for_conditions(conditions).items()
+        }
+
+    refs_by_condition, retrieve_meta = await _traced_step(
+        ctx, "retrieve-knowledge", _retrieve_all,
+        fn_name, record_queue=True, dims={"user_id": None, "condition": None},
+    )
+
+    def _generate(item: dict, refs: dict) -> dict:
+        budget = usage.check_budget(item["user_id"])
+        if not budget["allowed"]:
+            return {"budget": budget}
+        max_tokens = usage.DEGRADED_MAX_TOKENS["plan"] if budget["degraded"] else 2000
+        retrieved = ayurvedic_rag.hydrate_retrieved(refs)
+        markdown = ayurvedic_rag.generate_treatment_plan(
+            item["condition"], retrieved, max_tokens=max_tokens, priority="batch",
+        )
+        plan = {"mode": "single", "sections": ayurvedic_rag.split_plan_sections(markdown), "markdown": markdown}
+        return {
+            "plan": markdown,
+            "plan_id": ayurvedic_rag.store_plan(item["user_id"], item["condition"], plan, retrieved),
+            "budget": budget,
+        }
+
+    def _item_step(idx: int, item: dict):
+        async def _run() -> dict:
+            refs = refs_by_condition.get(item["condition"], {"kb_version": None, "refs": {}})
+            try:
+                out, meta = await _traced_step(
+                    ctx, f"generate-plan-{idx}", lambda: _generate(item, refs), fn_name, dims=item,
+                )
+                if not out["budget"]["allowed"]:
+                    return {**item, "status": "rejected", "error": "token budget exceeded", **out, **meta}
+                return {**item, "status": "completed", **out, **meta}
+            except inngest.StepError as e:
+                return {**item, "status": "failed", "error": str(e), "trace": [], "usage": {}}
+        return _run
+
+    results = []
+    for start in range(0, len(items), concurrency):
+        batch = items[start:start + concurrency]
+        outputs = await ctx.group.parallel(tuple(_item_step(start + n, item) for n, item in enumerate(batch)))
+        results.extend(outputs)
+        await ctx.step.send_event(f"progress-{start}", inngest.Event(
+            name="ayurveda/generate-plans-bulk.progress",
+            data={
+                "job_id": job_id,
+                "completed": len(results),
+                "total": len(items),
+                "items": [
+                    {k: r.get(k) for k in ("user_id", "condition", "status", "plan", "plan_id", "error")}
+                    for r in outputs
+                ],
+            },
+        ))
+
+    failed = [{"user_id": r["user_id"], "condition": r["condition"]} for r in results if r["status"] == "failed"]
+    rejected = [{"user_id": r["user_id"], "condition": r["condition"]} for r in results if r["status"] == "rejected"]
+    return {
+        "job_id": job_id,
+        "total": len(items),
+        "completed": len(items) - len(failed) - len(rejected),
+        "distinct_conditions": len(refs_by_condition),
+        "results": [{k: v for k, v in r.items() if k not in ("trace", "usage")} for r in results],
+        "failed_items": failed,
+        "rejected_items": rejected,
+        **_merge_meta(retrieve_meta, *(r for r in results if r["status"] == "completed")),
+    }
+
+
+# ══════════════════════════════════════════════
+#  Incremental Refresh of Stored Plans
+# ══════════════════════════════════════════════
+@inngest_client.create_function(
+    fn_id="Ayurveda: Refresh Stored Plans",
+    trigger=inngest.TriggerEvent(event="ayurveda/kb-updated"),
+    **function_controls.create_kwargs("ayurveda_refresh_plans"),
+)
+async def ayurveda_refresh_plans(ctx: inngest.Context):
+    """
+    After a knowledge base change, regenerate only the stored plan sections
+    whose source entries changed (by content hash) or were removed.
+    Event data: { collections?: [str] } (informational; every tracked entry is checked)
+
+    Each plan is its own step, so a retry only re-runs the plans that failed.
+    """
+    fn_name = "ayurveda_refresh_plans"
+    dims = {"user_id": None, "condition": None}
+    stale, find_meta = await _traced_step(
+        ctx, "find-stale-sections", ayurvedic_rag.find_stale_sections, fn_name, record_queue=True, dims=dims,
+    )
+
+    def _plan_step(plan_id: str, sections: list[str]):
+        async def _run() -> dict:
+            try:
+                out, meta = await _traced_step(
+                    ctx, f"refresh-{plan_id}",
+                    lambda: ayurvedic_rag.refresh_plan_sections(plan_id, sections),
+                    fn_name, dims=dims,
+                )
+                return {**out, **meta}
+            except inngest.StepError as e:
+                return {"plan_id": plan_id, "status": "failed", "error": str(e), "trace": [], "usage": {}}
+        return _run
+
+    plans = list(stale["plans"].items())
+    results = []
+    for start in range(0, len(plans), REFRESH_PLAN_CONCURRENCY):
+        batch = plans[start:start + REFRESH_PLAN_CONCURRENCY]
+        results.extend(await ctx.group.parallel(tuple(_plan_step(pid, sections) for pid, sections in batch)))
+
+    return {
+        "tracked_entries": stale["tracked_entries"],
+        "stale_entries": stale["stale_entries"],
+        "plans": len(plans),
+        "sections": sum(len(sections) for _, sections in plans),
+        "results": [{k: v for k, v in r.items() if k not in ("trace", "usage")} for r in results],
+        **_merge_meta(find_meta, *(r for r in results if r["status"] == "refreshed")),
+    }
+
+
+# ══════════════════════════════════════════════
+#  Document Ingestion (PDFs / classical texts)
+# ══════════════════════════════════════════════
+@inngest_client.create_function(
+    fn_id="Ayurveda: Ingest Document",
+    trigger=inngest.TriggerEvent(event="ayurveda/ingest-document"),
+    **function_controls.create_kwargs("ayurveda_ingest_document"),
+)
+async def ayurveda_ingest_document(ctx: inngest.Context):
+    """
+    Stream a PDF or text file from UPLOAD_DIR into the knowledge collections.
+    Event data: { path: str, condition?: str, chunk_size?: int, overlap?: int }
+
+    Pages are processed in ranges of INGEST_PAGES_PER_STEP, one step each, so
+    a failure resumes from the failed range. A progress event
+    (`ayurveda/ingest-document.progress`) is sent after every range.
+    """
+    data = ctx.event.data
+    fn_name = "ayurveda_ingest_document"
+    try:
+        path = ingestion.resolve_upload_path(data.get("path", ""))
+    except (ValueError, FileNotFoundError) as e:
+        return {"error": str(e)}
+
+    total_pages, _ = await _traced_step(
+        ctx, "count-pages", lambda: ingestion.count_pages(path), fn_name, record_queue=True
+    )
+
+    def _ingest_range(start: int, end: int) -> dict:
+        return ingestion.ingest_document(
+            path,
+            condition=data.get("condition"),
+            start_page=start,
+            end_page=end,
+            chunk_size=int(data.get("chunk_size") or ingestion.CHUNK_SIZE),
+            overlap=int(data.get("overlap") or ingestion.CHUNK_OVERLAP),
+        )
+
+    totals = {"chunks": 0, "by_collection": {}}
+    metas = []
+    for start in range(0, total_pages, INGEST_PAGES_PER_STEP):
+        end = min(start + INGEST_PAGES_PER_STEP, total_pages)
+        stats, meta = await _traced_step(
+            ctx, f"ingest-pages-{start}", lambda s=start, e=end: _ingest_range(s, e), fn_name
+        )
+        metas.append(meta)
+        totals["chunks"] += stats["chunks"]
+        for coll, n in stats["by_collection"].items():
+            totals["by_collection"][coll] = totals["by_collection"].get(coll, 0) + n
+        await ctx.step.send_event(f"progress-{start}", inngest.Event(
+            name="ayurveda/ingest-document.progress",
+            data={"source": path.name, "pages_done": end, "total_pages": total_pages, **totals},
+        ))
+
+    return {
+        "source": path.name,
+        "total_pages": total_pages,
+        **totals,
+        **_merge_meta(*metas),
     }
 
 
@@ -95,14 +546,20 @@ async def ayurveda_generate_plan(ctx: inngest.Context):
 @inngest_client.create_function(
     fn_id="Ayurveda: Log Progress",
     trigger=inngest.TriggerEvent(event="ayurveda/log-progress"),
+    **function_controls.create_kwargs("ayurveda_log_progress"),
 )
 async def ayurveda_log_progress(ctx: inngest.Context):
     """
-    Store a week's progress log and generate a progress report.
+    Store a week's progress log, score it and report on the trend.
     Event data: { user_id, condition, week, energy_level, symptoms_improvement,
-                  digestion, sleep_quality, notes }
+                  digestion, sleep_quality, notes, tenant_id?, force_report? }
+    `tenant_id` is the clinic the user belongs to (see vector_db.PROGRESS_TENANCY).
+    The LLM report is only requested when the new log changes the computed
+    trend (progress_analytics.trend_change) or `force_report` is set; otherwise
+    the report is a local summary of the numbers.
     """
     data = ctx.event.data
+    tenant_id = data.get("tenant_id")
     user_id = data.get("user_id", "anonymous")
     condition = data.get("condition", "")
     week = data.get("week", 1)
@@ -119,7 +576,7 @@ async def ayurveda_log_progress(ctx: inngest.Context):
         store = AyurvedicStorage()
         embed_text = f"Progress week {week}: {str(progress_data)}"
         vecs = data_loader.embed_texts([embed_text])
-        vec = vecs[0] if vecs else [0.0] * 1536
+        vec = vecs[0] if vecs else [0.0] * data_loader.EMBED_DIM
 
         log_id = store.log_progress(
             user_id=user_id,
@@ -127,20 +584,46 @@ async def ayurveda_log_progress(ctx: inngest.Context):
             week=week,
             progress_data=progress_data,
             vector=vec,
+            tenant_id=tenant_id,
         )
 
-        all_logs = store.get_user_progress(user_id, condition)
-        report = ayurvedic_rag.generate_progress_report(user_id, condition, all_logs)
+        all_logs = store.get_user_progress(user_id, condition, tenant_id=tenant_id)
+        try:
+            store.update_trajectory(user_id, condition, tenant_id=tenant_id)
+        except Exception as e:
+            print(f"⚠️  Trajectory update failed for {user_id}/{condition}: {e}")
+        with telemetry.span("progress.analytics", scope="user"):
+            analysis = progress_analytics.analyze(all_logs)
+            # The picture before this log: drop only the newest log of its week
+            newest = max((log for log in all_logs if log.get("week") == week),
+                         key=lambda log: log.get("timestamp") or 0, default=None)
+            previous = progress_analytics.analyze([log for log in all_logs if log is not newest])
+            changes = progress_analytics.trend_change(previous, analysis)
+
+        narrate = bool(changes) or bool(data.get("force_report"))
+        telemetry.incr("progress_narrative", result="requested" if narrate else "skipped")
+        budget = usage.check_budget(user_id)
+        if not narrate:
+            report = progress_analytics.describe(analysis)
+        elif budget["allowed"]:
+            max_tokens = usage.DEGRADED_MAX_TOKENS["progress_report"] if budget["degraded"] else 1000
+            report = ayurvedic_rag.generate_progress_report(user_id, condition, all_logs, max_tokens=max_tokens)
+        else:
+            report = progress_analytics.describe(analysis) + " (Narrative skipped: token budget exceeded.)"
 
         return {
             "log_id": log_id,
             "week": week,
             "report": report,
+            "narrative": narrate and budget["allowed"],
+            "trend_changes": changes,
+            "analytics": {k: analysis[k] for k in ("weeks", "scores", "moving_average", "trend", "latest")},
             "total_weeks_logged": len(all_logs),
+            "budget": budget,
         }
 
-    result = await ctx.step.run("log-and-report", _log_and_report)
-    return result
+    result, meta = await _traced_step(ctx, "log-and-report", _log_and_report, "ayurveda_log_progress", record_queue=True)
+    return {**result, **meta}
 
 
 # ══════════════════════════════════════════════
@@ -152,6 +635,10 @@ inngest.fast_api.serve(
     [
         ayurveda_seed_kb,
         ayurveda_generate_plan,
+        ayurveda_prefetch_retrieval,
+        ayurveda_generate_plans_bulk,
+        ayurveda_ingest_document,
         ayurveda_log_progress,
+        ayurveda_refresh_plans,
     ],
 )
@@ -0,0 +1,210 @@
+"""
+Model routing for chat completions.
+
+Each call type (plan, section, progress_report, summary) has a route: its
+candidate models in preference order plus latency, error-rate and cost
+targets. For every call the router picks the first candidate that
+
+  • fits the route's per-call cost target (estimated from the prompt size and
+    max_tokens with usage.MODEL_PRICES), and
+  • is healthy for this call type: over its last ROUTER_WINDOW calls the p95
+    latency and error rate are within the route's targets
+
+A model that misses its targets is skipped for ROUTER_COOLDOWN_S, then gets
+fresh samples. A call that still fails after the gateway's retries is tried
+once on the next candidate. Every decision is counted in /metrics
+(`model_route{call,model,reason}`), kept in a short log for GET /routing, and
+the model used is stored with each usage record.
+
+Routes can be tuned without code changes:
+
+    MODEL_ROUTES_JSON='{"plan": {"models": ["gpt-4o", "gpt-4o-mini"], "p95_s": 30}}'
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+import telemetry
+import usage
+from llm_gateway import _is_throttled, _is_transient
+
+ROUTER_WINDOW = int(os.getenv("ROUTER_WINDOW", "50"))             # recent calls kept per (call, model)
+ROUTER_MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", "5"))    # judge health only after this many
+ROUTER_COOLDOWN_S = float(os.getenv("ROUTER_COOLDOWN_S", "60"))
+ROUTER_DECISION_LOG = int(os.getenv("ROUTER_DECISION_LOG", "200"))
+
+ROUTES = {
+    # Full plan in one completion: quality first, a larger model as fallback
+    "plan": {
+        "models": ["gpt-4o-mini", "gpt-4.1-mini"],
+        "p95_s": 45.0,
+        "max_error_rate": 0.25,
+        "max_cost_usd": 0.01,
+    },
+    # One plan section (sectioned mode): short, latency-bound
+    "section": {
+        "models": ["gpt-4o-mini", "gpt-4.1-nano"],
+        "p95_s": 15.0,
+        "max_error_rate": 0.25,
+        "max_cost_usd": 0.003,
+    },
+    # Weekly trend analysis: short, background, cheapest model first
+    "progress_report": {
+        "models": ["gpt-4.1-nano", "gpt-4o-mini"],
+        "p95_s": 15.0,
+        "max_error_rate": 0.25,
+        "max_cost_usd": 0.002,
+    },
+    # Short summaries
+    "summary": {
+        "models": ["gpt-4.1-nano", "gpt-4o-mini"],
+        "p95_s": 10.0,
+        "max_error_rate": 0.25,
+        "max_cost_usd": 0.001,
+    },
+}
+
+
+def _load_overrides():
+    raw = os.getenv("MODEL_ROUTES_JSON")
+    if not raw:
+        return
+    for call, overrides in json.loads(raw).items():
+        ROUTES[call] = {**ROUTES.get(call, ROUTES["plan"]), **overrides}
+
+
+_load_overrides()
+
+
+def _p95(values: list[float]) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+
+
+class ModelRouter:
+    def __init__(self, routes: dict | None = None):
+        self.routes = routes or ROUTES
+        self._samples: dict[tuple[str, str], deque] = {}     # (call, model) -> (seconds, ok)
+        self._tripped: dict[tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self.decisions: deque = deque(maxlen=ROUTER_DECISION_LOG)
+
+    # ── health ──
+    def observe(self, call: str, model: str, seconds: float, ok: bool):
+        """One provider attempt (called by the gateway for every try, including retries)."""
+        with self._lock:
+            self._samples.setdefault((call, model), deque(maxlen=ROUTER_WINDOW)).append((seconds, ok))
+
+    def _health(self, call: str, model: str) -> dict:
+        samples = list(self._samples.get((call, model), ()))
+        latencies = [s for s, ok in samples if ok]
+        return {
+            "samples": len(samples),
+            "p95_s": round(_p95(latencies), 3),
+            "error_rate": round(sum(1 for _, ok in samples if not ok) / len(samples), 3) if samples else 0.0,
+        }
+
+    def _healthy(self, call: str, model: str, route: dict) -> bool:
+        key = (call, model)
+        tripped = self._tripped.get(key)
+        if tripped is not None:
+            if time.monotonic() - tripped < ROUTER_COOLDOWN_S:
+                return False
+            # Cooldown over: judge it on fresh samples
+            del self._tripped[key]
+            self._samples.pop(key, None)
+        h = self._health(call, model)
+        if h["samples"] < ROUTER_MIN_SAMPLES:
+            return True
+        if h["p95_s"] > route["p95_s"] or h["error_rate"] > route["max_error_rate"]:
+            self._tripped[key] = time.monotonic()
+            telemetry.incr("model_route_trips", call=call, model=model)
+            print(f"⚠️  Routing {call} away from {model}: p95 {h['p95_s']}s, error rate {h['error_rate']}")
+            return False
+        return True
+
+    # ── decisions ──
+    def choose(self, call: str, prompt_tokens: int, max_tokens: int, exclude: tuple = ()) -> tuple[str, str] | None:
+        """Returns (model, reason) or None when every candidate is excluded."""
+        route = self.routes[call]
+        candidates = [m for m in route["models"] if m not in exclude]
+        if not candidates:
+            return None
+        budget = route.get("max_cost_usd") or math.inf
+        affordable = [m for m in candidates if usage.estimate_cost(m, prompt_tokens, max_tokens) <= budget]
+
+        with self._lock:
+            for model in affordable or candidates:
+                if self._healthy(call, model, route):
+                    if exclude:
+                        reason = "failover"
+                    elif model == route["models"][0]:
+                        reason = "primary"
+                    elif route["models"][0] not in affordable:
+                        reason = "cost"
+                    else:
+                        reason = "unhealthy"
+                    return model, reason
+            # Nothing healthy: least-bad recent latency
+            model = min(affordable or candidates, key=lambda m: self._health(call, m)["p95_s"])
+            return model, "all_unhealthy"
+
+    def _log(self, call: str, model: str, reason: str, prompt_tokens: int, max_tokens: int):
+        telemetry.incr("model_route", call=call, model=model, reason=reason)
+        self.decisions.append({
+            "ts": round(time.time(), 3),
+            "call": call,
+            "model": model,
+            "reason": reason,
+            "prompt_tokens": prompt_tokens,
+            "max_tokens": max_tokens,
+        })
+
+    def complete(self, gateway, call: str, messages: list[dict], max_tokens: int, **kwargs):
+        """Route one completion through `gateway`. Returns (response, model)."""
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        model, reason = self.choose(call, prompt_tokens, max_tokens)
+        self._log(call, model, reason, prompt_tokens, max_tokens)
+
+        def _run(name: str):
+            return gateway.complete(
+                messages, max_tokens,
+                model=gateway.qualified(name),
+                observer=lambda seconds, ok: self.observe(call, name, seconds, ok),
+                **kwargs,
+            )
+
+        try:
+            return _run(model), model
+        except Exception as e:
+            fallback = self.choose(call, prompt_tokens, max_tokens, exclude=(model,))
+            if fallback is None or not (_is_throttled(e) or _is_transient(e)):
+                raise
+            model = fallback[0]
+            self._log(call, model, "failover", prompt_tokens, max_tokens)
+            return _run(model), model
+
+    def state(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            routes = {
+                call: {
+                    **route,
+                    "health": {
+                        model: {
+                            **self._health(call, model),
+                            "cooldown_s": round(max(0.0, ROUTER_COOLDOWN_S - (now - self._tripped[(call, model)])), 1)
+                            if (call, model) in self._tripped else 0.0,
+                        }
+                        for model in route["models"]
+                    },
+                }
+                for call, route in self.routes.items()
+            }
+        return {"routes": routes, "recent": list(self.decisions)[-50:]}
@@ -0,0 +1,176 @@
+"""
+Generated plans with section-level provenance.
+
+Every stored plan keeps its sections and, per section, the knowledge entries
+that fed it: (collection, point ID, content hash). The `plan_entries` table is
+indexed by point ID, so after a knowledge base change the plans and sections
+that used a changed entry are found with one query, and only those sections
+are regenerated (see ayurvedic_rag.find_stale_sections / refresh_plan_sections
+and the ayurveda_refresh_plans function).
+
+    PLAN_DB_PATH=/data/plans.db      # "" disables storing plans
+
+Without PLAN_DB_PATH plans go to plans.db next to this file, or are not
+stored when that directory is read-only (e.g. on Vercel).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+_DEFAULT_DIR = Path(__file__).parent
+PLAN_DB_PATH = os.getenv(
+    "PLAN_DB_PATH", str(_DEFAULT_DIR / "plans.db") if os.access(_DEFAULT_DIR, os.W_OK) else "",
+)
+
+_db_lock = threading.Lock()
+_db: sqlite3.Connection | None = None
+
+
+def entry_hash(payload: dict) -> str:
+    """Content hash of a knowledge payload (ignores the "point_id" added on retrieval)."""
+    content = {k: v for k, v in payload.items() if k != "point_id"}
+    canonical = json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+# ──────────────────────────────────────────────
+#  Storage
+# ──────────────────────────────────────────────
+def _conn() -> sqlite3.Connection | None:
+    global _db
+    if not PLAN_DB_PATH:
+        return None
+    if _db is None:
+        _db = sqlite3.connect(PLAN_DB_PATH, check_same_thread=False)
+        _db.execute("PRAGMA journal_mode=WAL")
+        _db.execute("PRAGMA synchronous=NORMAL")
+        _db.execute(
+            """CREATE TABLE IF NOT EXISTS plans (
+                plan_id TEXT PRIMARY KEY, user_id TEXT, condition TEXT, mode TEXT,
+                revision INTEGER, created_at REAL, updated_at REAL, sections TEXT
+            )"""
+        )
+        _db.execute(
+            """CREATE TABLE IF NOT EXISTS plan_entries (
+                plan_id TEXT, section TEXT, collection TEXT, point_id TEXT, hash TEXT
+            )"""
+        )
+        _db.execute("CREATE INDEX IF NOT EXISTS idx_plans_user ON plans (user_id, condition)")
+        _db.execute("CREATE INDEX IF NOT EXISTS idx_plan_entries_point ON plan_entries (point_id)")
+        _db.execute("CREATE INDEX IF NOT EXISTS idx_plan_entries_plan ON plan_entries (plan_id, section)")
+        _db.commit()
+    return _db
+
+
+def _entry_rows(plan_id: str, provenance: dict[str, list[dict]]) -> list[tuple]:
+    return [
+        (plan_id, section, e["collection"], e["point_id"], e["hash"])
+        for section, entries in provenance.items()
+        for e in entries
+    ]
+
+
+def save_plan(user_id: str, condition: str, mode: str, sections: list[dict],
+              provenance: dict[str, list[dict]]) -> str | None:
+    """
+    Store a new plan. `provenance` is {section key: [{collection, point_id, hash}]}.
+    Returns the plan ID, or None when storage is disabled.
+    """
+    plan_id = uuid.uuid4().hex
+    now = time.time()
+    with _db_lock:
+        db = _conn()
+        if db is None:
+            return None
+        db.execute(
+            "INSERT INTO plans VALUES (?, ?, ?, ?, 1, ?, ?, ?)",
+            (plan_id, user_id, condition, mode, now, now, json.dumps(sections, ensure_ascii=False)),
+        )
+        db.executemany("INSERT INTO plan_entries VALUES (?, ?, ?, ?, ?)", _entry_rows(plan_id, provenance))
+        db.commit()
+    return plan_id
+
+
+def get_plan(plan_id: str) -> dict | None:
+    """{plan_id, user_id, condition, mode, revision, created_at, updated_at, sections, provenance} or None."""
+    with _db_lock:
+        db = _conn()
+        if db is None:
+            return None
+        row = db.execute(
+            "SELECT plan_id, user_id, condition, mode, revision, created_at, updated_at, sections "
+            "FROM plans WHERE plan_id = ?", (plan_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        entries = db.execute(
+            "SELECT section, collection, point_id, hash FROM plan_entries WHERE plan_id = ?", (plan_id,),
+        ).fetchall()
+    plan = dict(zip(("plan_id", "user_id", "condition", "mode", "revision", "created_at", "updated_at"), row[:7]))
+    plan["sections"] = json.loads(row[7])
+    plan["provenance"] = {}
+    for section, collection, point_id, hash_ in entries:
+        plan["provenance"].setdefault(section, []).append({"collection": collection, "point_id": point_id, "hash": hash_})
+    return plan
+
+
+def tracked_entries() -> list[tuple[str, str, str]]:
+    """Distinct (collection, point ID, hash) referenced by any stored plan."""
+    with _db_lock:
+        db = _conn()
+        if db is None:
+            return []
+        return db.execute("SELECT DISTINCT collection, point_id, hash FROM plan_entries").fetchall()
+
+
+def affected_sections(stale: set[tuple[str, str]]) -> dict[str, list[str]]:
+    """{plan_id: [section keys]} for sections built from any stale (point ID, hash) pair."""
+    if not stale:
+        return {}
+    affected: dict[str, set[str]] = {}
+    with _db_lock:
+        db = _conn()
+        if db is None:
+            return {}
+        point_ids = sorted({pid for pid, _ in stale})
+        for start in range(0, len(point_ids), 500):
+            chunk = point_ids[start:start + 500]
+            rows = db.execute(
+                f"SELECT plan_id, section, point_id, hash FROM plan_entries "
+                f"WHERE point_id IN ({','.join('?' * len(chunk))})", chunk,
+            ).fetchall()
+            for plan_id, section, point_id, hash_ in rows:
+                if (point_id, hash_) in stale:
+                    affected.setdefault(plan_id, set()).add(section)
+    return {plan_id: sorted(sections) for plan_id, sections in affected.items()}
+
+
+def update_sections(plan_id: str, sections: dict[str, str], provenance: dict[str, list[dict]]) -> int:
+    """Replace the content and provenance of some sections of a plan. Returns the new revision."""
+    with _db_lock:
+        db = _conn()
+        row = db.execute("SELECT sections, revision FROM plans WHERE plan_id = ?", (plan_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown plan: {plan_id}")
+        stored = json.loads(row[0])
+        for section in stored:
+            if section["key"] in sections:
+                section["content"] = sections[section["key"]]
+        revision = row[1] + 1
+        db.execute(
+            "UPDATE plans SET sections = ?, revision = ?, updated_at = ? WHERE plan_id = ?",
+            (json.dumps(stored, ensure_ascii=False), revision, time.time(), plan_id),
+        )
+        db.executemany(
+            "DELETE FROM plan_entries WHERE plan_id = ? AND section = ?",
+            [(plan_id, section) for section in provenance],
+        )
+        db.executemany("INSERT INTO plan_entries VALUES (?, ?, ?, ?, ?)", _entry_rows(plan_id, provenance))
+        db.commit()
+    return revision
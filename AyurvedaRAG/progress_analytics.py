@@ -0,0 +1,348 @@
+"""
+Local analytics over weekly progress logs.
+
+The free-text fields of a log (energy_level, digestion, sleep_quality,
+symptoms_improvement) are normalised to scores on a 0-1 scale (1 = best):
+"7/10", "80%", "7" (bare whole numbers are out of 10), "0.7", "very good",
+"not great", "slight improvement", ...
+
+A user's logs become a (weeks × fields) array, and a cohort's a
+(users × weeks × fields) array with NaN for missing values. Moving averages,
+week-over-week deltas and least-squares trends are computed along the week
+axis in one vectorised pass, so a whole cohort costs about as much as one user.
+
+`trend_change` decides whether the latest log moved the trend enough to be
+worth an LLM narrative; otherwise `describe` summarises the numbers locally.
+
+`trajectory_vector` condenses a user's weeks into one fixed-size vector for
+similar-trajectory search (see AyurvedicStorage.similar_trajectories).
+"""
+
+import math
+import os
+import re
+import warnings
+from functools import lru_cache
+
+import numpy as np
+
+FIELDS = ("energy_level", "digestion", "sleep_quality", "symptoms_improvement")
+
+TREND_CHANGE_THRESHOLD = float(os.getenv("TREND_CHANGE_THRESHOLD", "0.15"))   # score change that counts
+TREND_MIN_SLOPE = float(os.getenv("TREND_MIN_SLOPE", "0.02"))                 # per week; flatter is "steady"
+MOVING_AVERAGE_WEEKS = int(os.getenv("MOVING_AVERAGE_WEEKS", "3"))
+
+# Trajectory vectors: weeks 1..TRAJECTORY_WEEKS of scores (later weeks fold into
+# the last slot) plus a truncated, recency-weighted mean of the week embeddings.
+# TRAJECTORY_SCORE_WEIGHT is the share of the cosine similarity given to scores.
+TRAJECTORY_WEEKS = int(os.getenv("TRAJECTORY_WEEKS", "8"))
+TRAJECTORY_EMBED_DIM = int(os.getenv("TRAJECTORY_EMBED_DIM", "256"))
+TRAJECTORY_SCORE_WEIGHT = float(os.getenv("TRAJECTORY_SCORE_WEIGHT", "0.7"))
+
+# Phrase -> score; the longest matching phrase wins ("very poor" over "poor")
+QUALITY_LEXICON = {
+    "very poor": 0.0, "very bad": 0.0, "very low": 0.0, "terrible": 0.0, "awful": 0.0, "exhausted": 0.0,
+    "worse": 0.15, "worsened": 0.15, "worsening": 0.15,
+    "poor": 0.25, "bad": 0.25, "low": 0.25, "weak": 0.25, "tired": 0.25, "disturbed": 0.25,
+    "constipated": 0.25, "bloated": 0.3, "irregular": 0.3, "restless": 0.3,
+    "fair": 0.5, "average": 0.5, "moderate": 0.5, "normal": 0.5, "okay": 0.5, "ok": 0.5, "medium": 0.5,
+    "stable": 0.5, "same": 0.5, "no change": 0.5,
+    "good": 0.75, "better": 0.75, "high": 0.75, "improved": 0.75, "improving": 0.75, "regular": 0.75, "sound": 0.75,
+    "very good": 1.0, "excellent": 1.0, "great": 1.0, "very high": 1.0, "much better": 1.0, "energetic": 1.0,
+}
+IMPROVEMENT_LEXICON = {
+    **QUALITY_LEXICON,
+    "none": 0.1, "no change": 0.1, "no improvement": 0.1, "same": 0.1,
+    "slight": 0.35, "slightly": 0.35, "little": 0.35, "mild": 0.35, "a bit": 0.35,
+    "some": 0.55, "moderate": 0.55, "partial": 0.55,
+    "significant": 0.8, "much better": 0.8, "a lot": 0.8, "major": 0.8,
+    "complete": 1.0, "completely": 1.0, "resolved": 1.0, "fully": 1.0, "gone": 1.0,
+}
+LEXICONS = {"symptoms_improvement": IMPROVEMENT_LEXICON}
+
+_FRACTION_RE = re.compile(r"(\d+(?:\.\d+)?)\s*/\s*(\d+(?:\.\d+)?)")
+_PERCENT_RE = re.compile(r"(\d+(?:\.\d+)?)\s*%")
+_NUMBER_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*$")
+_PHRASE_RE = {
+    name: [(re.compile(rf"(\bnot\s+)?\b{re.escape(p)}\b"), s) for p, s in sorted(lex.items(), key=lambda kv: -len(kv[0]))]
+    for name, lex in (("quality", QUALITY_LEXICON), ("improvement", IMPROVEMENT_LEXICON))
+}
+
+
+def _scale(number: float) -> float:
+    """Bare numbers: whole numbers (and anything above 1) are out of 10, other values in [0, 1] are fractions."""
+    return min(1.0, max(0.0, number / 10.0 if number > 1 or float(number).is_integer() else number))
+
+
+def normalize(field: str, value) -> float:
+    """Score one field value on a 0-1 scale; NaN when it cannot be read."""
+    if value is not None and not isinstance(value, (int, float, str)):
+        value = str(value)      # lists, dicts, ... from event payloads are unhashable
+    return _normalize(field, value)
+
+
+@lru_cache(maxsize=4096)
+def _normalize(field: str, value) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(_scale(value))
+    text = str(value or "").strip().lower()
+    if not text:
+        return math.nan
+    if m := _FRACTION_RE.search(text):
+        top, bottom = float(m.group(1)), float(m.group(2))
+        return min(1.0, top / bottom) if bottom else math.nan
+    if m := _PERCENT_RE.search(text):
+        return min(1.0, float(m.group(1)) / 100.0)
+    if m := _NUMBER_RE.match(text):
+        return _scale(float(m.group(1)))
+    patterns = _PHRASE_RE["improvement" if field in LEXICONS else "quality"]
+    for pattern, score in patterns:
+        if m := pattern.search(text):
+            return 1.0 - score if m.group(1) else score
+    return math.nan
+
+
+# ──────────────────────────────────────────────
+#  Vectorised kernels (week axis = -2, field axis = -1)
+# ──────────────────────────────────────────────
+def _moving_average(scores: np.ndarray, window: int) -> np.ndarray:
+    """Trailing NaN-aware mean over up to `window` logged weeks."""
+    valid = ~np.isnan(scores)
+    sums = np.cumsum(np.where(valid, scores, 0.0), axis=-2)
+    counts = np.cumsum(valid, axis=-2)
+    if scores.shape[-2] > window:
+        sums[..., window:, :] -= sums[..., :-window, :].copy()
+        counts[..., window:, :] -= counts[..., :-window, :].copy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def _deltas(scores: np.ndarray) -> np.ndarray:
+    """Change since the previous logged week (NaN for the first)."""
+    out = np.full_like(scores, np.nan)
+    out[..., 1:, :] = np.diff(scores, axis=-2)
+    return out
+
+
+def _slopes(weeks: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """Least-squares score change per week for every series, ignoring NaN."""
+    mask = ~np.isnan(scores)
+    x = np.broadcast_to(weeks[..., :, None], scores.shape)
+    n = mask.sum(axis=-2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = np.where(mask, x, 0.0).sum(axis=-2) / n
+        y_mean = np.where(mask, scores, 0.0).sum(axis=-2) / n
+        dx = np.where(mask, x - x_mean[..., None, :], 0.0)
+        dy = np.where(mask, scores - y_mean[..., None, :], 0.0)
+        var = (dx * dx).sum(axis=-2)
+        slope = (dx * dy).sum(axis=-2) / var
+    return np.where((n >= 2) & (var > 0), slope, np.nan)
+
+
+def _with_overall(scores: np.ndarray) -> np.ndarray:
+    """Append the mean of the readable fields as a last "overall" column."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)     # all-NaN rows stay NaN
+        overall = np.nanmean(scores, axis=-1, keepdims=True)
+    return np.concatenate([scores, overall], axis=-1)
+
+
+def _clean(values) -> list:
+    return [None if math.isnan(v) else round(float(v), 4) for v in np.asarray(values, dtype=float).ravel()]
+
+
+COLUMNS = FIELDS + ("overall",)
+
+
+# ──────────────────────────────────────────────
+#  One user
+# ──────────────────────────────────────────────
+def score_logs(logs: list[dict]) -> tuple[np.ndarray, np.ndarray]:
+    """(weeks, scores[week, field]) with one row per logged week; the latest log of a week wins."""
+    by_week = {}
+    for log in sorted(logs, key=lambda l: (l.get("week") or 0, l.get("timestamp") or 0)):
+        by_week[int(log.get("week") or 0)] = log
+    weeks = np.array(sorted(by_week), dtype=float)
+    scores = np.array(
+        [[normalize(f, by_week[int(w)].get(f)) for f in FIELDS] for w in weeks], dtype=float,
+    ).reshape(len(weeks), len(FIELDS))
+    return weeks, scores
+
+
+def analyze(logs: list[dict], window: int = MOVING_AVERAGE_WEEKS) -> dict:
+    """Scores, moving averages, week-over-week deltas and trends for one user's logs."""
+    weeks, scores = score_logs(logs)
+    scores = _with_overall(scores)
+    if not len(weeks):
+        return {"weeks": [], "fields": list(COLUMNS), "scores": {}, "moving_average": {},
+                "week_over_week": {}, "trend": {}, "latest": {}}
+    moving, deltas, slopes = _moving_average(scores, window), _deltas(scores), _slopes(weeks, scores)
+    return {
+        "weeks": [int(w) for w in weeks],
+        "fields": list(COLUMNS),
+        "scores": {c: _clean(scores[:, i]) for i, c in enumerate(COLUMNS)},
+        "moving_average": {c: _clean(moving[:, i]) for i, c in enumerate(COLUMNS)},
+        "week_over_week": {c: _clean(deltas[:, i]) for i, c in enumerate(COLUMNS)},
+        "trend": dict(zip(COLUMNS, _clean(slopes))),
+        "latest": dict(zip(COLUMNS, _clean(scores[-1]))),
+    }
+
+
+def _direction(slope: float | None) -> str:
+    if slope is None or abs(slope) < TREND_MIN_SLOPE:
+        return "steady"
+    return "improving" if slope > 0 else "declining"
+
+
+def trend_change(previous: dict, current: dict, threshold: float = TREND_CHANGE_THRESHOLD) -> list[str]:
+    """
+    Reasons the latest log changed the picture enough for a new narrative
+    (empty when it did not): the first trend, a large week-over-week move, or
+    a field switching between improving / steady / declining. A move already
+    present in `previous` (same latest week, same delta) is not reported again,
+    so re-logging or backfilling a week after a jump stays quiet.
+    """
+    if len(current["weeks"]) < 2:
+        return []
+    if len(previous.get("weeks", [])) < 2:
+        return ["first trend"]
+    same_week = previous["weeks"][-1] == current["weeks"][-1]
+    reasons = []
+    for column in COLUMNS:
+        delta = current["week_over_week"][column][-1]
+        seen = previous["week_over_week"][column][-1] if same_week else None
+        if delta is not None and abs(delta) >= threshold and (seen is None or abs(delta - seen) >= threshold):
+            reasons.append(f"{column} {delta:+.2f} week over week")
+        before, after = _direction(previous["trend"].get(column)), _direction(current["trend"].get(column))
+        # Any change of the overall direction counts; for single fields only a reversal
+        if before != after and (column == "overall" or "steady" not in (before, after)):
+            reasons.append(f"{column} {before} -> {after}")
+    return reasons
+
+
+def describe(analysis: dict) -> str:
+    """Short local summary of an analysis (used when no LLM narrative is needed)."""
+    if not analysis["weeks"]:
+        return "No progress logs yet."
+    latest, trend = analysis["latest"], analysis["trend"]
+    week = analysis["weeks"][-1]
+    if latest["overall"] is None:
+        return f"Week {week}: no readable scores."
+    summary = f"Week {week}: overall score {latest['overall']:.2f}"
+    delta = analysis["week_over_week"]["overall"][-1]
+    if delta is not None:
+        summary += f" ({delta:+.2f} vs previous log)"
+    fields = []
+    for field in FIELDS:
+        if latest[field] is None:
+            continue
+        direction = _direction(trend[field])
+        slope = "" if direction == "steady" else f" ({trend[field]:+.2f}/week)"
+        fields.append(f"{field.replace('_', ' ')} {direction}{slope}")
+    return summary + "." + (f" {'; '.join(fields).capitalize()}." if fields else "")
+
+
+# ──────────────────────────────────────────────
+#  Trajectory vectors
+# ──────────────────────────────────────────────
+COLUMNS_COUNT = len(COLUMNS)
+TRAJECTORY_DIM = TRAJECTORY_WEEKS * COLUMNS_COUNT + COLUMNS_COUNT + TRAJECTORY_EMBED_DIM
+
+
+def _unit(block: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(block)
+    return block / norm if norm > 0 else block
+
+
+def trajectory_vector(logs: list[dict], vectors: list[list[float]] | None = None) -> list[float] | None:
+    """
+    One vector for a user's trajectory (cosine distance), or None when no log is readable.
+
+    Score block: the score grid over weeks 1..TRAJECTORY_WEEKS, carried forward
+    over gaps and centred on 0.5 so rising and falling paths point apart, plus
+    the per-week trends. Embedding block: the week vectors cut to
+    TRAJECTORY_EMBED_DIM (Matryoshka) and averaged with later weeks weighted up.
+    """
+    weeks, scores = score_logs(logs)
+    if not len(weeks):
+        return None
+    scores = _with_overall(scores)
+    slots = np.clip(weeks.astype(int), 1, TRAJECTORY_WEEKS) - 1
+
+    grid = np.full((TRAJECTORY_WEEKS, COLUMNS_COUNT), np.nan)
+    grid[slots] = scores                                   # weeks are sorted: later weeks win a shared slot
+    # Carry the last reading forward (index of the latest non-NaN row per column)
+    filled = np.where(~np.isnan(grid), np.arange(TRAJECTORY_WEEKS)[:, None], 0)
+    np.maximum.accumulate(filled, axis=0, out=filled)
+    grid = grid[filled, np.arange(COLUMNS_COUNT)]
+    grid = np.nan_to_num(grid - 0.5)
+    trend = np.nan_to_num(_slopes(weeks, scores)) * TRAJECTORY_WEEKS
+    score_block = _unit(np.concatenate([grid.ravel(), trend]))
+
+    embed_block = np.zeros(TRAJECTORY_EMBED_DIM)
+    if vectors:
+        by_week = {}
+        for log, vector in zip(logs, vectors):
+            if vector is not None and len(vector) >= TRAJECTORY_EMBED_DIM:
+                by_week[int(log.get("week") or 0)] = vector
+        if by_week:
+            ordered = np.array([by_week[w] for w in sorted(by_week)], dtype=float)[:, :TRAJECTORY_EMBED_DIM]
+            norms = np.linalg.norm(ordered, axis=1, keepdims=True)
+            ordered = np.divide(ordered, norms, out=np.zeros_like(ordered), where=norms > 0)
+            embed_block = _unit(np.arange(1, len(ordered) + 1) @ ordered)
+
+    if not score_block.any() and not embed_block.any():
+        return None
+    vector = np.concatenate([
+        score_block * math.sqrt(TRAJECTORY_SCORE_WEIGHT),
+        embed_block * math.sqrt(1.0 - TRAJECTORY_SCORE_WEIGHT),
+    ])
+    return _unit(vector).tolist()
+
+
+# ──────────────────────────────────────────────
+#  Cohort
+# ──────────────────────────────────────────────
+def cohort_analysis(logs: list[dict], window: int = MOVING_AVERAGE_WEEKS) -> dict:
+    """
+    Week-by-week cohort statistics for logs of many users (one condition):
+    mean and quartiles per week, and the share of users improving or declining.
+    """
+    users = sorted({log.get("user_id") for log in logs if log.get("user_id")})
+    if not users:
+        return {"users": 0, "logs": 0, "weeks": []}
+    weeks = sorted({int(log.get("week") or 0) for log in logs})
+    week_index = {w: i for i, w in enumerate(weeks)}
+    user_index = {u: i for i, u in enumerate(users)}
+
+    scores = np.full((len(users), len(weeks), len(FIELDS)), np.nan)
+    for log in sorted(logs, key=lambda l: l.get("timestamp") or 0):
+        if log.get("user_id") in user_index:
+            row = scores[user_index[log["user_id"]], week_index[int(log.get("week") or 0)]]
+            row[:] = [normalize(f, log.get(f)) for f in FIELDS]
+    scores = _with_overall(scores)
+
+    grid = np.array(weeks, dtype=float)
+    slopes = _slopes(np.broadcast_to(grid, (len(users), len(weeks))), scores)        # users × columns
+    moving = _moving_average(scores, window)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mean = np.nanmean(scores, axis=0)                                             # weeks × columns
+        quartiles = np.nanpercentile(scores[..., -1], [25, 50, 75], axis=0)           # 3 × weeks
+        moving_mean = np.nanmean(moving, axis=0)
+    trended = ~np.isnan(slopes)
+    with np.errstate(invalid="ignore"):
+        improving = (np.where(trended, slopes, 0.0) >= TREND_MIN_SLOPE).sum(axis=0) / trended.sum(axis=0)
+        declining = (np.where(trended, slopes, 0.0) <= -TREND_MIN_SLOPE).sum(axis=0) / trended.sum(axis=0)
+    return {
+        "users": len(users),
+        "logs": len(logs),
+        "weeks": weeks,
+        "fields": list(COLUMNS),
+        "mean": {c: _clean(mean[:, i]) for i, c in enumerate(COLUMNS)},
+        "moving_average": {c: _clean(moving_mean[:, i]) for i, c in enumerate(COLUMNS)},
+        "overall_quartiles": {q: _clean(quartiles[i]) for i, q in enumerate(("p25", "p50", "p75"))},
+        "users_with_trend": int(trended[:, -1].sum()),
+        "improving_share": dict(zip(COLUMNS, _clean(improving))),
+        "declining_share": dict(zip(COLUMNS, _clean(declining))),
+    }
@@ -0,0 +1,297 @@
+"""
+Embedding-dimension migration for the Qdrant collections.
+
+Every logical collection (`herbs`, `progress_logs`, …) is an alias onto a
+dimension-versioned physical collection (`herbs__d1536`). A migration:
+
+  1. builds `<name>__d<dim>` next to the live collection, either truncating and
+     re-normalising the stored vectors or re-embedding the stored text
+  2. switches every alias in a single `update_collection_aliases` request and
+     bumps the KB version so workers drop cached results and dimensions
+  3. copies progress logs written while the copy was running
+
+Per-tenant `progress_logs_<tenant>` collections (PROGRESS_TENANCY=collection)
+are migrated together with `progress_logs`.
+
+The old collections keep serving until the switch and are kept afterwards
+(for rollback) unless `drop_old` is set. Collections created before aliases
+were introduced have to be dropped right before their alias is created, so
+they need `allow_legacy_drop` and see a brief gap during the switch.
+
+`recall_report` measures what a smaller dimension costs on our KB: recall@k
+against full-size vectors, vector memory and brute-force search latency.
+
+`rebuild_trajectories` backfills the similar-trajectory index
+(progress_trajectories) from the stored progress logs, e.g. for users whose
+logs predate it or after the trajectory settings change.
+
+Usage:
+    python reindex.py report --dims 256 512 1024
+    python reindex.py migrate --dim 512 --method truncate
+    python reindex.py trajectories [--tenants clinic_a clinic_b]
+"""
+
+import time
+
+from qdrant_client.models import (
+    CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation,
+    FieldCondition, Filter, PointStruct, Range,
+)
+
+import data_loader
+from vector_db import (
+    AYURVEDIC_COLLECTIONS, NATIVE_EMBED_DIM, PROGRESS_TENANCY,
+    AyurvedicStorage, fit_vector, physical_name, resolve_collection,
+)
+
+METHODS = ("truncate", "reembed")
+
+
+def _logical(name: str) -> str:
+    """Collection whose profile `name` uses (tenant collections share progress_logs')."""
+    return "progress_logs" if name.startswith("progress_logs_") else name
+
+
+def _is_progress(name: str) -> bool:
+    return _logical(name) == "progress_logs"
+
+
+# ──────────────────────────────────────────────
+#  Copying
+# ──────────────────────────────────────────────
+def _copy(
+    store: AyurvedicStorage,
+    name: str,
+    src: str,
+    dst: str,
+    dim: int,
+    method: str,
+    batch_size: int,
+    since: int | None = None,
+) -> int:
+    """Copy points from `src` to `dst` at `dim`, optionally only those logged at or after `since`."""
+    client = store.client
+    scroll_filter = None
+    if since is not None:
+        scroll_filter = Filter(must=[FieldCondition(key="timestamp", range=Range(gte=since))])
+
+    copied, offset = 0, None
+    while True:
+        points, offset = client.scroll(
+            collection_name=src,
+            scroll_filter=scroll_filter,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        if not points:
+            break
+        # Progress logs do not store the text they were embedded from
+        if method == "reembed" and not _is_progress(name):
+            vectors = data_loader.embed_texts([p.payload.get("text", "") for p in points], dimensions=dim)
+            if len(vectors) != len(points):
+                raise RuntimeError(f"Embedding failed while re-indexing {src}")
+        else:
+            vectors = [fit_vector(p.vector, dim) for p in points]
+        client.upsert(
+            collection_name=dst,
+            points=[PointStruct(id=p.id, vector=v, payload=p.payload) for p, v in zip(points, vectors)],
+        )
+        copied += len(points)
+        if offset is None:
+            break
+    return copied
+
+
+# ──────────────────────────────────────────────
+#  Migration
+# ──────────────────────────────────────────────
+def migrate(
+    dim: int,
+    method: str = "truncate",
+    collections: list[str] | None = None,
+    batch_size: int = 256,
+    allow_legacy_drop: bool = False,
+    drop_old: bool = False,
+    store: AyurvedicStorage | None = None,
+) -> dict:
+    """Re-index `collections` (default: all) at `dim` and switch their aliases atomically."""
+    if method not in METHODS:
+        raise ValueError(f"Unknown method: {method}")
+    store = store or AyurvedicStorage()
+    client = store.client
+    names = list(collections or AYURVEDIC_COLLECTIONS)
+    if "progress_logs" in names:
+        # Tenant collections would otherwise stay at the old size and reject new logs
+        names += [n for n in store.tenant_collections() if n not in names]
+    skipped = {}
+    if PROGRESS_TENANCY == "shard" and "progress_logs" in names:
+        names.remove("progress_logs")
+        skipped["progress_logs"] = "custom-sharded collections must be re-created with their shard keys"
+
+    plan = {}
+    for name in names:
+        src = resolve_collection(client, name)
+        dst = physical_name(name, dim)
+        if src is None:
+            skipped[name] = "missing"
+            continue
+        if src == dst:
+            skipped[name] = f"already at {dim} dimensions"
+            continue
+        src_dim = client.get_collection(src).config.params.vectors.size
+        if dim > src_dim and (method == "truncate" or _is_progress(name)):
+            raise ValueError(f"Cannot truncate {src} ({src_dim}-d) up to {dim} dimensions")
+        legacy = src == name
+        if legacy and not allow_legacy_drop:
+            raise RuntimeError(
+                f"{name} predates aliases; re-run with allow_legacy_drop to replace it "
+                "(it is dropped right before its alias is created)"
+            )
+        plan[name] = (src, dst, legacy)
+
+    started = int(time.time())
+    report = {}
+    for name, (src, dst, legacy) in plan.items():
+        if client.collection_exists(dst):
+            client.delete_collection(dst)   # leftover from an aborted run
+        store.create_physical_collection(_logical(name), dst, dim)
+        t0 = time.perf_counter()
+        copied = _copy(store, name, src, dst, dim, method, batch_size)
+        report[name] = {"from": src, "to": dst, "points": copied, "seconds": round(time.perf_counter() - t0, 2)}
+        print(f"📦 {src} → {dst}: {copied} points")
+
+    # Legacy collections cannot be kept alive under their alias name; catch up first
+    for name, (src, dst, legacy) in plan.items():
+        if legacy and _is_progress(name):
+            report[name]["caught_up"] = _copy(store, name, src, dst, dim, "truncate", batch_size, since=started)
+
+    ops = []
+    for name, (src, dst, legacy) in plan.items():
+        if legacy:
+            client.delete_collection(src)
+        else:
+            ops.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=name)))
+        ops.append(CreateAliasOperation(create_alias=CreateAlias(collection_name=dst, alias_name=name)))
+    if ops:
+        client.update_collection_aliases(change_aliases_operations=ops)
+    version = store.bump_kb_version() if plan else store.kb_version()
+    print(f"🔀 Switched {len(plan)} aliases to {dim} dimensions")
+
+    for name, (src, dst, legacy) in plan.items():
+        if _is_progress(name) and not legacy:
+            report[name]["caught_up"] = _copy(store, name, src, dst, dim, "truncate", batch_size, since=started)
+        if drop_old and not legacy:
+            client.delete_collection(src)
+            report[name]["dropped"] = src
+
+    return {"dim": dim, "method": method, "kb_version": version, "collections": report, "skipped": skipped}
+
+
+# ──────────────────────────────────────────────
+#  Trajectory backfill
+# ──────────────────────────────────────────────
+def rebuild_trajectories(tenants: list[str] | None = None, store: AyurvedicStorage | None = None) -> dict:
+    """Rebuild the trajectory points of `tenants` (default: every tenant with logs). Returns {tenant: points}."""
+    store = store or AyurvedicStorage()
+    report = {}
+    for tenant in tenants or store.progress_tenants():
+        report[tenant] = store.rebuild_trajectories(tenant_id=tenant)
+        print(f"🧭 {tenant}: {report[tenant]} trajectories")
+    return report
+
+
+# ──────────────────────────────────────────────
+#  Recall / memory / latency report
+# ──────────────────────────────────────────────
+def recall_report(dims: list[int], k: int = 5, reembed: bool = False) -> dict:
+    """
+    Compare shortened embeddings with full-size ones on the knowledge base.
+    Queries are the per-condition retrieval queries plus the opening of every KB entry.
+    """
+    import numpy as np
+
+    from ayurvedic_kb import ALL_KNOWLEDGE, SUPPORTED_CONDITIONS
+    from ayurvedic_rag import _query_text
+
+    corpus = [e["text"] for entries in ALL_KNOWLEDGE.values() for e in entries]
+    queries = [_query_text(c) for c in SUPPORTED_CONDITIONS] + [t.split(".")[0] for t in corpus]
+
+    full_docs = np.asarray(data_loader.embed_texts(corpus, dimensions=NATIVE_EMBED_DIM), dtype=np.float32)
+    full_queries = np.asarray(data_loader.embed_texts(queries, dimensions=NATIVE_EMBED_DIM), dtype=np.float32)
+    if len(full_docs) != len(corpus) or len(full_queries) != len(queries):
+        raise RuntimeError("Embedding failed while building the recall report")
+    k = min(k, len(corpus))
+    truth = np.argsort(-(full_queries @ full_docs.T), axis=1)[:, :k]
+
+    rows = []
+    for dim in sorted(set(dims) | {NATIVE_EMBED_DIM}):
+        if reembed and dim != NATIVE_EMBED_DIM:
+            docs = np.asarray(data_loader.embed_texts(corpus, dimensions=dim), dtype=np.float32)
+            qs = np.asarray(data_loader.embed_texts(queries, dimensions=dim), dtype=np.float32)
+        else:
+            docs = full_docs[:, :dim] / np.linalg.norm(full_docs[:, :dim], axis=1, keepdims=True).clip(1e-12)
+            qs = full_queries[:, :dim] / np.linalg.norm(full_queries[:, :dim], axis=1, keepdims=True).clip(1e-12)
+
+        timings = []
+        for q in qs:
+            t0 = time.perf_counter()
+            np.argpartition(-(docs @ q), k - 1)[:k]
+            timings.append((time.perf_counter() - t0) * 1000.0)
+        top = np.argsort(-(qs @ docs.T), axis=1)[:, :k]
+        recall = float(np.mean([len(set(a) & set(b)) / k for a, b in zip(top, truth)]))
+        timings.sort()
+        rows.append({
+            "dim": dim,
+            f"recall@{k}": round(recall, 4),
+            "vector_bytes": dim * 4,
+            "mb_per_million_points": round(dim * 4 * 1_000_000 / 2**20, 1),
+            "search_p50_ms": round(timings[len(timings) // 2], 4),
+        })
+    return {"k": k, "documents": len(corpus), "queries": len(queries), "method": "reembed" if reembed else "truncate", "rows": rows}
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Re-index the Qdrant collections at a different embedding dimension")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_migrate = sub.add_parser("migrate", help="build new collections and switch aliases")
+    p_migrate.add_argument("--dim", type=int, required=True)
+    p_migrate.add_argument("--method", choices=METHODS, default="truncate")
+    p_migrate.add_argument("--collections", nargs="*")
+    p_migrate.add_argument("--batch-size", type=int, default=256)
+    p_migrate.add_argument("--allow-legacy-drop", action="store_true")
+    p_migrate.add_argument("--drop-old", action="store_true")
+
+    p_report = sub.add_parser("report", help="recall / memory / latency by dimension")
+    p_report.add_argument("--dims", type=int, nargs="+", default=[256, 512, 1024])
+    p_report.add_argument("--k", type=int, default=5)
+    p_report.add_argument("--reembed", action="store_true", help="embed at each dimension instead of truncating")
+
+    p_traj = sub.add_parser("trajectories", help="backfill similar-trajectory points from progress logs")
+    p_traj.add_argument("--tenants", nargs="*", help="tenant IDs (default: every tenant with logs)")
+
+    args = parser.parse_args()
+    if args.command == "trajectories":
+        result = rebuild_trajectories(args.tenants)
+        print(json.dumps(result, indent=2))
+    elif args.command == "migrate":
+        result = migrate(
+            args.dim,
+            method=args.method,
+            collections=args.collections,
+            batch_size=args.batch_size,
+            allow_legacy_drop=args.allow_legacy_drop,
+            drop_old=args.drop_old,
+        )
+        print(json.dumps(result, indent=2))
+    else:
+        result = recall_report(args.dims, k=args.k, reembed=args.reembed)
+        recall_key = f"recall@{result['k']}"
+        print(f"{'dim':>6}{recall_key:>12}{'MB / 1M pts':>14}{'p50 ms':>10}")
+        for row in result["rows"]:
+            print(f"{row['dim']:>6}{row[recall_key]:>12.3f}{row['mb_per_million_points']:>14.1f}{row['search_p50_ms']:>10.4f}")
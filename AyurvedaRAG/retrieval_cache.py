@@ -0,0 +1,115 @@
+"""
+Process-wide cache for knowledge-collection searches.
+
+The knowledge collections only change when they are seeded or a document is
+ingested, so identical searches (collection, filter, query vector, limit)
+return identical payloads in between. Single payloads are also kept by point
+ID, so compact step references (see ayurvedic_rag.compact_retrieved) can be
+rehydrated without a round trip. Every entry is keyed by the KB version
+stored in Qdrant; writers bump that version, and workers re-read it at most
+every KB_VERSION_TTL_S seconds, so stale entries simply stop matching and age
+out of the LRU.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable
+
+import telemetry
+
+RETRIEVAL_CACHE_MB = float(os.getenv("RETRIEVAL_CACHE_MB", "32"))   # 0 disables the cache
+KB_VERSION_TTL_S = float(os.getenv("KB_VERSION_TTL_S", "5"))
+
+
+class RetrievalCache:
+    """LRU of search results bounded by the approximate size of the cached payloads."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: OrderedDict[tuple, tuple[list[dict], int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, kind: str = "search") -> list[dict] | None:
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is not None:
+                self._entries.move_to_end(key)
+        telemetry.incr("retrieval_cache", result="hit" if hit is not None else "miss", kind=kind)
+        # Copies keep callers from mutating the cached payloads
+        return [dict(p) for p in hit[0]] if hit is not None else None
+
+    def put(self, key: tuple, payloads: list[dict]):
+        size = len(json.dumps(payloads, default=str)) + 256
+        if size > self.max_bytes:
+            return
+        evicted = 0
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = ([dict(p) for p in payloads], size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, dropped) = self._entries.popitem(last=False)
+                self.bytes -= dropped
+                evicted += 1
+        if evicted:
+            telemetry.incr("retrieval_cache_evictions", evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.bytes, "max_bytes": self.max_bytes}
+
+
+CACHE = RetrievalCache(int(RETRIEVAL_CACHE_MB * 1024 * 1024))
+
+
+def enabled() -> bool:
+    return CACHE.max_bytes > 0
+
+
+def make_key(version: int, collection: str, filter_key: str, query_vector: list[float], limit: int) -> tuple:
+    digest = hashlib.blake2b(array("f", query_vector).tobytes(), digest_size=16).hexdigest()
+    return (version, collection, filter_key, digest, limit)
+
+
+def point_key(version: int, collection: str, point_id: str) -> tuple:
+    return (version, collection, "point", point_id)
+
+
+# ──────────────────────────────────────────────
+#  KB version
+# ──────────────────────────────────────────────
+_version_lock = threading.Lock()
+_version = {"value": None, "checked": 0.0}
+
+
+def current_version(fetch: Callable[[], int], max_age_s: float = KB_VERSION_TTL_S) -> int:
+    """KB version, re-read through `fetch` when the local copy is older than `max_age_s`."""
+    now = time.monotonic()
+    with _version_lock:
+        if _version["value"] is not None and now - _version["checked"] < max_age_s:
+            return _version["value"]
+    value = fetch()
+    with _version_lock:
+        if value != _version["value"]:
+            telemetry.incr("kb_version_changes")
+        _version.update(value=value, checked=now)
+    return value
+
+
+def set_version(value: int):
+    """Adopt a version this process just wrote, without waiting for the TTL."""
+    with _version_lock:
+        _version.update(value=value, checked=time.monotonic())
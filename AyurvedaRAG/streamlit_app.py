@@ -14,6 +14,10 @@ from pathlib import Path
 
 load_dotenv(override=True)
 
+# Clinic this deployment serves; progress logs are partitioned per tenant
+TENANT_ID = os.getenv("TENANT_ID", "default")
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+
 # ──────────────────────────────────────────────
 #  Persistence Helpers
 # ──────────────────────────────────────────────
@@ -129,23 +133,111 @@ def trigger_ayurveda_plan(condition: str, user_id: str) -> str:
         "user_id": user_id,
     }))
 
+def trigger_prefetch(user_id: str, conditions: list[str], reason: str = "selection"):
+    """Speculatively warm retrieval for `conditions`; failures only cost the speed-up."""
+    if not conditions:
+        return
+    try:
+        asyncio.run(_send_event("ayurveda/prefetch-retrieval", {
+            "user_id": user_id,
+            "conditions": conditions,
+            "reason": reason,
+        }))
+    except Exception:
+        pass
+
 def trigger_seed_kb(force: bool = False) -> str:
     return asyncio.run(_send_event("ayurveda/seed-kb", {"force": force}))
 
 def trigger_log_progress(user_id: str, condition: str, week: int, progress: dict) -> str:
     return asyncio.run(_send_event("ayurveda/log-progress", {
+        "tenant_id": TENANT_ID,
         "user_id": user_id,
         "condition": condition,
         "week": week,
         **progress,
     }))
 
+def sync_stored_plans(user_id: str):
+    """Pull plans whose sections were regenerated server-side after a KB update (see /plans)."""
+    changed = False
+    for condition, ref in st.session_state.get("plan_ids", {}).items():
+        try:
+            resp = requests.get(f"{API_BASE_URL}/plans/{ref['plan_id']}", timeout=5)
+            resp.raise_for_status()
+            stored = resp.json()
+        except Exception:
+            continue
+        if stored.get("revision", 0) <= ref.get("revision", 1):
+            continue
+        st.session_state["plan_history"][condition] = stored["plan"]
+        st.session_state.setdefault("plan_sections", {})[condition] = stored["sections"]
+        ref["revision"] = stored["revision"]
+        if st.session_state.get("current_condition") == condition:
+            st.session_state["current_plan"] = stored["plan"]
+        changed = True
+    if changed:
+        save_user_session(user_id, {
+            "plan_history": st.session_state["plan_history"],
+            "plan_sections": st.session_state["plan_sections"],
+            "plan_ids": st.session_state["plan_ids"],
+            "current_plan": st.session_state.get("current_plan", ""),
+            "current_condition": st.session_state.get("current_condition", ""),
+        })
+
+def fetch_progress_analytics(user_id: str, condition: str) -> dict:
+    """Computed progress scores and trends from the API (no LLM call); {} when unavailable."""
+    try:
+        resp = requests.get(
+            f"{API_BASE_URL}/progress/analytics",
+            params={"user_id": user_id, "condition": condition, "tenant_id": TENANT_ID},
+            timeout=5,
+        )
+        resp.raise_for_status()
+        return resp.json()
+    except Exception:
+        return {}
+
+PROGRESS_FIELDS = {
+    "energy_level": "⚡ Energy",
+    "digestion": "🍽️ Digestion",
+    "sleep_quality": "🌙 Sleep",
+    "symptoms_improvement": "🌱 Symptoms",
+    "overall": "⭐ Overall",
+}
+
+def render_progress_charts(analytics: dict):
+    """Latest scores with week-over-week deltas, then score and moving-average charts."""
+    weeks = analytics.get("weeks") or []
+    if not weeks:
+        st.info("No progress logged yet for this condition — add your first weekly check-in below.")
+        return
+    latest, deltas = analytics.get("latest", {}), analytics.get("week_over_week", {})
+    for col, (field, label) in zip(st.columns(len(PROGRESS_FIELDS)), PROGRESS_FIELDS.items()):
+        value = latest.get(field)
+        delta = (deltas.get(field) or [None])[-1]
+        col.metric(label, "—" if value is None else f"{value * 10:.1f}/10",
+                   None if delta is None else f"{delta * 10:+.1f}")
+    if len(weeks) < 2:
+        return
+    scores = {"week": weeks, **{PROGRESS_FIELDS[f]: v for f, v in analytics["scores"].items() if f != "overall"}}
+    st.line_chart(scores, x="week", y=[PROGRESS_FIELDS[f] for f in PROGRESS_FIELDS if f != "overall"])
+    moving = analytics.get("moving_average", {})
+    st.line_chart(
+        {"week": weeks, "Overall": analytics["scores"]["overall"], "Moving average": moving.get("overall")},
+        x="week", y=["Overall", "Moving average"],
+    )
+
 
 # ──────────────────────────────────────────────
 #  PDF Export Helper (fpdf2)
 # ──────────────────────────────────────────────
-def st_pdf_download(condition: str, plan_text: str):
-    """Generates a premium server-side PDF for better reliability and encoding."""
+def st_pdf_download(condition: str, plan_text: str, sections: list[dict] | None = None):
+    """
+    Generates a premium server-side PDF for better reliability and encoding.
+    With `sections` (from the plan API) headings come from the structure
+    instead of being detected in the markdown.
+    """
     from fpdf import FPDF
     import io
     import re
@@ -205,16 +297,26 @@ def st_pdf_download(condition: str, plan_text: str):
     pdf.set_text_color(40, 40, 40)
     pdf.set_font("helvetica", size=11)
     
-    lines = plan_text.split('\n')
-    for line in lines:
-        val = line.strip()
+    # (is_heading, text) blocks
+    blocks = []
+    if sections:
+        for i, section in enumerate(sections, start=1):
+            blocks.append((True, f"{i}. {section['title']}"))
+            blocks.extend((False, line.strip()) for line in section["content"].split('\n'))
+    else:
+        for line in plan_text.split('\n'):
+            val = line.strip()
+            # Detect Headers (Markdown style)
+            is_heading = val.startswith('#') or (val.startswith('**') and val.endswith('**') and len(val) < 64)
+            blocks.append((is_heading, val.replace('#', '').replace('*', '').strip() if is_heading else val))
+
+    for is_heading, val in blocks:
         if not val:
             pdf.ln(5)
             continue
-            
-        # Detect Headers (Markdown style)
-        if val.startswith('#') or (val.startswith('**') and val.endswith('**') and len(val) < 64):
-            h_txt = clean_for_pdf(val.replace('#', '').replace('*', '').strip())
+
+        if is_heading:
+            h_txt = clean_for_pdf(val)
             pdf.ln(4)
             pdf.set_font("helvetica", 'B', 13)
             pdf.set_text_color(27, 67, 50)
@@ -319,6 +421,11 @@ def tab_ayurveda():
             st.session_state["user_id"] = st.query_params.get("uid", str(_uuid.uuid4())[:8])
         user_id = st.session_state["user_id"]
 
+        # Start retrieval as soon as the condition is chosen (or a custom one is entered)
+        if final_condition != "Custom Condition" and st.session_state.get("prefetched_condition") != final_condition:
+            st.session_state["prefetched_condition"] = final_condition
+            trigger_prefetch(user_id, [final_condition])
+
         st.markdown('<div style="height:12px"></div>', unsafe_allow_html=True)
 
         if condition_key in DOSHA_INFO:
@@ -359,6 +466,8 @@ def tab_ayurveda():
             # Update persisted disk state to reflect no 'current' plan while keeping history
             save_user_session(user_id, {
                 "plan_history": st.session_state.get("plan_history", {}),
+                "plan_sections": st.session_state.get("plan_sections", {}),
+                "plan_ids": st.session_state.get("plan_ids", {}),
                 "current_plan": "",
                 "current_condition": ""
             })
@@ -387,6 +496,11 @@ def tab_ayurveda():
                             if "plan_history" not in st.session_state:
                                 st.session_state["plan_history"] = {}
                             st.session_state["plan_history"][final_condition] = plan
+                            st.session_state.setdefault("plan_sections", {})[final_condition] = output.get("sections") or []
+                            if output.get("plan_id"):
+                                st.session_state.setdefault("plan_ids", {})[final_condition] = {
+                                    "plan_id": output["plan_id"], "revision": 1,
+                                }
                             
                             st.session_state["current_plan"] = plan
                             st.session_state["current_condition"] = final_condition
@@ -394,6 +508,8 @@ def tab_ayurveda():
                             # --- PERSIST TO DISK ---
                             save_user_session(user_id, {
                                 "plan_history": st.session_state["plan_history"],
+                                "plan_sections": st.session_state["plan_sections"],
+                                "plan_ids": st.session_state.get("plan_ids", {}),
                                 "current_plan": plan,
                                 "current_condition": final_condition
                             })
@@ -415,20 +531,24 @@ def tab_ayurveda():
             </div>
             """, unsafe_allow_html=True)
 
-            # Quick display of plan sections
-            sections = []
-            current_section = []
-            current_title = "Overview"
-            for line in plan.split("\n"):
-                if line.startswith("##") or (line.startswith("**") and line.strip().endswith("**") and any(f"{i}." in line for i in range(1, 9))):
-                    if current_section:
-                        sections.append((current_title, "\n".join(current_section)))
-                    current_title = line.lstrip("#").strip().lstrip("*").rstrip("*").strip()
-                    current_section = []
-                else:
-                    current_section.append(line)
-            if current_section:
-                sections.append((current_title, "\n".join(current_section)))
+            # Quick display of plan sections (structured when the API returned them)
+            plan_sections = st.session_state.get("plan_sections", {}).get(cond)
+            if plan_sections:
+                sections = [(s["title"], s["content"]) for s in plan_sections]
+            else:
+                sections = []
+                current_section = []
+                current_title = "Overview"
+                for line in plan.split("\n"):
+                    if line.startswith("##") or (line.startswith("**") and line.strip().endswith("**") and any(f"{i}." in line for i in range(1, 9))):
+                        if current_section:
+                            sections.append((current_title, "\n".join(current_section)))
+                        current_title = line.lstrip("#").strip().lstrip("*").rstrip("*").strip()
+                        current_section = []
+                    else:
+                        current_section.append(line)
+                if current_section:
+                    sections.append((current_title, "\n".join(current_section)))
 
             for title, content in sections:
                 with st.expander(f"📌 {title}", expanded=True):
@@ -439,7 +559,7 @@ def tab_ayurveda():
             with dl1:
                 st.download_button("📄 Download Text", plan.encode("utf-8"), f"plan_{cond.lower()}.txt", use_container_width=True)
             with dl2:
-                st_pdf_download(cond, plan)
+                st_pdf_download(cond, plan, plan_sections)
 
     with col_side:
         st.markdown("""
@@ -509,10 +629,49 @@ def tab_progress():
                     st.session_state["active_tab"] = "ayurveda"
                     st.rerun()
             with btn_col2:
-                st_pdf_download(condition, plan)
+                st_pdf_download(condition, plan, st.session_state.get("plan_sections", {}).get(condition))
             
             st.markdown('<div style="height:12px"></div>', unsafe_allow_html=True)
 
+    # ── Weekly progress ──
+    st.markdown("### 📈 Weekly Progress")
+    user_id = st.session_state.get("user_id", "anonymous")
+    condition = st.selectbox("Condition", list(history), key="progress_condition")
+    cache = st.session_state.setdefault("progress_analytics", {})
+    if condition not in cache:
+        cache[condition] = fetch_progress_analytics(user_id, condition)
+    analytics = cache[condition]
+    render_progress_charts(analytics)
+    if analytics.get("summary"):
+        st.caption(analytics["summary"])
+
+    with st.expander("📝 Log this week's progress"):
+        with st.form(key=f"progress_form_{condition}"):
+            week = st.number_input("Week", min_value=1, value=(analytics.get("weeks") or [0])[-1] + 1, step=1)
+            f1, f2 = st.columns(2)
+            energy = f1.select_slider("Energy level", ["Very low", "Low", "Normal", "Good", "Very good"], value="Normal")
+            digestion = f2.select_slider("Digestion", ["Very poor", "Poor", "Normal", "Good", "Excellent"], value="Normal")
+            sleep = f1.select_slider("Sleep quality", ["Very poor", "Poor", "Fair", "Good", "Excellent"], value="Fair")
+            symptoms = f2.select_slider("Symptoms", ["Worse", "No change", "Slight improvement", "Significant improvement", "Resolved"], value="No change")
+            notes = st.text_area("Notes", height=80)
+            submitted = st.form_submit_button("Save check-in", use_container_width=True)
+        if submitted:
+            with st.spinner("Saving your check-in..."):
+                try:
+                    event_id = trigger_log_progress(user_id, condition, int(week), {
+                        "energy_level": energy, "digestion": digestion, "sleep_quality": sleep,
+                        "symptoms_improvement": symptoms, "notes": notes,
+                    })
+                    output = wait_for_run_output(event_id, timeout_s=90)
+                    cache.pop(condition, None)
+                    st.session_state.setdefault("progress_reports", {})[condition] = output.get("report", "")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Could not save progress: {e}")
+    report = st.session_state.get("progress_reports", {}).get(condition)
+    if report:
+        st.markdown(report)
+
 
 # ══════════════════════════════════════════════
 #  Main Layout
@@ -528,14 +687,21 @@ def main():
             data = load_user_session(user_id)
             if data:
                 st.session_state["plan_history"] = data.get("plan_history", {})
+                st.session_state["plan_sections"] = data.get("plan_sections", {})
+                st.session_state["plan_ids"] = data.get("plan_ids", {})
                 st.session_state["current_plan"] = data.get("current_plan", "")
                 st.session_state["current_condition"] = data.get("current_condition", "")
+                sync_stored_plans(user_id)
+                # Warm retrieval for conditions the user has generated plans for before
+                trigger_prefetch(user_id, list(st.session_state["plan_history"]), reason="history")
     else:
         # New session
         user_id = str(_uuid.uuid4())[:8]
         st.query_params["uid"] = user_id
         st.session_state["user_id"] = user_id
         st.session_state["plan_history"] = {}
+        st.session_state["plan_sections"] = {}
+        st.session_state["plan_ids"] = {}
 
     st.markdown("""
     <div class="top-nav"><div class="nav-brand">🌿 AyurvedaRAG</div></div>
@@ -0,0 +1,182 @@
+"""
+Lightweight tracing and metrics for the Ayurvedic RAG pipeline.
+
+  • span(name, **labels)  — times a stage, feeds a latency histogram and, when a
+                            trace is active, appends a summary to that trace
+  • trace()               — collects the spans of one unit of work (an Inngest step)
+  • incr(name)            — monotonically increasing counters (cache hits, retries…)
+  • render_prometheus()   — text exposition used by the /metrics endpoint
+
+Recording is a couple of perf_counter calls, a bisect and a locked increment;
+all formatting is deferred until metrics are actually read.
+"""
+
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_lock = threading.Lock()
+_histograms: dict[tuple, list] = {}   # (name, labels) -> [bucket counts…, +Inf], sum, count
+_counters: dict[tuple, float] = {}    # (name, labels) -> value
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("ayurveda_trace", default=None)
+
+
+# ──────────────────────────────────────────────
+#  Recording
+# ──────────────────────────────────────────────
+def observe(name: str, seconds: float, labels: tuple = ()):
+    """Add one latency sample to the histogram for (name, labels)."""
+    key = (name, labels)
+    idx = bisect_left(BUCKETS, seconds)
+    with _lock:
+        entry = _histograms.get(key)
+        if entry is None:
+            entry = _histograms[key] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+        entry[0][idx] += 1
+        entry[1] += seconds
+        entry[2] += 1
+
+
+def incr(name: str, value: float = 1, **labels):
+    """Increment a counter."""
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+class Span:
+    __slots__ = ("name", "labels", "attrs", "start", "duration")
+
+    def __init__(self, name: str, labels: dict):
+        self.name = name
+        self.labels = labels
+        self.attrs = {}
+        self.start = 0.0
+        self.duration = 0.0
+
+    def set(self, **attrs):
+        """Attach attributes (e.g. result counts) to the trace summary only."""
+        self.attrs.update(attrs)
+
+    def summary(self) -> dict:
+        return {"name": self.name, "ms": round(self.duration * 1000.0, 3), **self.labels, **self.attrs}
+
+
+@contextmanager
+def span(name: str, **labels):
+    """
+    Time a pipeline stage.
+
+    Labels are low-cardinality (e.g. collection) and split the histogram;
+    use `Span.set` for per-call attributes such as result counts.
+    """
+    s = Span(name, labels)
+    s.start = time.perf_counter()
+    try:
+        yield s
+    except Exception:
+        s.attrs["error"] = True
+        incr("errors", stage=name)
+        raise
+    finally:
+        s.duration = time.perf_counter() - s.start
+        observe(name, s.duration, tuple(sorted(labels.items())))
+        collected = _current_trace.get()
+        if collected is not None:
+            collected.append(s)
+
+
+def record(name: str, seconds: float, **labels):
+    """Record a stage measured elsewhere (e.g. queue time derived from a timestamp)."""
+    s = Span(name, labels)
+    s.start = time.perf_counter() - seconds
+    s.duration = seconds
+    observe(name, seconds, tuple(sorted(labels.items())))
+    collected = _current_trace.get()
+    if collected is not None:
+        collected.append(s)
+
+
+class Trace:
+    def __init__(self):
+        self.spans: list[Span] = []
+
+    def summary(self) -> list[dict]:
+        return [s.summary() for s in sorted(self.spans, key=lambda s: s.start)]
+
+
+@contextmanager
+def trace():
+    """Collect every span finished inside this block (including worker threads started via `propagate`)."""
+    t = Trace()
+    token = _current_trace.set(t.spans)
+    try:
+        yield t
+    finally:
+        _current_trace.reset(token)
+
+
+def propagate(fn):
+    """
+    Wrap `fn` so it runs in a copy of the caller's context in worker threads,
+    letting spans (and usage records) join the caller's trace.
+    """
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.copy().run(fn, *args, **kwargs)
+
+
+# ──────────────────────────────────────────────
+#  Reading
+# ──────────────────────────────────────────────
+def snapshot() -> dict:
+    """Copy of all histograms and counters, safe to format outside the lock."""
+    with _lock:
+        hists = {k: (list(v[0]), v[1], v[2]) for k, v in _histograms.items()}
+        counters = dict(_counters)
+    return {"histograms": hists, "counters": counters}
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def _fmt_labels(labels: tuple, extra: tuple = ()) -> str:
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    body = ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in items)
+    return "{" + body + "}"
+
+
+def _metric_name(name: str) -> str:
+    return "ayurveda_" + "".join(c if c.isalnum() else "_" for c in name)
+
+
+def render_prometheus() -> str:
+    snap = snapshot()
+    lines = ["# TYPE ayurveda_stage_seconds histogram"]
+    for (name, labels), (buckets, total, count) in sorted(snap["histograms"].items()):
+        base = (("stage", name),) + labels
+        cumulative = 0
+        for bound, n in zip(BUCKETS, buckets):
+            cumulative += n
+            lines.append(f"ayurveda_stage_seconds_bucket{_fmt_labels(base, (('le', bound),))} {cumulative}")
+        lines.append(f"ayurveda_stage_seconds_bucket{_fmt_labels(base, (('le', '+Inf'),))} {count}")
+        lines.append(f"ayurveda_stage_seconds_sum{_fmt_labels(base)} {total:.6f}")
+        lines.append(f"ayurveda_stage_seconds_count{_fmt_labels(base)} {count}")
+
+    seen = set()
+    for (name, labels), value in sorted(snap["counters"].items()):
+        metric = _metric_name(name) + "_total"
+        if metric not in seen:
+            lines.append(f"# TYPE {metric} counter")
+            seen.add(metric)
+        lines.append(f"{metric}{_fmt_labels(labels)} {value:g}")
+    return "\n".join(lines) + "\n"
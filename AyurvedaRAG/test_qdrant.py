@@ -12,17 +12,15 @@ print(f"QDRANT_API_KEY: {'*' * 20 if os.getenv('QDRANT_API_KEY') else 'NOT SET'}
 print()
 
 try:
-    from vector_db import QdrantStorage
+    from vector_db import AyurvedicStorage, AYURVEDIC_COLLECTIONS
     print("Attempting to connect to Qdrant...")
-    storage = QdrantStorage()
+    storage = AyurvedicStorage()
     print("✅ Successfully connected to Qdrant!")
     
-    # Try to get sources
-    sources = storage.get_all_sources()
-    print(f"📚 Found {len(sources)} document(s) in the database")
-    if sources:
-        for source in sources:
-            print(f"  • {source}")
+    # Report how many points each collection holds
+    for name in AYURVEDIC_COLLECTIONS:
+        count = storage.client.get_collection(name).points_count or 0
+        print(f"  • {name}: {count} point(s)")
     
 except ConnectionError as e:
     print(f"❌ Connection Error: {e}")
@@ -0,0 +1,15 @@
+"""
+Unit tests run offline: no OpenAI key, Qdrant server or writable source tree needed.
+
+Usage (from the AyurvedaRAG directory):
+    pip install -r requirements-dev.txt
+    python -m pytest -q
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "offline-tests")
+os.environ.setdefault("USAGE_DB_PATH", ":memory:")
+os.environ.setdefault("PLAN_DB_PATH", ":memory:")
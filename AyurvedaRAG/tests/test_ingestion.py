@@ -0,0 +1,58 @@
+import pytest
+
+import ingestion
+
+
+@pytest.fixture
+def small_pages(monkeypatch):
+    monkeypatch.setattr(ingestion, "TEXT_PAGE_BYTES", 64)
+
+
+def _write(tmp_path, text: str):
+    path = tmp_path / "doc.txt"
+    path.write_bytes(text.encode("utf-8"))
+    return path
+
+
+def test_text_pages_never_split_words(tmp_path, small_pages):
+    words = [f"word{i:05d}" for i in range(2000)]
+    path = _write(tmp_path, " ".join(words))
+    chunks = [c for _, c in ingestion.iter_chunks(ingestion.iter_pages(path), chunk_size=300, overlap=50)]
+    seen = {w for c in chunks for w in c.split()}
+    assert seen == set(words)
+
+
+def test_text_pages_cover_the_file_once(tmp_path, small_pages):
+    text = "Ashwagandha root\nreduces Vata ç Pitta " * 40 + "tail"
+    path = _write(tmp_path, text)
+    pages = list(ingestion.iter_pages(path))
+    assert "".join(t for _, t in pages) == text
+    assert [n for n, _ in pages] == list(range(len(pages)))
+    assert len(pages) <= ingestion.count_pages(path)
+
+
+def test_resume_from_page_matches_full_read(tmp_path, small_pages):
+    path = _write(tmp_path, "त्रिफला churna at night. " * 60)
+    full = dict(ingestion.iter_pages(path))
+    resumed = dict(ingestion.iter_pages(path, start_page=3, end_page=6))
+    assert resumed == {n: full[n] for n in range(3, 6)}
+    assert all("�" not in t for t in resumed.values())
+
+
+def test_chunks_overlap_and_respect_size():
+    pages = iter([(0, " ".join(f"w{i}" for i in range(500)))])
+    chunks = [c for _, c in ingestion.iter_chunks(pages, chunk_size=200, overlap=40)]
+    assert all(len(c) <= 200 for c in chunks)
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.split()[0] in previous.split()
+
+
+def test_chunker_rejects_overlap_not_smaller_than_size():
+    with pytest.raises(ValueError):
+        list(ingestion.iter_chunks(iter([(0, "text")]), chunk_size=10, overlap=10))
+
+
+def test_tag_chunk_detects_condition_type_and_dosha():
+    meta = ingestion.tag_chunk("Gurmar leaf churna lowers high blood sugar and pacifies Kapha.")
+    assert meta == {"condition": "Diabetes", "type": "herb", "dosha": "Kapha"}
+    assert ingestion.tag_chunk("Nothing relevant here.", default_condition="Acidity")["condition"] == "Acidity"
@@ -0,0 +1,104 @@
+import uuid
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+
+import kb_snapshot
+import retrieval_cache
+import vector_db
+from embedders import LocalEmbedder
+
+KNOWLEDGE = {
+    "herbs": [
+        {"id": "h1", "text": "Gurmar leaf lowers blood sugar", "condition": "Diabetes"},
+        {"id": "h2", "text": "Ashwagandha root calms Vata", "condition": "Stress"},
+    ],
+    "diet_guidelines": [
+        {"id": "d1", "text": "Bitter gourd juice before breakfast", "condition": "Diabetes"},
+    ],
+}
+EMBEDDER = LocalEmbedder()
+
+
+@pytest.fixture
+def new_store(monkeypatch):
+    """Factory for an AyurvedicStorage on a fresh in-memory Qdrant at `dim`."""
+    monkeypatch.setattr(vector_db, "_make_client", lambda: QdrantClient(":memory:"))
+    monkeypatch.setattr(retrieval_cache, "_version", {"value": None, "checked": 0.0})
+
+    def make(dim: int = vector_db.NATIVE_EMBED_DIM) -> vector_db.AyurvedicStorage:
+        vector_db.reset_client()
+        monkeypatch.setattr(vector_db, "EMBED_DIM", dim)
+        monkeypatch.setattr(vector_db, "_dims", {})
+        retrieval_cache.set_version(0)
+        return vector_db.AyurvedicStorage(max_retries=1)
+
+    yield make
+    vector_db.reset_client()
+
+
+def _seed(store, knowledge=KNOWLEDGE):
+    for collection, entries in knowledge.items():
+        vectors, _ = EMBEDDER.embed([e["text"] for e in entries], vector_db.EMBED_DIM, vector_db.NATIVE_EMBED_DIM)
+        store.upsert_knowledge(collection, entries, vectors)
+    return store
+
+
+def _points(store, collection):
+    points, _ = store.client.scroll(collection, limit=100, with_payload=True, with_vectors=True)
+    return {str(p.id): p for p in points}
+
+
+def _export(store, tmp_path):
+    path = str(tmp_path / "kb.snapshot")
+    kb_snapshot.export_snapshot(path, store=store, embedder_model=EMBEDDER.model, knowledge=KNOWLEDGE)
+    return path
+
+
+def test_replace_keeps_ingested_documents(new_store, tmp_path):
+    store = _seed(new_store())
+    path = _export(store, tmp_path)
+
+    ingested = str(uuid.uuid4())
+    vector, _ = EMBEDDER.embed(["Triphala from the Charaka Samhita"], vector_db.EMBED_DIM, vector_db.NATIVE_EMBED_DIM)
+    store.client.upsert("herbs", points=[
+        PointStruct(id=ingested, vector=vector[0], payload={"text": "Triphala", "source": "charaka.pdf"}),
+    ])
+    stale = {"id": "h3", "text": "Entry since removed from ayurvedic_kb", "condition": "Acidity"}
+    _seed(store, {"herbs": [stale]})
+
+    kb_snapshot.restore_snapshot(path, store=store, replace=True, embedder_model=EMBEDDER.model, knowledge=KNOWLEDGE)
+    herbs = _points(store, "herbs")
+    assert ingested in herbs
+    assert vector_db.point_id("herbs", "h3") not in herbs
+    assert {vector_db.point_id("herbs", e["id"]) for e in KNOWLEDGE["herbs"]} <= set(herbs)
+
+
+def test_restores_into_a_smaller_dimension(new_store, tmp_path):
+    path = _export(_seed(new_store()), tmp_path)
+    assert kb_snapshot.read_manifest(path)["collections"]["herbs"]["dim"] == vector_db.NATIVE_EMBED_DIM
+
+    store = new_store(256)
+    kb_snapshot.restore_snapshot(path, store=store, embedder_model=EMBEDDER.model, knowledge=KNOWLEDGE)
+    herbs = _points(store, "herbs")
+    assert len(herbs) == len(KNOWLEDGE["herbs"])
+    for point in herbs.values():
+        assert len(point.vector) == 256
+        assert np.linalg.norm(point.vector) == pytest.approx(1.0, abs=1e-4)
+
+
+def test_mismatched_snapshot_is_refused_without_force(new_store, tmp_path):
+    store = _seed(new_store())
+    path = _export(store, tmp_path)
+    changed = {**KNOWLEDGE, "herbs": KNOWLEDGE["herbs"][:1]}
+
+    with pytest.raises(kb_snapshot.SnapshotMismatch):
+        kb_snapshot.restore_snapshot(path, store=store, embedder_model="text-embedding-3-small", knowledge=KNOWLEDGE)
+    with pytest.raises(kb_snapshot.SnapshotMismatch):
+        kb_snapshot.restore_snapshot(path, store=store, embedder_model=EMBEDDER.model, knowledge=changed)
+
+    stats = kb_snapshot.restore_snapshot(path, store=store, force=True, embedder_model="text-embedding-3-small",
+                                         knowledge=changed)
+    assert stats["herbs"].startswith("restored 2")
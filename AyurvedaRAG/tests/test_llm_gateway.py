@@ -0,0 +1,81 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import llm_gateway
+from llm_gateway import AdaptiveLimiter, LLMGateway, TokenBucket
+
+
+class _Completions:
+    def __init__(self, errors=()):
+        self.calls = []
+        self.errors = list(errors)
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.errors:
+            raise self.errors.pop(0)
+        return SimpleNamespace(choices=[], usage=None)
+
+
+def _gateway(errors=()):
+    completions = _Completions(errors)
+    return LLMGateway(client=SimpleNamespace(chat=SimpleNamespace(completions=completions)), model="m"), completions
+
+
+def test_token_bucket_reports_debt():
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(30) == pytest.approx(30.0, abs=0.1)
+    assert TokenBucket(per_minute=0).reserve(10**6) == 0.0
+
+
+def test_limiter_serves_most_urgent_waiter_first():
+    limiter = AdaptiveLimiter(1, 1)
+    limiter.acquire(0)
+    order = []
+
+    def _wait(priority, label):
+        limiter.acquire(priority)
+        order.append(label)
+        limiter.release(False)
+
+    threads = [threading.Thread(target=_wait, args=(2, "background")),
+               threading.Thread(target=_wait, args=(0, "interactive"))]
+    for t in threads:
+        t.start()
+        time.sleep(0.05)
+    limiter.release(False)
+    for t in threads:
+        t.join(1)
+    assert order == ["interactive", "background"]
+
+
+def test_rate_limit_wait_does_not_hold_a_slot(monkeypatch):
+    gateway, _ = _gateway()
+    gateway.requests = TokenBucket(per_minute=1)
+    slots_held = []
+    monkeypatch.setattr(llm_gateway.time, "sleep", lambda s: slots_held.append(gateway.limiter.in_flight))
+    gateway.complete([{"role": "user", "content": "a"}], max_tokens=10, priority="background")
+    gateway.complete([{"role": "user", "content": "b"}], max_tokens=10, priority="background")
+    assert slots_held == [0]
+    assert gateway.limiter.in_flight == 0
+
+
+def test_retries_throttled_calls_and_shrinks_concurrency(monkeypatch):
+    monkeypatch.setattr(llm_gateway.time, "sleep", lambda s: None)
+    throttled = type("RateLimitError", (Exception,), {"status_code": 429})
+    gateway, completions = _gateway(errors=[throttled("429")])
+    gateway.complete([{"role": "user", "content": "x"}], max_tokens=10)
+    assert len(completions.calls) == 2
+    assert gateway.limiter.limit < llm_gateway.LLM_MAX_CONCURRENCY
+
+
+def test_non_transient_errors_are_raised():
+    gateway, completions = _gateway(errors=[ValueError("bad request")])
+    with pytest.raises(ValueError):
+        gateway.complete([{"role": "user", "content": "x"}], max_tokens=10)
+    assert len(completions.calls) == 1
+    assert gateway.limiter.in_flight == 0
@@ -0,0 +1,56 @@
+import pytest
+
+import model_router
+from model_router import ModelRouter
+
+ROUTES = {
+    "plan": {"models": ["gpt-4o-mini", "gpt-4.1-mini"], "p95_s": 10.0, "max_error_rate": 0.25, "max_cost_usd": 0.01},
+    "cheap": {"models": ["gpt-4o", "gpt-4.1-nano"], "p95_s": 10.0, "max_error_rate": 0.25, "max_cost_usd": 0.001},
+}
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setattr(model_router, "ROUTER_MIN_SAMPLES", 3)
+    monkeypatch.setattr(model_router, "ROUTER_COOLDOWN_S", 60.0)
+    return ModelRouter({k: dict(v) for k, v in ROUTES.items()})
+
+
+def test_primary_model_when_healthy(router):
+    assert router.choose("plan", 1000, 500) == ("gpt-4o-mini", "primary")
+
+
+def test_cost_target_skips_expensive_primary(router):
+    assert router.choose("cheap", 1000, 500) == ("gpt-4.1-nano", "cost")
+
+
+def test_slow_model_is_tripped_and_skipped(router):
+    for _ in range(3):
+        router.observe("plan", "gpt-4o-mini", 30.0, True)
+    assert router.choose("plan", 1000, 500) == ("gpt-4.1-mini", "unhealthy")
+    # Still in cooldown even though it has no fresh samples
+    assert router.choose("plan", 1000, 500)[0] == "gpt-4.1-mini"
+
+
+def test_error_rate_trips_a_model(router):
+    for ok in (False, False, True):
+        router.observe("plan", "gpt-4o-mini", 1.0, ok)
+    assert router.choose("plan", 1000, 500)[0] == "gpt-4.1-mini"
+
+
+def test_health_is_tracked_per_call_type(router):
+    for _ in range(3):
+        router.observe("cheap", "gpt-4.1-nano", 30.0, True)
+    assert router.choose("plan", 1000, 500) == ("gpt-4o-mini", "primary")
+
+
+def test_failover_and_exhaustion(router):
+    assert router.choose("plan", 1000, 500, exclude=("gpt-4o-mini",)) == ("gpt-4.1-mini", "failover")
+    assert router.choose("plan", 1000, 500, exclude=tuple(ROUTES["plan"]["models"])) is None
+
+
+def test_all_unhealthy_picks_lowest_latency(router):
+    for model, seconds in (("gpt-4o-mini", 40.0), ("gpt-4.1-mini", 20.0)):
+        for _ in range(3):
+            router.observe("plan", model, seconds, True)
+    assert router.choose("plan", 1000, 500) == ("gpt-4.1-mini", "all_unhealthy")
@@ -0,0 +1,62 @@
+import pytest
+
+import plan_store
+
+SECTIONS = [
+    {"key": "herbs", "title": "Herbal Remedies", "content": "- Gurmar"},
+    {"key": "diet", "title": "Diet Plan", "content": "- Bitter gourd"},
+]
+PROVENANCE = {
+    "herbs": [{"collection": "herbs", "point_id": "p1", "hash": "h1"},
+              {"collection": "herbs", "point_id": "p2", "hash": "h2"}],
+    "diet": [{"collection": "diet_guidelines", "point_id": "p3", "hash": "h3"}],
+}
+
+
+@pytest.fixture(autouse=True)
+def memory_db(monkeypatch):
+    monkeypatch.setattr(plan_store, "PLAN_DB_PATH", ":memory:")
+    monkeypatch.setattr(plan_store, "_db", None)
+
+
+def test_entry_hash_ignores_point_id():
+    payload = {"text": "Gurmar", "condition": "Diabetes"}
+    assert plan_store.entry_hash(payload) == plan_store.entry_hash({**payload, "point_id": "x"})
+    assert plan_store.entry_hash(payload) != plan_store.entry_hash({**payload, "text": "Neem"})
+
+
+def test_save_and_get_round_trip():
+    plan_id = plan_store.save_plan("u1", "Diabetes", "sectioned", SECTIONS, PROVENANCE)
+    plan = plan_store.get_plan(plan_id)
+    assert plan["revision"] == 1
+    assert plan["sections"] == SECTIONS
+    assert plan["provenance"] == PROVENANCE
+    assert plan_store.get_plan("missing") is None
+
+
+def test_affected_sections_match_point_and_hash():
+    plan_id = plan_store.save_plan("u1", "Diabetes", "sectioned", SECTIONS, PROVENANCE)
+    assert plan_store.affected_sections({("p2", "h2")}) == {plan_id: ["herbs"]}
+    assert plan_store.affected_sections({("p2", "other")}) == {}
+    assert plan_store.affected_sections(set()) == {}
+    assert len(plan_store.tracked_entries()) == 3
+
+
+def test_update_sections_replaces_content_and_provenance():
+    plan_id = plan_store.save_plan("u1", "Diabetes", "sectioned", SECTIONS, PROVENANCE)
+    new = {"herbs": [{"collection": "herbs", "point_id": "p1", "hash": "h1b"}]}
+    assert plan_store.update_sections(plan_id, {"herbs": "- Gurmar (updated)"}, new) == 2
+    plan = plan_store.get_plan(plan_id)
+    assert plan["sections"][0]["content"] == "- Gurmar (updated)"
+    assert plan["sections"][1] == SECTIONS[1]
+    assert plan["provenance"]["herbs"] == new["herbs"]
+    assert plan_store.affected_sections({("p2", "h2")}) == {}
+    with pytest.raises(KeyError):
+        plan_store.update_sections("missing", {}, {})
+
+
+def test_disabled_storage(monkeypatch):
+    monkeypatch.setattr(plan_store, "PLAN_DB_PATH", "")
+    assert plan_store.save_plan("u1", "Diabetes", "single", SECTIONS, PROVENANCE) is None
+    assert plan_store.get_plan("anything") is None
+    assert plan_store.tracked_entries() == []
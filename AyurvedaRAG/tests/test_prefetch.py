@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+import ayurvedic_rag
+
+
+class _Store:
+    def kb_version(self):
+        return 1
+
+
+@pytest.fixture
+def held_pool(monkeypatch):
+    """Keep the prefetch workers busy so scheduled prefetches stay queued (cancellable)."""
+    monkeypatch.setattr(ayurvedic_rag, "_prefetched", type(ayurvedic_rag._prefetched)())
+    monkeypatch.setattr(ayurvedic_rag, "_prefetch_by_user", {})
+    monkeypatch.setattr(ayurvedic_rag, "_prefetch_wanted", {})
+    monkeypatch.setattr(ayurvedic_rag, "AyurvedicStorage", _Store)
+    monkeypatch.setattr(ayurvedic_rag, "retrieve_for_conditions",
+                        lambda conditions: {c: {"herbs": [{"text": c}]} for c in conditions})
+    gate = threading.Event()
+    for _ in range(ayurvedic_rag._prefetch_pool._max_workers):
+        ayurvedic_rag._prefetch_pool.submit(gate.wait)
+    yield gate
+    for _, future in ayurvedic_rag._prefetched.values():
+        future.cancel()
+    gate.set()
+
+
+def _queued(condition):
+    return ayurvedic_rag._prefetch_key(condition) in ayurvedic_rag._prefetched
+
+
+def test_switching_away_cancels_an_unshared_prefetch(held_pool):
+    ayurvedic_rag.prefetch_retrieval(["Acidity"], user_id="a")
+    ayurvedic_rag.prefetch_retrieval(["Diabetes"], user_id="a")
+    assert not _queued("Acidity")
+    assert _queued("Diabetes")
+
+
+def test_prefetch_wanted_by_another_user_is_kept(held_pool):
+    ayurvedic_rag.prefetch_retrieval(["Diabetes"], user_id="a")
+    assert ayurvedic_rag.prefetch_retrieval(["Diabetes"], user_id="b") == []
+    ayurvedic_rag.prefetch_retrieval(["Acidity"], user_id="a")
+    assert _queued("Diabetes")
+    ayurvedic_rag.prefetch_retrieval(["Acidity"], user_id="b")
+    assert not _queued("Diabetes")
+
+
+def test_history_prefetch_is_not_cancelled_by_a_selection(held_pool):
+    ayurvedic_rag.prefetch_retrieval(["Arthritis"], user_id=None)
+    ayurvedic_rag.prefetch_retrieval(["Arthritis"], user_id="a")
+    ayurvedic_rag.prefetch_retrieval(["Stress"], user_id="a")
+    assert _queued("Arthritis")
+    held_pool.set()
+    assert ayurvedic_rag._take_prefetched("Arthritis", _Store()) == {"herbs": [{"text": "Arthritis"}]}
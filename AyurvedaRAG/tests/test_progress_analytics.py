@@ -0,0 +1,97 @@
+import math
+
+import pytest
+
+import progress_analytics as pa
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("7/10", 0.7), ("3 / 5", 0.6), ("80%", 0.8),
+    ("1", 0.1), ("2", 0.2), ("10", 1.0), (1, 0.1), (7, 0.7), (10.0, 1.0), ("7.5", 0.75),
+    ("0.7", 0.7), (0.35, 0.35), (0, 0.0),
+    ("very good", 1.0), ("good", 0.75), ("not great", 0.0), ("poor", 0.25),
+])
+def test_normalize_reads_scores(value, expected):
+    assert pa.normalize("energy_level", value) == pytest.approx(expected)
+
+
+def test_whole_numbers_are_monotonic_on_a_ten_point_scale():
+    scores = [pa.normalize("energy_level", str(n)) for n in range(11)]
+    assert scores == sorted(scores)
+    assert len(set(scores)) == 11
+
+
+def test_improvement_field_uses_its_own_lexicon():
+    assert pa.normalize("symptoms_improvement", "slight improvement") == pytest.approx(0.35)
+    assert pa.normalize("symptoms_improvement", "resolved") == 1.0
+
+
+@pytest.mark.parametrize("value", [None, "", "n/a", {"level": None}])
+def test_normalize_unreadable_values(value):
+    assert math.isnan(pa.normalize("energy_level", value))
+
+
+def test_normalize_accepts_unhashable_values():
+    assert pa.normalize("energy_level", ["good"]) == 0.75
+
+
+def _logs(values):
+    return [{"week": w, "energy_level": v, "digestion": v, "sleep_quality": v, "symptoms_improvement": v}
+            for w, v in enumerate(values, start=1)]
+
+
+def test_analyze_trend_and_moving_average():
+    analysis = pa.analyze(_logs(["2", "4", "6"]), window=2)
+    assert analysis["weeks"] == [1, 2, 3]
+    assert analysis["trend"]["energy_level"] == pytest.approx(0.2)
+    assert analysis["moving_average"]["energy_level"] == pytest.approx([0.2, 0.3, 0.5])
+    assert analysis["week_over_week"]["energy_level"][-1] == pytest.approx(0.2)
+
+
+def test_latest_log_of_a_week_wins():
+    logs = _logs(["2", "4"]) + [{"week": 2, "timestamp": 99, "energy_level": "9"}]
+    assert pa.analyze(logs)["latest"]["energy_level"] == pytest.approx(0.9)
+
+
+def test_trend_change_gates_the_narrative():
+    first = pa.analyze(_logs(["5"]))
+    two = pa.analyze(_logs(["5", "6"]))
+    assert pa.trend_change(first, first) == []
+    assert pa.trend_change(first, two) == ["first trend"]
+    steady = pa.analyze(_logs(["5", "5", "5"]))
+    assert pa.trend_change(pa.analyze(_logs(["5", "5"])), steady) == []
+    dropped = pa.analyze(_logs(["5", "5", "5", "1"]))
+    reasons = pa.trend_change(steady, dropped)
+    assert any("week over week" in r for r in reasons)
+    assert "overall steady -> declining" in reasons
+
+
+def test_relogging_a_week_after_a_jump_is_quiet():
+    logs = _logs(["5", "5", "5", "1"])
+    relogged = logs + [{**logs[-1], "timestamp": 99}]
+    assert pa.trend_change(pa.analyze(logs), pa.analyze(relogged)) == []
+    backfilled = [{**logs[0], "energy_level": "6", "timestamp": 99}] + relogged
+    assert pa.trend_change(pa.analyze(relogged), pa.analyze(backfilled)) == []
+    corrected = relogged + [{**logs[-1], "timestamp": 100, "energy_level": "5", "digestion": "5"}]
+    assert pa.trend_change(pa.analyze(relogged), pa.analyze(corrected))
+
+
+def test_trajectory_vectors_separate_rising_from_falling():
+    rising = pa.trajectory_vector(_logs(["2", "4", "6", "8"]))
+    also_rising = pa.trajectory_vector(_logs(["3", "5", "7", "9"]))
+    falling = pa.trajectory_vector(_logs(["8", "6", "4", "2"]))
+    assert len(rising) == pa.TRAJECTORY_DIM
+
+    def cos(a, b):
+        return sum(x * y for x, y in zip(a, b))
+
+    assert cos(rising, also_rising) > cos(rising, falling)
+    assert pa.trajectory_vector(_logs([None])) is None
+
+
+def test_cohort_shares():
+    logs = [{**log, "user_id": "up"} for log in _logs(["2", "5", "8"])]
+    logs += [{**log, "user_id": "down"} for log in _logs(["8", "5", "2"])]
+    cohort = pa.cohort_analysis(logs)
+    assert cohort["users"] == 2
+    assert cohort["logs"] == 6
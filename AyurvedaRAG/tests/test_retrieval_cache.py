@@ -0,0 +1,58 @@
+import retrieval_cache
+from retrieval_cache import RetrievalCache
+
+
+def test_get_returns_copies():
+    cache = RetrievalCache(10_000)
+    cache.put(("k",), [{"text": "Triphala"}])
+    first = cache.get(("k",))
+    first[0]["text"] = "changed"
+    assert cache.get(("k",)) == [{"text": "Triphala"}]
+    assert cache.get(("missing",)) is None
+
+
+def test_evicts_least_recently_used_within_byte_bound():
+    cache = RetrievalCache(1500)
+    for key in "abc":
+        cache.put((key,), [{"text": key * 200}])
+    cache.get(("a",))
+    cache.put(("d",), [{"text": "d" * 200}])
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) is not None
+    assert cache.stats()["bytes"] <= 1500
+
+
+def test_oversized_results_are_not_cached():
+    cache = RetrievalCache(100)
+    cache.put(("big",), [{"text": "x" * 500}])
+    assert cache.get(("big",)) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_replacing_a_key_keeps_the_byte_count_exact():
+    cache = RetrievalCache(10_000)
+    cache.put(("k",), [{"text": "a" * 100}])
+    cache.put(("k",), [{"text": "b" * 10}])
+    assert cache.stats() == {"entries": 1, "bytes": len('[{"text": "bbbbbbbbbb"}]') + 256, "max_bytes": 10_000}
+
+
+def test_keys_depend_on_version_and_vector():
+    base = retrieval_cache.make_key(1, "herbs", "Diabetes", [0.1, 0.2], 4)
+    assert base == retrieval_cache.make_key(1, "herbs", "Diabetes", [0.1, 0.2], 4)
+    assert base != retrieval_cache.make_key(2, "herbs", "Diabetes", [0.1, 0.2], 4)
+    assert base != retrieval_cache.make_key(1, "herbs", "Diabetes", [0.1, 0.3], 4)
+
+
+def test_version_is_refetched_after_ttl(monkeypatch):
+    monkeypatch.setattr(retrieval_cache, "_version", {"value": None, "checked": 0.0})
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return len(calls)
+
+    assert retrieval_cache.current_version(fetch, max_age_s=60) == 1
+    assert retrieval_cache.current_version(fetch, max_age_s=60) == 1
+    assert retrieval_cache.current_version(fetch, max_age_s=0) == 2
+    retrieval_cache.set_version(7)
+    assert retrieval_cache.current_version(fetch, max_age_s=60) == 7
@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+import pytest
+
+import usage
+
+
+@pytest.fixture
+def ledger(monkeypatch):
+    monkeypatch.setattr(usage, "USAGE_DB_PATH", ":memory:")
+    monkeypatch.setattr(usage, "_db", None)
+    monkeypatch.setattr(usage, "USER_TOKEN_BUDGET", 100)
+    monkeypatch.setattr(usage, "ANONYMOUS_TOKEN_BUDGET", 0)
+
+
+def _spend(user_id: str, tokens: int):
+    with usage.track(user_id=user_id):
+        usage.record("llm", "gpt-4o-mini", SimpleNamespace(prompt_tokens=tokens, completion_tokens=0))
+
+
+def test_estimate_cost_uses_model_prices():
+    assert usage.estimate_cost("openai/gpt-4o-mini", 1_000_000, 1_000_000) == pytest.approx(0.75)
+    assert usage.estimate_cost("unknown-model", 1000) == 0.0
+
+
+def test_budget_degrades_once_exceeded(ledger, monkeypatch):
+    monkeypatch.setattr(usage, "USAGE_BUDGET_MODE", "degrade")
+    _spend("u1", 60)
+    assert usage.check_budget("u1") == {"allowed": True, "degraded": False, "used": 60, "budget": 100}
+    _spend("u1", 60)
+    assert usage.check_budget("u1")["degraded"] is True
+    assert usage.check_budget("u2")["used"] == 0
+
+
+def test_budget_rejects_in_reject_mode(ledger, monkeypatch):
+    monkeypatch.setattr(usage, "USAGE_BUDGET_MODE", "reject")
+    _spend("u1", 150)
+    assert usage.check_budget("u1")["allowed"] is False
+
+
+def test_anonymous_callers_have_their_own_budget(ledger, monkeypatch):
+    _spend(usage.ANONYMOUS_USER_ID, 500)
+    assert usage.check_budget(usage.ANONYMOUS_USER_ID) == {"allowed": True, "degraded": False, "used": 0, "budget": 0}
+    monkeypatch.setattr(usage, "ANONYMOUS_TOKEN_BUDGET", 1000)
+    assert usage.check_budget(usage.ANONYMOUS_USER_ID)["used"] == 500
+
+
+def test_budget_fails_open_when_ledger_is_unavailable(ledger, monkeypatch):
+    monkeypatch.setattr(usage, "USAGE_DB_PATH", "/proc/nonexistent/usage.db")
+    assert usage.check_budget("u1")["allowed"] is True
+    _spend("u1", 10)  # recording is guarded as well
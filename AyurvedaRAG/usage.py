@@ -0,0 +1,245 @@
+"""
+Token and cost accounting for LLM and embedding calls.
+
+Every call reports its `response.usage` through `record()`. Records are:
+  • attributed to the active `track()` block (user, condition, Inngest function, run)
+  • persisted to a small SQLite ledger so spend can be queried over time
+  • mirrored into telemetry counters for /metrics
+
+Per-user budgets are enforced with `check_budget()` before expensive calls.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+import telemetry
+
+# USD per 1M tokens: (input, output)
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+
+USAGE_DB_PATH = os.getenv("USAGE_DB_PATH", str(Path(__file__).parent / "usage.db"))
+USER_TOKEN_BUDGET = int(os.getenv("USER_TOKEN_BUDGET", "0"))          # 0 disables budgets
+# Callers without a user_id share the "anonymous" ID, so they get their own budget (0 = exempt)
+ANONYMOUS_USER_ID = "anonymous"
+ANONYMOUS_TOKEN_BUDGET = int(os.getenv("ANONYMOUS_TOKEN_BUDGET", "0"))
+USAGE_BUDGET_WINDOW_S = int(os.getenv("USAGE_BUDGET_WINDOW_S", "86400"))
+USAGE_BUDGET_MODE = os.getenv("USAGE_BUDGET_MODE", "degrade")          # "reject" | "degrade"
+
+# max_tokens used per call type once a user is over budget in "degrade" mode
+DEGRADED_MAX_TOKENS = {
+    "plan": int(os.getenv("DEGRADED_PLAN_MAX_TOKENS", "700")),
+    "progress_report": int(os.getenv("DEGRADED_REPORT_MAX_TOKENS", "300")),
+}
+
+GROUPABLE_FIELDS = ("user_id", "condition", "function", "run_id", "kind", "model", "call")
+
+_current: ContextVar = ContextVar("ayurveda_usage", default=None)
+_db_lock = threading.Lock()
+_db: sqlite3.Connection | None = None
+
+
+# ──────────────────────────────────────────────
+#  Pricing
+# ──────────────────────────────────────────────
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int = 0) -> float:
+    name = model.split("/", 1)[-1]
+    price_in, price_out = MODEL_PRICES.get(name, (0.0, 0.0))
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1_000_000
+
+
+# ──────────────────────────────────────────────
+#  Persistent ledger
+# ──────────────────────────────────────────────
+def _conn() -> sqlite3.Connection | None:
+    global _db
+    if not USAGE_DB_PATH:
+        return None
+    if _db is None:
+        _db = sqlite3.connect(USAGE_DB_PATH, check_same_thread=False)
+        _db.execute("PRAGMA journal_mode=WAL")
+        _db.execute("PRAGMA synchronous=NORMAL")
+        _db.execute(
+            """CREATE TABLE IF NOT EXISTS usage_events (
+                ts REAL, run_id TEXT, user_id TEXT, condition TEXT, function TEXT,
+                kind TEXT, model TEXT, call TEXT,
+                prompt_tokens INTEGER, completion_tokens INTEGER, total_tokens INTEGER,
+                cost_usd REAL
+            )"""
+        )
+        _db.execute("CREATE INDEX IF NOT EXISTS idx_usage_user_ts ON usage_events (user_id, ts)")
+        _db.commit()
+    return _db
+
+
+def _persist(row: dict):
+    with _db_lock:
+        db = _conn()
+        if db is None:
+            return
+        db.execute(
+            "INSERT INTO usage_events VALUES (:ts, :run_id, :user_id, :condition, :function, :kind, :model, "
+            ":call, :prompt_tokens, :completion_tokens, :total_tokens, :cost_usd)",
+            row,
+        )
+        db.commit()
+
+
+# ──────────────────────────────────────────────
+#  Per-request aggregation
+# ──────────────────────────────────────────────
+class UsageLedger:
+    def __init__(self, **dims):
+        self.dims = dims
+        self.records: list[dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, row: dict):
+        with self._lock:
+            self.records.append(row)
+
+    def summary(self) -> dict:
+        totals = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cost_usd": 0.0, "calls": []}
+        for r in self.records:
+            for key in ("prompt_tokens", "completion_tokens", "total_tokens", "cost_usd"):
+                totals[key] += r[key]
+            totals["calls"].append(
+                {k: r[k] for k in ("kind", "call", "model", "prompt_tokens", "completion_tokens", "total_tokens")}
+            )
+        totals["cost_usd"] = round(totals["cost_usd"], 6)
+        return totals
+
+
+@contextmanager
+def track(**dims):
+    """Attribute every usage record inside this block to `dims` (user_id, condition, function, run_id)."""
+    ledger = UsageLedger(**dims)
+    token = _current.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _current.reset(token)
+
+
+def merge(*summaries: dict) -> dict:
+    """Combine ledger summaries returned by separate Inngest steps."""
+    out = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cost_usd": 0.0, "calls": []}
+    for s in summaries:
+        for key in ("prompt_tokens", "completion_tokens", "total_tokens", "cost_usd"):
+            out[key] += s.get(key, 0)
+        out["calls"].extend(s.get("calls", []))
+    out["cost_usd"] = round(out["cost_usd"], 6)
+    return out
+
+
+def record(kind: str, model: str, usage, call: str = ""):
+    """Record one API call's `response.usage`. Missing usage is recorded as zero tokens."""
+    prompt = int(getattr(usage, "prompt_tokens", 0) or 0)
+    completion = int(getattr(usage, "completion_tokens", 0) or 0)
+    total = int(getattr(usage, "total_tokens", 0) or (prompt + completion))
+    ledger = _current.get()
+    dims = ledger.dims if ledger is not None else {}
+    row = {
+        "ts": time.time(),
+        "run_id": dims.get("run_id"),
+        "user_id": dims.get("user_id"),
+        "condition": dims.get("condition"),
+        "function": dims.get("function"),
+        "kind": kind,
+        "model": model,
+        "call": call or kind,
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "total_tokens": total,
+        "cost_usd": estimate_cost(model, prompt, completion),
+    }
+    if ledger is not None:
+        ledger.add(row)
+    telemetry.incr("tokens", total, kind=kind, model=model)
+    try:
+        _persist(row)
+    except Exception as e:
+        print(f"⚠️  Failed to persist usage: {e}")
+
+
+# ──────────────────────────────────────────────
+#  Queries & budgets
+# ──────────────────────────────────────────────
+def query_usage(
+    group_by: str = "user_id",
+    since: float | None = None,
+    until: float | None = None,
+    **filters,
+) -> list[dict]:
+    """Aggregate the ledger by one field over a time window, optionally filtered by field values."""
+    if group_by not in GROUPABLE_FIELDS:
+        raise ValueError(f"Cannot group usage by: {group_by}")
+    where, params = ["ts >= ?", "ts <= ?"], [since or 0, until or time.time()]
+    for field, value in filters.items():
+        if field not in GROUPABLE_FIELDS:
+            raise ValueError(f"Cannot filter usage by: {field}")
+        if value is not None:
+            where.append(f"{field} = ?")
+            params.append(value)
+    sql = (
+        f"SELECT {group_by}, COUNT(*), SUM(prompt_tokens), SUM(completion_tokens), SUM(total_tokens), SUM(cost_usd) "
+        f"FROM usage_events WHERE {' AND '.join(where)} GROUP BY {group_by} ORDER BY SUM(total_tokens) DESC"
+    )
+    with _db_lock:
+        db = _conn()
+        if db is None:
+            return []
+        rows = db.execute(sql, params).fetchall()
+    return [
+        {
+            group_by: r[0],
+            "calls": r[1],
+            "prompt_tokens": r[2] or 0,
+            "completion_tokens": r[3] or 0,
+            "total_tokens": r[4] or 0,
+            "cost_usd": round(r[5] or 0.0, 6),
+        }
+        for r in rows
+    ]
+
+
+def tokens_used(user_id: str, window_s: int = USAGE_BUDGET_WINDOW_S) -> int:
+    rows = query_usage("user_id", since=time.time() - window_s, user_id=user_id)
+    return rows[0]["total_tokens"] if rows else 0
+
+
+def check_budget(user_id: str) -> dict:
+    """
+    Compare a user's recent token spend against USER_TOKEN_BUDGET (ANONYMOUS_TOKEN_BUDGET
+    for anonymous callers). Returns {"allowed": bool, "degraded": bool, "used": int, "budget": int}.
+    Fails open when the ledger cannot be read, so an unavailable ledger never blocks plans.
+    """
+    budget = ANONYMOUS_TOKEN_BUDGET if user_id == ANONYMOUS_USER_ID else USER_TOKEN_BUDGET
+    if not budget or not user_id:
+        return {"allowed": True, "degraded": False, "used": 0, "budget": 0}
+    try:
+        used = tokens_used(user_id)
+    except Exception as e:
+        print(f"⚠️  Failed to read usage ledger, skipping budget check: {e}")
+        telemetry.incr("budget_check_failed")
+        return {"allowed": True, "degraded": False, "used": 0, "budget": budget}
+    exceeded = used >= budget
+    if exceeded:
+        telemetry.incr("budget_exceeded", mode=USAGE_BUDGET_MODE)
+    return {
+        "allowed": not exceeded or USAGE_BUDGET_MODE == "degrade",
+        "degraded": exceeded and USAGE_BUDGET_MODE == "degrade",
+        "used": used,
+        "budget": budget,
+    }
@@ -1,11 +1,25 @@
 from qdrant_client import QdrantClient
 from qdrant_client.models import (
-    VectorParams, Distance, PointStruct,
-    PayloadSchemaType, Filter, FieldCondition, MatchValue
+    PointStruct, PayloadSchemaType, Filter, FieldCondition, MatchValue,
+    OptimizersConfigDiff, KeywordIndexParams, KeywordIndexType,
+    IsEmptyCondition, PayloadField, ShardingMethod,
+    CreateAlias, CreateAliasOperation, Range, SearchParams,
 )
+import math
 import os
+import re
+import socket
+import threading
 import time
 import uuid
+from itertools import islice
+from urllib.parse import urlparse
+from typing import Callable, Iterable, Iterator
+
+import collection_profiles
+import progress_analytics
+import retrieval_cache
+import telemetry
 
 
 # ──────────────────────────────────────────────
@@ -21,7 +35,124 @@ AYURVEDIC_COLLECTIONS = [
     "progress_logs",
 ]
 
-EMBED_DIM = 1536  # text-embedding-3-small dimension
+# text-embedding-3-small returns 1536 dimensions natively and supports shortened
+# outputs (e.g. 256, 512, 1024). Shared by data_loader and the collections.
+NATIVE_EMBED_DIM = 1536
+EMBED_DIM = int(os.getenv("EMBED_DIM", str(NATIVE_EMBED_DIM)))
+
+# Vector-less collection holding the KB version (see retrieval_cache)
+KB_META_COLLECTION = "kb_meta"
+_KB_VERSION_POINT = 0
+_dims: dict[str, tuple[int, int]] = {}   # collection -> (KB version, vector size)
+
+# Built-in ayurvedic_kb entries, as opposed to ingested document chunks (which carry a "source")
+BUILT_IN_KNOWLEDGE = Filter(must=[IsEmptyCondition(is_empty=PayloadField(key="source"))])
+
+# One point per (tenant, user, condition) summarising the user's progress
+# trajectory (progress_analytics.trajectory_vector). Derived from progress_logs
+# and rebuildable with AyurvedicStorage.rebuild_trajectories; always tenant-filtered
+# by payload, whatever PROGRESS_TENANCY is.
+TRAJECTORY_COLLECTION = "progress_trajectories"
+
+# Payload hydration for the knowledge collections:
+#   "local"  — searches return only IDs and scores; payloads of the seeded
+#              ayurvedic_kb entries come from an in-process index keyed by their
+#              UUIDv5 point IDs (see register_local_knowledge) and only other
+#              points (ingested documents) are fetched from Qdrant. Used while the
+#              KB hash recorded at seed time matches the local entries.
+#   "remote" — every search returns full payloads (with_payload=True)
+KB_HYDRATION = os.getenv("KB_HYDRATION", "local").lower()
+_local_payloads: dict[str, dict[str, dict]] = {}   # collection -> point ID -> payload
+_local_kb_hash: str | None = None
+_seeded_kb_hash: str | None = None                 # as last read from kb_meta
+
+# Bulk-load defaults (see AyurvedicStorage.bulk_upsert)
+UPSERT_BATCH_SIZE = int(os.getenv("QDRANT_UPSERT_BATCH_SIZE", "256"))
+UPLOAD_PARALLEL = int(os.getenv("QDRANT_UPLOAD_PARALLEL", "1"))
+UPLOAD_WAIT = os.getenv("QDRANT_UPLOAD_WAIT", "true").lower() == "true"
+
+# Progress-log tenancy (one tenant per clinic):
+#   "payload"    — one collection, tenant_id payload index flagged is_tenant (default)
+#   "shard"      — one collection with a custom shard key per tenant (Qdrant cluster)
+#   "collection" — one progress_logs_<tenant> collection per tenant
+PROGRESS_TENANCY = os.getenv("PROGRESS_TENANCY", "payload")
+DEFAULT_TENANT = os.getenv("DEFAULT_TENANT", "default")
+_TENANT_RE = re.compile(r"[^a-z0-9_-]")
+
+# Transport: "rest" (default) or "grpc". One client (and its connection pool)
+# is shared by every AyurvedicStorage in the process.
+QDRANT_TRANSPORT = os.getenv("QDRANT_TRANSPORT", "rest").lower()
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+QDRANT_POOL_SIZE = int(os.getenv("QDRANT_POOL_SIZE", "8"))                 # HTTP connections / gRPC channels
+QDRANT_CONNECT_TIMEOUT_S = float(os.getenv("QDRANT_CONNECT_TIMEOUT_S", "5"))
+QDRANT_TIMEOUT_S = int(os.getenv("QDRANT_TIMEOUT_S", "60"))                # read timeout for every request
+QDRANT_SEARCH_TIMEOUT_S = int(os.getenv("QDRANT_SEARCH_TIMEOUT_S", "10"))  # per-search deadline
+QDRANT_KEEPALIVE_S = float(os.getenv("QDRANT_KEEPALIVE_S", "30"))
+
+
+def point_id(collection: str, entry_id: str) -> str:
+    """Deterministic point ID for a knowledge entry, stable across re-seeds."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{collection}_{entry_id}"))
+
+
+def _embed_lazily(
+    entries: Iterable[dict],
+    embed_fn: Callable[[list[str]], list[list[float]]],
+    batch_size: int,
+) -> Iterator[tuple[dict, list[float]]]:
+    """Pair entries with embeddings, embedding one batch at a time."""
+    it = iter(entries)
+    while batch := list(islice(it, batch_size)):
+        vectors = embed_fn([e["text"] for e in batch])
+        if len(vectors) != len(batch):
+            raise RuntimeError(f"Embedding failed for a batch of {len(batch)} entries")
+        yield from zip(batch, vectors)
+
+
+def register_local_knowledge(knowledge: dict[str, list[dict]], kb_hash: str):
+    """Index `knowledge` ({collection: entries}) by point ID for local hydration."""
+    global _local_payloads, _local_kb_hash
+    _local_payloads = {
+        collection: {point_id(collection, e["id"]): {k: v for k, v in e.items() if k != "id"} for e in entries}
+        for collection, entries in knowledge.items()
+    }
+    _local_kb_hash = kb_hash
+
+
+def physical_name(collection: str, dim: int) -> str:
+    """Versioned collection behind the `collection` alias (see reindex.py)."""
+    return f"{collection}__d{dim}"
+
+
+def resolve_collection(client: QdrantClient, collection: str) -> str | None:
+    """Physical collection an alias points at, the name itself for pre-alias collections, or None."""
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == collection:
+            return alias.collection_name
+    return collection if client.collection_exists(collection) else None
+
+
+def fit_vector(vector: list[float], dim: int) -> list[float]:
+    """Truncate an embedding to `dim` and re-normalise (valid for Matryoshka-trained models)."""
+    if len(vector) == dim:
+        return vector
+    if len(vector) < dim:
+        raise ValueError(f"Cannot fit a {len(vector)}-d vector into a {dim}-d collection")
+    head = vector[:dim]
+    norm = math.sqrt(sum(x * x for x in head)) or 1.0
+    return [x / norm for x in head]
+
+
+def tenant_key(tenant_id: str | None) -> str:
+    """Normalise a tenant/clinic ID for use in payloads, shard keys and collection names."""
+    key = _TENANT_RE.sub("_", (tenant_id or DEFAULT_TENANT).strip().lower())
+    return key or DEFAULT_TENANT
+
+
+def _probe(url: str, port: int):
+    """Fail fast with QDRANT_CONNECT_TIMEOUT_S when the server is unreachable."""
+    host = urlparse(url).hostname or "localhost"
+    socket.create_connection((host, port), timeout=QDRANT_CONNECT_TIMEOUT_S).close()
 
 
 def _make_client() -> QdrantClient:
@@ -29,7 +160,73 @@ def _make_client() -> QdrantClient:
     api_key = os.getenv("QDRANT_API_KEY")
     if not url:
         raise ValueError("QDRANT_URL environment variable is not set")
-    return QdrantClient(url=url, api_key=api_key, timeout=60, prefer_grpc=False)
+
+    parsed = urlparse(url)
+    if QDRANT_TRANSPORT == "grpc":
+        _probe(url, QDRANT_GRPC_PORT)
+        keepalive_ms = int(QDRANT_KEEPALIVE_S * 1000)
+        return QdrantClient(
+            url=url,
+            api_key=api_key,
+            prefer_grpc=True,
+            grpc_port=QDRANT_GRPC_PORT,
+            timeout=QDRANT_TIMEOUT_S,
+            pool_size=QDRANT_POOL_SIZE,
+            grpc_options={
+                "grpc.keepalive_time_ms": keepalive_ms,
+                "grpc.keepalive_timeout_ms": min(keepalive_ms, 10_000),
+                "grpc.keepalive_permit_without_calls": 1,
+                "grpc.http2.max_pings_without_data": 0,
+                "grpc.max_receive_message_length": 64 * 1024 * 1024,
+            },
+        )
+
+    import httpx
+
+    _probe(url, parsed.port or (443 if parsed.scheme == "https" else 6333))
+    return QdrantClient(
+        url=url,
+        api_key=api_key,
+        prefer_grpc=False,
+        timeout=QDRANT_TIMEOUT_S,
+        limits=httpx.Limits(
+            max_connections=QDRANT_POOL_SIZE,
+            max_keepalive_connections=QDRANT_POOL_SIZE,
+            keepalive_expiry=QDRANT_KEEPALIVE_S,
+        ),
+    )
+
+
+_client_lock = threading.Lock()
+_client: QdrantClient | None = None
+
+
+def get_client() -> QdrantClient:
+    """Process-wide client, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = _make_client()
+        return _client
+
+
+def reset_client(failed: QdrantClient | None = None):
+    """
+    Drop the shared client. After a connection failure pass the client that
+    failed: it is dropped only if it is still the shared one, and not closed,
+    since other threads may be mid-request on it. Without `failed` (transport
+    change, benchmarks) the client is closed as well.
+    """
+    global _client
+    with _client_lock:
+        if failed is not None and _client is not failed:
+            return
+        old, _client = _client, None
+    if old is not None and failed is None:
+        try:
+            old.close()
+        except Exception:
+            pass
 
 
 # ──────────────────────────────────────────────
@@ -47,14 +244,19 @@ class AyurvedicStorage:
     def __init__(self, max_retries: int = 3):
         last_error = None
         for attempt in range(max_retries):
+            client = None
             try:
-                self.client = _make_client()
+                self.client = client = get_client()
+                self._tenants_ready: set[str] = set()
                 self._ensure_collections()
                 print("✅ AyurvedicStorage ready")
                 return
             except Exception as e:
                 last_error = e
+                if client is not None:
+                    reset_client(failed=client)
                 if attempt < max_retries - 1:
+                    telemetry.incr("retries", target="qdrant_connect")
                     wait_time = 2 ** attempt
                     print(f"⚠️  Attempt {attempt + 1} failed. Retrying in {wait_time}s…")
                     time.sleep(wait_time)
@@ -67,21 +269,156 @@ class AyurvedicStorage:
     # ── Internal helpers ──────────────────────
     def _ensure_collections(self):
         for name in AYURVEDIC_COLLECTIONS:
+            # `name` is an alias onto a dimension-versioned collection so that
+            # reindex.py can switch dimensions atomically (aliases resolve here too)
             if not self.client.collection_exists(name):
-                self.client.create_collection(
-                    collection_name=name,
-                    vectors_config=VectorParams(size=EMBED_DIM, distance=Distance.COSINE),
+                self._create_aliased(name, name)
+        if not self.client.collection_exists(KB_META_COLLECTION):
+            self.client.create_collection(collection_name=KB_META_COLLECTION, vectors_config={})
+        if not self.client.collection_exists(TRAJECTORY_COLLECTION):
+            self.create_physical_collection(
+                TRAJECTORY_COLLECTION, TRAJECTORY_COLLECTION, progress_analytics.TRAJECTORY_DIM,
+            )
+
+    def _create_aliased(self, logical: str, name: str):
+        """Create `name` as an alias onto a new physical_name(name, EMBED_DIM) with `logical`'s profile."""
+        physical = physical_name(name, EMBED_DIM)
+        if not self.client.collection_exists(physical):
+            self.create_physical_collection(logical, physical, EMBED_DIM)
+        self.client.update_collection_aliases(change_aliases_operations=[
+            CreateAliasOperation(create_alias=CreateAlias(collection_name=physical, alias_name=name)),
+        ])
+
+    def create_physical_collection(self, name: str, physical: str, dim: int):
+        """Create `physical` with the profile and payload indexes of logical collection `name`."""
+        extra = {}
+        if name == "progress_logs" and PROGRESS_TENANCY == "shard":
+            extra["sharding_method"] = ShardingMethod.CUSTOM
+        self.client.create_collection(
+            collection_name=physical,
+            **collection_profiles.create_kwargs(name, dim),
+            **extra,
+        )
+        if name.startswith("progress_logs") or name == TRAJECTORY_COLLECTION:
+            self._index_progress_fields(physical)
+        if name == TRAJECTORY_COLLECTION:
+            self.client.create_payload_index(
+                collection_name=physical, field_name="weeks", field_schema=PayloadSchemaType.INTEGER,
+            )
+        # Index common filter fields
+        for field in ("condition", "dosha", "type", "herb"):
+            try:
+                self.client.create_payload_index(
+                    collection_name=physical,
+                    field_name=field,
+                    field_schema=PayloadSchemaType.KEYWORD,
                 )
-                # Index common filter fields
-                for field in ("condition", "dosha", "type", "herb"):
-                    try:
-                        self.client.create_payload_index(
-                            collection_name=name,
-                            field_name=field,
-                            field_schema=PayloadSchemaType.KEYWORD,
-                        )
-                    except Exception:
-                        pass
+            except Exception:
+                pass
+
+    def collection_dim(self, collection: str) -> int:
+        """Vector size of the collection currently behind `collection`, cached per KB version."""
+        version = self.kb_version()
+        cached = _dims.get(collection)
+        if cached is None or cached[0] != version:
+            info = self.client.get_collection(collection)
+            cached = _dims[collection] = (version, info.config.params.vectors.size)
+        return cached[1]
+
+    def _fit(self, collection: str, vector: list[float]) -> list[float]:
+        return fit_vector(vector, self.collection_dim(collection))
+
+    def _index_progress_fields(self, name: str):
+        indexes = {
+            "tenant_id": KeywordIndexParams(type=KeywordIndexType.KEYWORD, is_tenant=True),
+            "user_id": PayloadSchemaType.KEYWORD,
+        }
+        for field, schema in indexes.items():
+            try:
+                self.client.create_payload_index(collection_name=name, field_name=field, field_schema=schema)
+            except Exception as e:
+                print(f"⚠️  Could not create {field} index on {name}: {e}")
+
+    def tenant_collections(self) -> list[str]:
+        """
+        Existing per-tenant progress_logs_<tenant> collections (PROGRESS_TENANCY=collection),
+        by their alias name; physical `__d<dim>` collections map back to their alias.
+        """
+        names = {re.sub(r"__d\d+$", "", c.name) for c in self.client.get_collections().collections}
+        return sorted(n for n in names if n.startswith("progress_logs_"))
+
+    def progress_tenants(self) -> list[str]:
+        """Tenant keys that have progress logs (the default tenant is always included)."""
+        if PROGRESS_TENANCY == "collection":
+            tenants = {name[len("progress_logs_"):] for name in self.tenant_collections()}
+        else:
+            hits = self.client.facet("progress_logs", key="tenant_id", limit=100_000, exact=True).hits
+            tenants = {str(hit.value) for hit in hits}
+        return sorted(tenants | {DEFAULT_TENANT})
+
+    def _progress_target(self, tenant_id: str | None) -> tuple[str, str, dict]:
+        """
+        Resolve where a tenant's progress logs live.
+        Returns (tenant key, collection name, extra kwargs for upsert/scroll).
+        """
+        tenant = tenant_key(tenant_id)
+        if PROGRESS_TENANCY == "collection":
+            name = f"progress_logs_{tenant}"
+            if tenant not in self._tenants_ready:
+                if not self.client.collection_exists(name):
+                    # Aliased like the shared collections, so reindex.py can migrate it
+                    self._create_aliased("progress_logs", name)
+                self._tenants_ready.add(tenant)
+            return tenant, name, {}
+        if PROGRESS_TENANCY == "shard":
+            if tenant not in self._tenants_ready:
+                physical = resolve_collection(self.client, "progress_logs")
+                if tenant not in self.client.list_shard_keys(physical).shard_keys:
+                    self.client.create_shard_key(physical, tenant)
+                self._tenants_ready.add(tenant)
+            return tenant, "progress_logs", {"shard_key_selector": tenant}
+        return tenant, "progress_logs", {}
+
+    def _tenant_condition(self, tenant: str):
+        if PROGRESS_TENANCY != "payload":
+            return None
+        match = FieldCondition(key="tenant_id", match=MatchValue(value=tenant))
+        if tenant != DEFAULT_TENANT:
+            return match
+        # Logs written before tenancy was introduced have no tenant_id
+        return Filter(should=[match, IsEmptyCondition(is_empty=PayloadField(key="tenant_id"))])
+
+    def reconcile_collections(self, apply: bool = True) -> dict:
+        """
+        Bring existing collections, per-tenant progress collections and the
+        trajectory collection included, in line with their configuration profile.
+        Returns {collection: {"profile", "changes", "requires_recreate"}}; settings
+        such as shard_number cannot be changed in place and are only reported.
+        """
+        report = {}
+        # Per-tenant progress collections are created with the progress_logs profile
+        targets = [(name, name) for name in AYURVEDIC_COLLECTIONS]
+        targets += [(name, "progress_logs") for name in self.tenant_collections()]
+        targets.append((TRAJECTORY_COLLECTION, TRAJECTORY_COLLECTION))
+        for name, logical in targets:
+            if not self.client.collection_exists(name):
+                continue
+            config = self.client.get_collection(name).config
+            kwargs, changes, recreate = collection_profiles.diff(logical, config)
+            if apply and kwargs:
+                self.client.update_collection(collection_name=name, **kwargs)
+            report[name] = {
+                "profile": collection_profiles.profile_name(logical),
+                "changes": changes,
+                "requires_recreate": recreate,
+            }
+        return report
+
+    def _set_indexing_threshold(self, collection: str, threshold_kb: int | None):
+        self.client.update_collection(
+            collection_name=collection,
+            optimizers_config=OptimizersConfigDiff(indexing_threshold=threshold_kb),
+        )
 
     # ── Upsert ───────────────────────────────
     def upsert_knowledge(self, collection: str, entries: list[dict], vectors: list[list[float]]):
@@ -93,13 +430,91 @@ class AyurvedicStorage:
         if collection not in AYURVEDIC_COLLECTIONS:
             raise ValueError(f"Unknown collection: {collection}")
 
+        dim = self.collection_dim(collection)
         points = []
         for i, entry in enumerate(entries):
-            entry_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{collection}_{entry['id']}"))
+            entry_id = point_id(collection, entry["id"])
             payload = {k: v for k, v in entry.items() if k != "id"}
-            points.append(PointStruct(id=entry_id, vector=vectors[i], payload=payload))
+            points.append(PointStruct(id=entry_id, vector=fit_vector(vectors[i], dim), payload=payload))
+
+        with telemetry.span("qdrant.upsert", collection=collection) as sp:
+            sp.set(points=len(points))
+            self.client.upsert(collection_name=collection, points=points)
 
-        self.client.upsert(collection_name=collection, points=points)
+    def bulk_upsert(
+        self,
+        collection: str,
+        entries: Iterable[dict],
+        vectors: Iterable[list[float]] | None = None,
+        embed_fn: Callable[[list[str]], list[list[float]]] | None = None,
+        batch_size: int = UPSERT_BATCH_SIZE,
+        parallel: int = UPLOAD_PARALLEL,
+        wait: bool = UPLOAD_WAIT,
+        defer_indexing: bool = False,
+    ) -> dict:
+        """
+        Stream entries into a collection in batches, for corpora too large for upsert_knowledge.
+
+        `entries` (and `vectors`, if given) may be generators; when `vectors` is
+        None each batch is embedded on the fly with `embed_fn`, so only one batch
+        of points is held in memory. `parallel` > 1 uploads batches from worker
+        processes. With `wait=False` batches are acknowledged once written to the
+        WAL; a final waited write of the last point then acts as a consistency
+        barrier, since updates are applied in order. `defer_indexing` switches
+        HNSW indexing off for the duration of the load (the profile's bulk
+        indexing threshold) and restores the profile threshold afterwards.
+
+        Returns {"collection", "points", "seconds", "points_per_s"}.
+        """
+        if collection not in AYURVEDIC_COLLECTIONS:
+            raise ValueError(f"Unknown collection: {collection}")
+        if vectors is None and embed_fn is None:
+            raise ValueError("bulk_upsert needs either vectors or embed_fn")
+
+        count = 0
+        last_point: list[PointStruct] = []
+
+        dim = self.collection_dim(collection)
+
+        def _points() -> Iterator[PointStruct]:
+            nonlocal count
+            pairs = zip(entries, vectors) if vectors is not None else _embed_lazily(entries, embed_fn, batch_size)
+            for entry, vector in pairs:
+                point = PointStruct(
+                    id=point_id(collection, entry["id"]),
+                    vector=fit_vector(vector, dim),
+                    payload={k: v for k, v in entry.items() if k != "id"},
+                )
+                count += 1
+                last_point[:] = [point]
+                yield point
+
+        profile = collection_profiles.profile_for(collection)
+        started = time.perf_counter()
+        with telemetry.span("qdrant.bulk_upsert", collection=collection) as sp:
+            if defer_indexing:
+                self._set_indexing_threshold(collection, profile["bulk_indexing_threshold_kb"])
+            try:
+                self.client.upload_points(
+                    collection_name=collection,
+                    points=_points(),
+                    batch_size=batch_size,
+                    parallel=parallel,
+                    wait=wait,
+                )
+                if not wait and last_point:
+                    self.client.upsert(collection_name=collection, points=last_point, wait=True)
+            finally:
+                if defer_indexing:
+                    self._set_indexing_threshold(collection, profile["indexing_threshold_kb"])
+            sp.set(points=count)
+        elapsed = time.perf_counter() - started
+        return {
+            "collection": collection,
+            "points": count,
+            "seconds": round(elapsed, 3),
+            "points_per_s": round(count / elapsed, 1) if elapsed > 0 else 0.0,
+        }
 
     # ── Condition-based retrieval ─────────────
     def search_by_condition(
@@ -113,18 +528,25 @@ class AyurvedicStorage:
         Search a collection filtered by condition name.
         Returns a list of payloads with text and metadata.
         """
+        fitted = self._fit(collection, query_vector)
+        key = self._cache_key(collection, f"condition={condition}", fitted, top_k)
+        cached = retrieval_cache.CACHE.get(key) if key else None
+        if cached is not None:
+            return cached
+
         filt = Filter(
             must=[FieldCondition(key="condition", match=MatchValue(value=condition))]
         )
-        results = self.client.query_points(
-            collection_name=collection,
-            query=query_vector,
-            query_filter=filt,
-            with_payload=True,
-            limit=top_k,
-        ).points
+        local = self._hydrates_locally(collection)
+        with telemetry.span("qdrant.search", collection=collection) as sp:
+            results = self._query_points(collection, query_vector, fitted, top_k, filt, with_payload=not local)
+            sp.set(results=len(results))
 
-        return [getattr(r, "payload", {}) for r in results]
+        payloads = self._hydrate(collection, results, local)
+        if key:
+            retrieval_cache.CACHE.put(key, payloads)
+            self._remember_points(collection, payloads)
+        return payloads
 
     def search_semantic(
         self,
@@ -133,13 +555,141 @@ class AyurvedicStorage:
         top_k: int = 3,
     ) -> list[dict]:
         """Pure semantic search without condition filter."""
-        results = self.client.query_points(
-            collection_name=collection,
-            query=query_vector,
-            with_payload=True,
-            limit=top_k,
-        ).points
-        return [getattr(r, "payload", {}) for r in results]
+        fitted = self._fit(collection, query_vector)
+        key = self._cache_key(collection, "", fitted, top_k)
+        cached = retrieval_cache.CACHE.get(key) if key else None
+        if cached is not None:
+            return cached
+
+        local = self._hydrates_locally(collection)
+        with telemetry.span("qdrant.search_semantic", collection=collection) as sp:
+            results = self._query_points(collection, query_vector, fitted, top_k, with_payload=not local)
+            sp.set(results=len(results))
+        payloads = self._hydrate(collection, results, local)
+        if key:
+            retrieval_cache.CACHE.put(key, payloads)
+            self._remember_points(collection, payloads)
+        return payloads
+
+    # ── Payloads by point ID ──────────────────
+    def _hydrates_locally(self, collection: str) -> bool:
+        if KB_HYDRATION != "local" or collection not in _local_payloads or _local_kb_hash is None:
+            return False
+        self.kb_version()   # refreshes _seeded_kb_hash along with the version
+        return _seeded_kb_hash == _local_kb_hash
+
+    def _hydrate(self, collection: str, results: list, local: bool) -> list[dict]:
+        """Search hits -> payloads with "point_id"; with `local`, hits carry no payload."""
+        if not local:
+            return [{**(getattr(r, "payload", None) or {}), "point_id": str(r.id)} for r in results]
+        ids = [str(r.id) for r in results]
+        found = {p["point_id"]: p for p in self.get_payloads(collection, ids, kb_version=self.kb_version())}
+        return [found[pid] for pid in ids if pid in found]
+
+    def _remember_points(self, collection: str, payloads: list[dict]):
+        version = self.kb_version()
+        for payload in payloads:
+            retrieval_cache.CACHE.put(retrieval_cache.point_key(version, collection, payload["point_id"]), [payload])
+
+    def get_payloads(self, collection: str, ids: list[str], kb_version: int | None = None) -> list[dict]:
+        """
+        Payloads of the points `ids`, in that order, each with its "point_id";
+        points that no longer exist are skipped. Seeded ayurvedic_kb entries come
+        from the local index (KB_HYDRATION), payloads this process saw at
+        `kb_version` from the retrieval cache, the rest from one Qdrant call.
+        """
+        found: dict[str, dict] = {}
+        index = _local_payloads.get(collection) if self._hydrates_locally(collection) else None
+        if index is not None:
+            for pid in ids:
+                if pid in index:
+                    found[pid] = {**index[pid], "point_id": pid}
+            telemetry.incr("kb_hydration", len(found), source="local")
+        if kb_version is not None and retrieval_cache.enabled() and collection != "progress_logs":
+            for pid in ids:
+                if pid in found:
+                    continue
+                hit = retrieval_cache.CACHE.get(retrieval_cache.point_key(kb_version, collection, pid), kind="point")
+                if hit:
+                    found[pid] = hit[0]
+
+        missing = [pid for pid in ids if pid not in found]
+        if missing:
+            with telemetry.span("qdrant.retrieve", collection=collection) as sp:
+                points = self.client.retrieve(
+                    collection_name=collection, ids=missing, with_payload=True, with_vectors=False,
+                )
+                sp.set(requested=len(missing), results=len(points))
+            for p in points:
+                found[str(p.id)] = {**(p.payload or {}), "point_id": str(p.id)}
+            if index is not None:
+                telemetry.incr("kb_hydration", len(points), source="remote")
+        return [found[pid] for pid in ids if pid in found]
+
+    def _query_points(self, collection: str, raw_vector: list[float], fitted: list[float], top_k: int,
+                      query_filter=None, with_payload: bool = True):
+        def _run(vector):
+            return self.client.query_points(
+                collection_name=collection,
+                query=vector,
+                query_filter=query_filter,
+                with_payload=with_payload,
+                limit=top_k,
+                timeout=QDRANT_SEARCH_TIMEOUT_S,
+            ).points
+
+        try:
+            return _run(fitted)
+        except Exception:
+            # The alias may have just been switched to another dimension by
+            # reindex.py; re-read the layout once before giving up
+            _dims.pop(collection, None)
+            retrieval_cache.current_version(self._read_kb_version, max_age_s=0)
+            dim = self.collection_dim(collection)
+            if dim == len(fitted):
+                raise
+            return _run(fit_vector(raw_vector, dim))
+
+    def _cache_key(self, collection: str, filter_key: str, query_vector: list[float], limit: int) -> tuple | None:
+        if not retrieval_cache.enabled() or collection == "progress_logs":
+            return None
+        return retrieval_cache.make_key(self.kb_version(), collection, filter_key, query_vector, limit)
+
+    # ── KB version ────────────────────────────
+    def _read_kb_meta(self) -> dict:
+        points = self.client.retrieve(KB_META_COLLECTION, ids=[_KB_VERSION_POINT], with_payload=True)
+        return (points[0].payload or {}) if points else {}
+
+    def _read_kb_version(self) -> int:
+        global _seeded_kb_hash
+        try:
+            meta = self._read_kb_meta()
+        except Exception:
+            return 0
+        _seeded_kb_hash = meta.get("kb_hash")
+        return int(meta.get("version", 0))
+
+    def kb_version(self) -> int:
+        """Current KB version; one point lookup at most every KB_VERSION_TTL_S seconds per process."""
+        return retrieval_cache.current_version(self._read_kb_version)
+
+    def bump_kb_version(self, kb_hash: str | None = None) -> int:
+        """
+        Mark the knowledge collections as changed, invalidating every worker's retrieval cache.
+        `kb_hash` records the ayurvedic_kb content just seeded (see KB_HYDRATION); None keeps the previous one.
+        """
+        global _seeded_kb_hash
+        version = time.time_ns()
+        if kb_hash is None:
+            kb_hash = self._read_kb_meta().get("kb_hash")
+        payload = {"version": version, "updated_at": int(time.time()), "kb_hash": kb_hash}
+        self.client.upsert(
+            collection_name=KB_META_COLLECTION,
+            points=[PointStruct(id=_KB_VERSION_POINT, vector={}, payload=payload)],
+        )
+        _seeded_kb_hash = kb_hash
+        retrieval_cache.set_version(version)
+        return version
 
     # ── Progress logs ─────────────────────────
     def log_progress(
@@ -149,47 +699,208 @@ class AyurvedicStorage:
         week: int,
         progress_data: dict,
         vector: list[float],
+        tenant_id: str | None = None,
     ) -> str:
-        """Store a weekly progress log for a user."""
-        log_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{user_id}_{condition}_w{week}_{time.time()}"))
+        """Store a weekly progress log for a user within a tenant (clinic)."""
+        tenant, collection, extra = self._progress_target(tenant_id)
+        log_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{tenant}_{user_id}_{condition}_w{week}_{time.time()}"))
         payload = {
+            "tenant_id": tenant,
             "user_id": user_id,
             "condition": condition,
             "week": week,
             "timestamp": int(time.time()),
             **progress_data,
         }
-        self.client.upsert(
-            collection_name="progress_logs",
-            points=[PointStruct(id=log_id, vector=vector, payload=payload)],
-        )
+        with telemetry.span("qdrant.log_progress", tenancy=PROGRESS_TENANCY):
+            self.client.upsert(
+                collection_name=collection,
+                points=[PointStruct(id=log_id, vector=self._fit(collection, vector), payload=payload)],
+                **extra,
+            )
         return log_id
 
-    def get_user_progress(self, user_id: str, condition: str) -> list[dict]:
-        """Retrieve all progress logs for a specific user and condition."""
-        try:
-            filt = Filter(
-                must=[
-                    FieldCondition(key="user_id", match=MatchValue(value=user_id)),
-                    FieldCondition(key="condition", match=MatchValue(value=condition)),
-                ]
-            )
+    def _user_progress_points(self, user_id: str, condition: str, tenant_id: str | None,
+                              with_vectors: bool = False) -> list:
+        tenant, collection, extra = self._progress_target(tenant_id)
+        must = [
+            FieldCondition(key="user_id", match=MatchValue(value=user_id)),
+            FieldCondition(key="condition", match=MatchValue(value=condition)),
+        ]
+        tenant_cond = self._tenant_condition(tenant)
+        if tenant_cond is not None:
+            must.insert(0, tenant_cond)
+        with telemetry.span("qdrant.get_user_progress", tenancy=PROGRESS_TENANCY) as sp:
             points, _ = self.client.scroll(
-                collection_name="progress_logs",
-                scroll_filter=filt,
+                collection_name=collection,
+                scroll_filter=Filter(must=must),
                 limit=100,
                 with_payload=True,
+                with_vectors=with_vectors,
+                **extra,
             )
-            logs = [getattr(p, "payload", {}) for p in points]
-            return sorted(logs, key=lambda x: x.get("week", 0))
+            sp.set(results=len(points))
+        return sorted(points, key=lambda p: (getattr(p, "payload", None) or {}).get("week", 0))
+
+    def get_user_progress(self, user_id: str, condition: str, tenant_id: str | None = None) -> list[dict]:
+        """Retrieve all progress logs for a specific user and condition within a tenant."""
+        try:
+            return [getattr(p, "payload", {}) for p in self._user_progress_points(user_id, condition, tenant_id)]
+        except Exception:
+            return []
+
+    def get_condition_progress(self, condition: str, tenant_id: str | None = None,
+                               max_logs: int = 10_000) -> list[dict]:
+        """All users' progress logs for a condition within a tenant (for cohort analytics)."""
+        try:
+            tenant, collection, extra = self._progress_target(tenant_id)
+            must = [FieldCondition(key="condition", match=MatchValue(value=condition))]
+            tenant_cond = self._tenant_condition(tenant)
+            if tenant_cond is not None:
+                must.insert(0, tenant_cond)
+            logs, offset = [], None
+            with telemetry.span("qdrant.get_condition_progress", tenancy=PROGRESS_TENANCY) as sp:
+                while len(logs) < max_logs:
+                    points, offset = self.client.scroll(
+                        collection_name=collection,
+                        scroll_filter=Filter(must=must),
+                        limit=min(500, max_logs - len(logs)),
+                        offset=offset,
+                        with_payload=True,
+                        with_vectors=False,
+                        **extra,
+                    )
+                    logs.extend(getattr(p, "payload", {}) for p in points)
+                    if offset is None:
+                        break
+                sp.set(results=len(logs))
+            return logs
         except Exception:
             return []
 
+    # ── Progress trajectories ─────────────────
+    @staticmethod
+    def _trajectory_id(tenant: str, user_id: str, condition: str) -> str:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"trajectory_{tenant}_{user_id}_{condition}"))
+
+    def _trajectory_point(self, tenant: str, user_id: str, condition: str, points: list) -> PointStruct | None:
+        logs = [getattr(p, "payload", None) or {} for p in points]
+        vectors = [p.vector if isinstance(p.vector, list) else None for p in points]
+        vector = progress_analytics.trajectory_vector(logs, vectors)
+        if vector is None:
+            return None
+        analysis = progress_analytics.analyze(logs)
+        payload = {
+            "tenant_id": tenant,
+            "user_id": user_id,
+            "condition": condition,
+            "weeks": len(analysis["weeks"]),
+            "last_week": analysis["weeks"][-1],
+            "latest": analysis["latest"],
+            "trend": analysis["trend"],
+            "latest_notes": logs[-1].get("notes", ""),
+            "updated_at": int(time.time()),
+        }
+        return PointStruct(id=self._trajectory_id(tenant, user_id, condition), vector=vector, payload=payload)
+
+    def update_trajectory(self, user_id: str, condition: str, tenant_id: str | None = None) -> bool:
+        """Recompute one user's trajectory point from their logs. False when there is nothing to index."""
+        tenant = tenant_key(tenant_id)
+        points = self._user_progress_points(user_id, condition, tenant_id, with_vectors=True)
+        point = self._trajectory_point(tenant, user_id, condition, points)
+        if point is None:
+            return False
+        with telemetry.span("qdrant.update_trajectory"):
+            self.client.upsert(collection_name=TRAJECTORY_COLLECTION, points=[point])
+        return True
+
+    def rebuild_trajectories(self, tenant_id: str | None = None, batch_size: int = 500) -> int:
+        """Rebuild every trajectory point of a tenant from progress_logs. Returns the number indexed."""
+        tenant, collection, extra = self._progress_target(tenant_id)
+        tenant_cond = self._tenant_condition(tenant)
+        scroll_filter = Filter(must=[tenant_cond]) if tenant_cond is not None else None
+        grouped: dict[tuple[str, str], list] = {}
+        offset = None
+        with telemetry.span("qdrant.rebuild_trajectories", tenancy=PROGRESS_TENANCY) as sp:
+            while True:
+                points, offset = self.client.scroll(
+                    collection_name=collection,
+                    scroll_filter=scroll_filter,
+                    limit=batch_size,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True,
+                    **extra,
+                )
+                for p in points:
+                    payload = getattr(p, "payload", None) or {}
+                    grouped.setdefault((payload.get("user_id", ""), payload.get("condition", "")), []).append(p)
+                if offset is None:
+                    break
+            trajectories = []
+            for (user_id, condition), user_points in grouped.items():
+                user_points.sort(key=lambda p: (p.payload or {}).get("week", 0))
+                point = self._trajectory_point(tenant, user_id, condition, user_points)
+                if point is not None:
+                    trajectories.append(point)
+            for start in range(0, len(trajectories), batch_size):
+                self.client.upsert(collection_name=TRAJECTORY_COLLECTION, points=trajectories[start:start + batch_size])
+            sp.set(logs=sum(len(v) for v in grouped.values()), results=len(trajectories))
+        return len(trajectories)
+
+    def similar_trajectories(
+        self,
+        user_id: str,
+        condition: str,
+        tenant_id: str | None = None,
+        top_k: int = 10,
+        min_weeks: int = 2,
+        hnsw_ef: int | None = None,
+    ) -> list[dict]:
+        """
+        Users with the same condition (and tenant) whose progress trajectory is
+        closest to `user_id`'s: an approximate nearest-neighbour query on the
+        trajectory index, never a scan of the logs. Each result is the
+        neighbour's trajectory payload plus its similarity "score".
+        """
+        tenant = tenant_key(tenant_id)
+        pid = self._trajectory_id(tenant, user_id, condition)
+        found = self.client.retrieve(TRAJECTORY_COLLECTION, ids=[pid], with_vectors=True)
+        if not found and self.update_trajectory(user_id, condition, tenant_id):
+            found = self.client.retrieve(TRAJECTORY_COLLECTION, ids=[pid], with_vectors=True)
+        if not found:
+            return []
+
+        filt = Filter(
+            must=[
+                FieldCondition(key="tenant_id", match=MatchValue(value=tenant)),
+                FieldCondition(key="condition", match=MatchValue(value=condition)),
+                FieldCondition(key="weeks", range=Range(gte=min_weeks)),
+            ],
+            must_not=[FieldCondition(key="user_id", match=MatchValue(value=user_id))],
+        )
+        with telemetry.span("qdrant.similar_trajectories") as sp:
+            results = self.client.query_points(
+                collection_name=TRAJECTORY_COLLECTION,
+                query=found[0].vector,
+                query_filter=filt,
+                search_params=SearchParams(hnsw_ef=hnsw_ef) if hnsw_ef else None,
+                with_payload=True,
+                limit=top_k,
+                timeout=QDRANT_SEARCH_TIMEOUT_S,
+            ).points
+            sp.set(results=len(results))
+        return [{**(r.payload or {}), "score": round(r.score, 4)} for r in results]
+
     # ── Seeding ───────────────────────────────
     def is_seeded(self, collection: str) -> bool:
-        """Check if a collection already has data."""
+        """
+        Check if a collection already holds built-in knowledge. Ingested
+        document chunks carry a "source" field and don't count, so ingesting
+        into an empty KB doesn't make seeding skip the built-in entries.
+        """
         try:
-            info = self.client.get_collection(collection)
-            return (info.points_count or 0) > 0
+            points, _ = self.client.scroll(collection, scroll_filter=BUILT_IN_KNOWLEDGE, limit=1, with_payload=False)
+            return bool(points)
         except Exception:
             return False